@@ -0,0 +1,147 @@
+# accounts/cv_export.py
+"""
+Bulk CV export: many StudentCV PDFs rendered across a process pool and
+streamed out as one ZIP archive.
+
+Memory stays flat however many CVs are exported: CVs are read from the
+database in chunks, at most a few renders per worker are in flight at a
+time, and each finished PDF is written into the ZIP and handed to the
+caller straight away. The ZIP is written in streaming mode (local headers
+with data descriptors), so only the small central directory is kept until
+the end. Renders go through the CV PDF disk cache, so unchanged CVs are
+not rendered again. A render that fails, even by crashing its worker
+process, only lands that CV in errors.txt; a broken pool is replaced.
+"""
+import logging
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .cv_jobs import init_worker
+from .cv_pdf import get_pdf_cache, prepare_cv, render_payload
+from .models import StudentCV
+
+CHUNK_SIZE = 200        # CVs fetched per query
+IN_FLIGHT  = 2          # pending renders per worker process
+
+logger = logging.getLogger('accounts.cv_export')
+
+
+def export_queryset(position=None, min_score=0.0):
+    """Every CV, or those of students matching ``position`` at ``min_score`` % or more."""
+    cvs = StudentCV.objects.select_related('profile__user')
+    if position is not None:
+        cvs = cvs.filter(
+            profile__position_matches__position=position,
+            profile__position_matches__score__gte=min_score,
+        )
+    return cvs.order_by('pk')
+
+
+def _filename(cv):
+    return f"{cv.profile.user.username}-cv-{cv.pk}.pdf"
+
+
+def render_pdf(key, engine, payload):
+    """Worker task: PDF bytes for ``payload`` (None on error), stored in the disk cache."""
+    data = render_payload(engine, payload)
+    if data is not None:
+        get_pdf_cache().set(key, data)
+    return data
+
+
+def _result(future, name):
+    """The future's PDF bytes, or None if its render raised or its worker died."""
+    try:
+        return future.result()
+    except Exception:
+        logger.exception("Rendering %s failed", name)
+        return None
+
+
+def iter_cv_pdfs(cvs, processes=None, engine=None):
+    """
+    Yield ``(filename, pdf_bytes or None)`` for each CV in ``cvs``, in
+    completion order. ``processes=0`` renders in the current process.
+    """
+    cache = get_pdf_cache()
+    rows  = cvs.prefetch_related('experiences', 'languages').iterator(chunk_size=CHUNK_SIZE)
+
+    def prepared():
+        for cv in rows:
+            yield _filename(cv), prepare_cv(cv, engine)     # (key, engine, payload)
+
+    if processes == 0:
+        for name, task in prepared():
+            data = cache.get(task[0])
+            yield name, data if data is not None else render_pdf(*task)
+        return
+
+    slots = processes or os.cpu_count() or 1
+    pool  = ProcessPoolExecutor(max_workers=slots, initializer=init_worker)
+
+    def submit(task):
+        nonlocal pool
+        try:
+            return pool.submit(render_pdf, *task)
+        except BrokenProcessPool:   # a worker died; its pending renders fail, the rest go on
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = ProcessPoolExecutor(max_workers=slots, initializer=init_worker)
+            return pool.submit(render_pdf, *task)
+
+    try:
+        pending = {}            # future -> filename
+        for name, task in prepared():
+            data = cache.get(task[0])
+            if data is not None:
+                yield name, data
+                continue
+            pending[submit(task)] = name
+            if len(pending) >= slots * IN_FLIGHT:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    yield name, _result(future, name)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                yield name, _result(future, name)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _ZipSink:
+    """Write-only file object; zipfile treats it as unseekable and streams."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_cv_zip(cvs, processes=None, engine=None):
+    """Yield the bytes of a ZIP of ``cvs``' PDFs as each one is rendered."""
+    sink   = _ZipSink()
+    failed = []
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for name, data in iter_cv_pdfs(cvs, processes, engine):
+            if data is None:
+                failed.append(name)
+                continue
+            zf.writestr(name, data)
+            yield sink.drain()
+        if failed:
+            zf.writestr('errors.txt', "Error creating PDF for:\n" + "\n".join(failed) + "\n")
+    yield sink.drain()
@@ -0,0 +1,153 @@
+# accounts/cv_jobs.py
+"""
+DB-backed queue for CV PDF renders.
+
+The CV view only builds the (cheap) render input, checks the PDF disk cache
+and, on a miss, inserts a CVRenderJob row. ``run_worker`` (the
+``run_cv_worker`` command) claims queued rows and hands the input to a pool
+of processes that render the PDF and write it into the shared disk cache;
+the view's status endpoint then turns into a download link.
+
+Claiming is a conditional UPDATE (``status='queued'`` → ``'running'``), so
+several worker commands can share one queue without double-rendering.
+"""
+import datetime
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from .cv_pdf import get_pdf_cache, prepare_cv, render_payload
+from .models import CVRenderJob, StudentCV
+
+POLL_INTERVAL = 1.0
+
+
+def init_worker():
+    """Pool initializer: make Django settings usable under any start method."""
+    import django
+    django.setup()
+
+
+def render_to_cache(key, engine, payload):
+    """Worker task: render ``payload`` and store it under ``key``. Returns an error or None."""
+    data = render_payload(engine, payload)
+    if data is None:
+        return "Error creating PDF."
+    get_pdf_cache().set(key, data)
+    return None
+
+
+def enqueue_cv_render(cv, cache_key):
+    """Queue a render of ``cv`` (content hash ``cache_key``), reusing an identical pending job."""
+    pending = (CVRenderJob.objects
+               .filter(cv=cv, cache_key=cache_key, status__in=('queued', 'running'))
+               .order_by('-created_at').first())
+    return pending or CVRenderJob.objects.create(cv=cv, cache_key=cache_key)
+
+
+def claim_jobs(limit):
+    """Atomically move up to ``limit`` of the oldest queued jobs to running."""
+    claimed = []
+    if limit <= 0:
+        return []
+    candidates = (CVRenderJob.objects.filter(status='queued')
+                  .order_by('created_at').values_list('pk', flat=True)[:limit * 2])
+    for pk in candidates:
+        if len(claimed) == limit:
+            break
+        if CVRenderJob.objects.filter(pk=pk, status='queued').update(
+                status='running', started_at=timezone.now()):
+            claimed.append(pk)
+    return list(CVRenderJob.objects.filter(pk__in=claimed).select_related('cv'))
+
+
+def _finish(job_id, error, stdout=None):
+    CVRenderJob.objects.filter(pk=job_id).update(
+        status='failed' if error else 'done',
+        error=error or '',
+        finished_at=timezone.now(),
+    )
+    if stdout is not None:
+        stdout.write(f"job {job_id}: {error or 'done'}")
+
+
+def _prepare(job):
+    """Render input for the CV as it is now; records its key on the job."""
+    cv = StudentCV.objects.prefetch_related('experiences', 'languages').get(pk=job.cv_id)
+    key, engine, payload = prepare_cv(cv)
+    if key != job.cache_key:
+        CVRenderJob.objects.filter(pk=job.pk).update(cache_key=key)
+    return key, engine, payload
+
+
+def requeue_stale(older_than=600):
+    """Return jobs stuck in ``running`` (crashed worker) to the queue."""
+    cutoff = timezone.now() - datetime.timedelta(seconds=older_than)
+    return CVRenderJob.objects.filter(status='running', started_at__lt=cutoff).update(
+        status='queued', started_at=None,
+    )
+
+
+def run_worker(processes=None, poll_interval=POLL_INTERVAL, once=False, stdout=None):
+    """
+    Process the queue with ``processes`` render processes (default: CPU
+    count; 0 renders in this process). Keeps at most that many jobs claimed
+    at a time. With ``once`` it returns when the queue is empty; otherwise
+    it polls forever, returning jobs left ``running`` by a crashed worker
+    to the queue on every idle poll. Returns the number of jobs finished.
+    """
+    finished = 0
+    requeue_stale()
+
+    if processes == 0:
+        while True:
+            jobs = claim_jobs(1)
+            if not jobs:
+                if once:
+                    return finished
+                time.sleep(poll_interval)
+                close_old_connections()
+                requeue_stale()
+                continue
+            job = jobs[0]
+            try:
+                error = render_to_cache(*_prepare(job))
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            _finish(job.pk, error, stdout)
+            finished += 1
+
+    connections.close_all()     # don't share sockets/handles with forked workers
+    slots = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=slots, initializer=init_worker) as pool:
+        running = {}            # future -> job id
+        while True:
+            for job in claim_jobs(slots - len(running)) if len(running) < slots else ():
+                try:
+                    task = _prepare(job)
+                except Exception as exc:
+                    _finish(job.pk, f"{type(exc).__name__}: {exc}", stdout)
+                    finished += 1
+                    continue
+                running[pool.submit(render_to_cache, *task)] = job.pk
+
+            if not running:
+                if once:
+                    return finished
+                time.sleep(poll_interval)
+                close_old_connections()
+                requeue_stale()
+                continue
+
+            done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                job_id = running.pop(future)
+                try:
+                    error = future.result()
+                except Exception as exc:
+                    error = f"{type(exc).__name__}: {exc}"
+                _finish(job_id, error, stdout)
+                finished += 1
@@ -0,0 +1,206 @@
+# accounts/cv_pdf.py
+"""
+CV → PDF rendering with a content-addressed disk cache.
+
+Two engines draw the same layout: xhtml2pdf from ``student_cv_pdf.html``
+and a direct ReportLab renderer (``cv_reportlab``); ``CV_PDF_ENGINE``
+picks the default. Every PDF is stored under the SHA-256 of what it was
+rendered from (the HTML, or the ReportLab input plus renderer version), so
+an unchanged CV is served from disk without rendering again.
+
+The cache lives in ``settings.CV_PDF_CACHE_DIR`` and is shared by every
+worker process on the host: entries are written to a temp file and
+``os.replace``d into place, so readers never see partial files. Reads bump
+the entry's mtime. Every ``EVICT_FRACTION`` of
+``settings.CV_PDF_CACHE_MAX_BYTES`` a process writes, it scans the
+directory and, past the bound, evicts least-recently-used entries down to
+``1 - EVICT_FRACTION`` of it. A bulk export thus scans the directory a
+bounded number of times rather than once per CV; the directory can
+overshoot by up to ``EVICT_FRACTION`` of the bound per writing process.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from xhtml2pdf import pisa
+
+from . import cv_reportlab
+
+ENGINES        = ('xhtml2pdf', 'reportlab')
+EVICT_FRACTION = 0.1
+
+_written = {}   # cache directory -> bytes this process wrote since its last scan
+
+logger = logging.getLogger('accounts.cv_pdf')
+
+
+def _link_callback(uri, rel):
+    """
+    Resolve static/media URIs for xhtml2pdf.
+    """
+    s_root = settings.STATIC_ROOT or settings.STATICFILES_DIRS[0] if getattr(settings, 'STATICFILES_DIRS', None) else None
+    m_root = settings.MEDIA_ROOT
+
+    if uri.startswith(settings.MEDIA_URL):
+        path = os.path.join(m_root, uri.replace(settings.MEDIA_URL, ""))
+    elif uri.startswith(settings.STATIC_URL):
+        path = os.path.join(s_root, uri.replace(settings.STATIC_URL, ""))
+    else:
+        path = uri
+
+    if not os.path.exists(path):
+        return uri  # fallback to original
+    return path
+
+
+class PDFDiskCache:
+    """Size-bounded LRU cache of PDF bytes keyed by content hash."""
+
+    SUFFIX = '.pdf'
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key_for(source):
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.SUFFIX)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as fh:
+                data = fh.read()
+            os.utime(path)          # mark as recently used
+        except FileNotFoundError:   # missing, or evicted by another worker
+            return None
+        return data
+
+    def set(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        written = _written.get(self.directory, 0) + len(data)
+        _written[self.directory] = written
+        if written >= self.max_bytes * EVICT_FRACTION:
+            self.evict()
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                if not name.endswith(self.SUFFIX):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield st.st_mtime, st.st_size, path
+
+    def evict(self):
+        """Past ``max_bytes``, delete least-recently-used entries down to the low-water mark."""
+        _written[self.directory] = 0
+        entries = sorted(self._entries())
+        total   = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * (1 - EVICT_FRACTION)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in list(self._entries()):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def get_pdf_cache():
+    return PDFDiskCache(settings.CV_PDF_CACHE_DIR, settings.CV_PDF_CACHE_MAX_BYTES)
+
+
+def cv_html(cv, experience, languages):
+    return render_to_string('accounts/student_cv_pdf.html', {
+        'cv': cv,
+        'experience': experience,
+        'languages': languages,
+    })
+
+
+def render_cv_html(cv):
+    return cv_html(cv, cv.experiences.all(), cv.languages.all())
+
+
+def html_to_pdf(html):
+    """Run xhtml2pdf; returns the PDF bytes or None on error."""
+    out = io.BytesIO()
+    pdf = pisa.CreatePDF(io.BytesIO(html.encode('utf-8')), dest=out, link_callback=_link_callback)
+    if pdf.err:
+        return None
+    return out.getvalue()
+
+
+def prepare(cv, experience, languages, engine=None):
+    """
+    ``(cache_key, engine, payload)`` for rendering a CV with ``engine``
+    (default ``settings.CV_PDF_ENGINE``). The payload is the HTML for
+    xhtml2pdf or a plain dict for ReportLab; both pickle to pool workers.
+    """
+    engine = engine or settings.CV_PDF_ENGINE
+    if engine == 'reportlab':
+        payload = cv_reportlab.cv_data(cv, experience, languages)
+        source  = f"reportlab:{cv_reportlab.VERSION}:" + json.dumps(payload, sort_keys=True)
+    elif engine == 'xhtml2pdf':
+        payload = source = cv_html(cv, experience, languages)
+    else:
+        raise ValueError(f"Unknown CV PDF engine {engine!r}; expected one of {ENGINES}.")
+    return PDFDiskCache.key_for(source), engine, payload
+
+
+def prepare_cv(cv, engine=None):
+    return prepare(cv, cv.experiences.all(), cv.languages.all(), engine)
+
+
+def render_payload(engine, payload):
+    """PDF bytes (None on error) for a payload built by ``prepare``."""
+    if engine == 'reportlab':
+        try:
+            return cv_reportlab.render(payload)
+        except Exception:
+            logger.exception("ReportLab could not render the CV of %s", payload.get('full_name'))
+            return None
+    return html_to_pdf(payload)
+
+
+def render_cv_pdf(cv, cache=None, engine=None):
+    """PDF bytes for ``cv`` (None on render error), served from the disk cache when unchanged."""
+    cache = cache or get_pdf_cache()
+    key, engine, payload = prepare_cv(cv, engine)
+    data = cache.get(key)
+    if data is None:
+        data = render_payload(engine, payload)
+        if data is not None:
+            cache.set(key, data)
+    return data
@@ -0,0 +1,161 @@
+# accounts/cv_reportlab.py
+"""
+Direct ReportLab CV renderer.
+
+Draws the layout of ``student_cv_pdf.html`` (grey contact sidebar, then
+work experience, education and the CEFR language table) straight onto
+ReportLab flowables, skipping xhtml2pdf's HTML/CSS parsing and layout.
+
+``render`` takes the plain dict built by ``cv_data`` rather than model
+instances, so it is picklable and runs unchanged inside pool workers.
+"""
+import io
+from xml.sax.saxutils import escape
+
+from django.utils.formats import date_format
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import (
+    BaseDocTemplate, Frame, FrameBreak, NextPageTemplate, PageTemplate,
+    Paragraph, Spacer, Table, TableStyle,
+)
+
+# Bump when the drawing code changes so cached PDFs are not reused.
+VERSION = 1
+
+MARGIN   = 0.5 * cm
+GUTTER   = 0.3 * cm
+SIDEBAR  = 0.28
+GREY     = colors.HexColor('#f7f7f7')
+RULE     = colors.HexColor('#dddddd')
+CELL     = colors.HexColor('#cccccc')
+
+BODY = ParagraphStyle('body', fontName='Helvetica', fontSize=9, leading=11.5, textColor=colors.HexColor('#111111'))
+NAME = ParagraphStyle('name', parent=BODY, fontName='Helvetica-Bold', fontSize=13.5, leading=16, spaceAfter=4)
+HEAD = ParagraphStyle('head', parent=BODY, fontName='Helvetica-Bold', fontSize=10.5, leading=13,
+                      textColor=colors.HexColor('#333333'), spaceBefore=6, spaceAfter=2)
+BOLD = ParagraphStyle('bold', parent=BODY, fontName='Helvetica-Bold')
+CELL_STYLE = ParagraphStyle('cell', parent=BODY, fontSize=8, leading=10)
+
+LANGUAGE_COLUMNS = ('Language', 'Listening', 'Reading', 'Spoken interaction', 'Spoken production', 'Writing')
+
+
+def cv_data(cv, experience, languages):
+    """Plain, picklable snapshot of everything the renderer draws."""
+    return {
+        'full_name': cv.full_name,
+        'address':   cv.address,
+        'email':     cv.email,
+        'phone':     cv.phone,
+        'objective': cv.objective,
+        'experience': [
+            {
+                'period':      '%s - %s' % (date_format(e.start_date),
+                                            date_format(e.end_date) if e.end_date else 'Present'),
+                'job_title':   e.job_title,
+                'company':     e.company,
+                'place':       ', '.join(p for p in (e.city, e.country) if p),
+                'description': e.description,
+            }
+            for e in experience
+        ],
+        'languages': [
+            [f"{l.language} (Mother tongue)" if l.mother_tongue else l.language,
+             l.listening, l.reading, l.spoken_interaction, l.spoken_production, l.writing]
+            for l in languages
+        ],
+    }
+
+
+def _p(text, style=BODY):
+    return Paragraph(escape(text or '').replace('\n', '<br/>'), style)
+
+
+def _sidebar(data):
+    flow = [_p(data['full_name'], NAME)]
+    for label in ('Address', 'Email', 'Phone'):
+        flow += [Spacer(0, 4), _p(label, BOLD), _p(data[label.lower()])]
+    if data['objective']:
+        flow += [Spacer(0, 8), _p('Profile / Objective', BOLD), _p(data['objective'])]
+    return flow
+
+
+def _heading(text, width):
+    table = Table([[_p(text, HEAD)]], colWidths=[width])
+    table.setStyle(TableStyle([
+        ('LINEBELOW',     (0, 0), (-1, -1), 0.75, RULE),
+        ('LEFTPADDING',   (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ]))
+    return table
+
+
+def _main(data, width):
+    flow = [_heading('Work experience', width)]
+    for e in data['experience']:
+        flow.append(_p(e['period'], BOLD))
+        flow.append(Paragraph(
+            f"<b>{escape(e['job_title'])}</b> — {escape(e['company'])}", BODY
+        ))
+        if e['place']:
+            flow.append(_p(e['place']))
+        if e['description']:
+            flow.append(Paragraph(f"<i>{escape(e['description'])}</i>", BODY))
+        flow.append(Spacer(0, 6))
+    if not data['experience']:
+        flow.append(Paragraph('<i>No work experience provided.</i>', BODY))
+
+    flow += [
+        _heading('Education & Training', width),
+        Paragraph('<i>Use the skills &amp; training section of your profile to add formal '
+                  'qualifications if needed.</i>', BODY),
+        _heading('Language skills', width),
+    ]
+    if data['languages']:
+        rows = [[_p(c, CELL_STYLE) for c in LANGUAGE_COLUMNS]]
+        rows += [[_p(c, CELL_STYLE) for c in row] for row in data['languages']]
+        first = width * 0.25
+        table = Table(rows, colWidths=[first] + [(width - first) / 5] * 5, repeatRows=1)
+        table.setStyle(TableStyle([
+            ('GRID',     (0, 0), (-1, -1), 0.5, CELL),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('VALIGN',   (0, 0), (-1, -1), 'TOP'),
+        ]))
+        flow += [Spacer(0, 4), table]
+    else:
+        flow.append(Paragraph('<i>No languages provided.</i>', BODY))
+    return flow
+
+
+def render(data):
+    """PDF bytes for a ``cv_data`` dict."""
+    out = io.BytesIO()
+    page_w, page_h = A4
+    inner_w = page_w - 2 * MARGIN
+    inner_h = page_h - 2 * MARGIN
+    side_w  = inner_w * SIDEBAR
+    main_w  = inner_w - side_w - GUTTER
+
+    sidebar = Frame(MARGIN, MARGIN, side_w, inner_h, id='sidebar', leftPadding=6, rightPadding=6)
+    main    = Frame(MARGIN + side_w + GUTTER, MARGIN, main_w, inner_h, id='main')
+    later   = Frame(MARGIN, MARGIN, inner_w, inner_h, id='later')
+
+    def shade_sidebar(canvas, doc):
+        canvas.saveState()
+        canvas.setFillColor(GREY)
+        canvas.rect(MARGIN, MARGIN, side_w, inner_h, stroke=0, fill=1)
+        canvas.restoreState()
+
+    doc = BaseDocTemplate(
+        out, pagesize=A4, title=f"{data['full_name']} – CV",
+        leftMargin=MARGIN, rightMargin=MARGIN, topMargin=MARGIN, bottomMargin=MARGIN,
+    )
+    doc.addPageTemplates([
+        PageTemplate(id='first', frames=[sidebar, main], onPage=shade_sidebar),
+        PageTemplate(id='later', frames=[later]),
+    ])
+    story = [NextPageTemplate('later')] + _sidebar(data) + [FrameBreak()] + _main(data, main_w)
+    doc.build(story)
+    return out.getvalue()
@@ -0,0 +1,77 @@
+# accounts/management/commands/benchmark_cv_engines.py
+import datetime
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from accounts.cv_pdf import ENGINES, prepare, render_payload
+from accounts.models import CVExperience, CVLanguage, StudentCV
+
+# name -> (experiences, languages)
+PROFILES = {
+    'minimal': (0, 1),
+    'typical': (3, 3),
+    'long':    (12, 6),
+}
+
+
+def sample_cv(experiences, languages):
+    """Unsaved CV with ``experiences`` jobs and ``languages`` languages."""
+    cv = StudentCV(
+        full_name='Alexandra Example-Student',
+        email='alexandra@example.com',
+        phone='+30 210 000 0000',
+        address='12 Sample Street\n10558 Athens, Greece',
+        objective='Graduate software engineer looking for a backend or data role. ' * 3,
+    )
+    exps = [
+        CVExperience(
+            job_title=f'Software Engineer {i + 1}', company='Acme Analytics',
+            city='Athens', country='Greece',
+            start_date=datetime.date(2015 + i % 8, 1 + i % 12, 1),
+            end_date=None if i == 0 else datetime.date(2016 + i % 8, 1 + i % 12, 1),
+            description='Built and maintained data pipelines, REST APIs and internal tooling. ' * 2,
+        )
+        for i in range(experiences)
+    ]
+    langs = [
+        CVLanguage(language=name, mother_tongue=(i == 0), listening='C1', reading='C1',
+                   spoken_interaction='B2', spoken_production='B2', writing='B1')
+        for i, name in enumerate(['Greek', 'English', 'French', 'German', 'Spanish', 'Italian'][:languages])
+    ]
+    return cv, exps, langs
+
+
+class Command(BaseCommand):
+    help = "Compare render time and peak memory of the xhtml2pdf and ReportLab CV engines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--engine', choices=ENGINES, action='append',
+                            help="Engine(s) to run (default: all).")
+
+    def handle(self, *args, **options):
+        engines = options['engine'] or ENGINES
+        n = options['iterations']
+        self.stdout.write(f"{'profile':<10}{'engine':<12}{'median ms':>12}{'p95 ms':>10}{'peak KiB':>12}{'PDF KiB':>10}")
+        for name, sizes in PROFILES.items():
+            cv, exps, langs = sample_cv(*sizes)
+            for engine in engines:
+                _, _, payload = prepare(cv, exps, langs, engine)
+                render_payload(engine, payload)     # warm-up (imports, font metrics)
+                times = []
+                for _ in range(n):
+                    started = time.perf_counter()
+                    data = render_payload(engine, payload)
+                    times.append((time.perf_counter() - started) * 1000)
+                tracemalloc.start()
+                render_payload(engine, payload)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                p95 = sorted(times)[max(0, int(round(0.95 * n)) - 1)]
+                self.stdout.write(
+                    f"{name:<10}{engine:<12}{statistics.median(times):>12.1f}{p95:>10.1f}"
+                    f"{peak / 1024:>12.0f}{len(data) / 1024:>10.1f}"
+                )
@@ -0,0 +1,28 @@
+# accounts/management/commands/compute_top_matches.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.matches import compute_top_matches, BATCH_SIZE, TOP_K
+
+
+class Command(BaseCommand):
+    help = ("Score every student against every posted position across a process pool "
+            "and store each position's / student's top-K matches for the admin matches page.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K)
+        parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE,
+                            help="Students scored per worker task.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Worker processes (default: CPU count, 0 = run in-process).")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stored = compute_top_matches(
+            k=options['top_k'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Stored {stored} top matches in {elapsed:.1f}s."))
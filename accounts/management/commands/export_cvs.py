@@ -0,0 +1,40 @@
+# accounts/management/commands/export_cvs.py
+from django.core.management.base import BaseCommand, CommandError
+
+from careerpath.replica import use_replica
+
+from accounts.cv_export import export_queryset, stream_cv_zip
+from accounts.cv_pdf import ENGINES
+from positions.models import Position
+
+
+class Command(BaseCommand):
+    help = ("Render student CVs across a process pool and write them to one ZIP file, "
+            "either every CV or those of students matched to a position.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the ZIP file to write.")
+        parser.add_argument('--position', type=int, default=None,
+                            help="Only students matched to this position id.")
+        parser.add_argument('--min-score', type=float, default=70.0,
+                            help="Minimum match %% with --position.")
+        parser.add_argument('--processes', type=int, default=None,
+                            help="Render processes (default: CPU count, 0 = render in-process).")
+        parser.add_argument('--engine', choices=ENGINES, default=None,
+                            help="PDF engine (default: settings.CV_PDF_ENGINE).")
+
+    def handle(self, *args, **options):
+        position = None
+        if options['position'] is not None:
+            try:
+                position = Position.objects.get(pk=options['position'])
+            except Position.DoesNotExist:
+                raise CommandError(f"Position {options['position']} does not exist.")
+
+        # a read-only report: use the replica snapshot when it is fresh
+        with use_replica(), open(options['output'], 'wb') as fh:
+            cvs = export_queryset(position, options['min_score'])
+            count = cvs.count()
+            for chunk in stream_cv_zip(cvs, options['processes'], options['engine']):
+                fh.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} CVs to {options['output']}."))
@@ -0,0 +1,61 @@
+# accounts/management/commands/generate_synthetic_data.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from accounts.synthetic import BATCH_SIZE, PREFIX, generate, purge, rebuild_derived
+
+
+class Command(BaseCommand):
+    help = ("Generate a reproducible synthetic dataset (students, skills, CVs, saved positions "
+            "and a tagged position catalogue) for performance work, then rebuild derived tables.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100_000)
+        parser.add_argument('--positions', type=int, default=10_000)
+        parser.add_argument('--skills', type=int, default=300,
+                            help="Size of the skill catalogue (existing skills with the same names are reused).")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--avg-skills', type=float, default=8,
+                            help="Mean skills per student (Poisson, at least 1).")
+        parser.add_argument('--cv-ratio', type=float, default=0.3,
+                            help="Share of students with a CV.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help="Rows per bulk insert; one transaction per batch.")
+        parser.add_argument('--replace', action='store_true',
+                            help="Delete previously generated synthetic data first.")
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Do not rebuild matches, top matches, rollups and the skill index.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Top-match worker processes (default: CPU count, 0 = in-process).")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def log(message):
+            self.stdout.write(f"[{time.perf_counter() - started:7.1f}s] {message}")
+
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            if not options['replace']:
+                raise CommandError(f"Synthetic users ({PREFIX}…) already exist; pass --replace to regenerate.")
+            purge()
+            log("removed previous synthetic data")
+
+        counts = generate(
+            students=options['students'],
+            positions=options['positions'],
+            skills=options['skills'],
+            seed=options['seed'],
+            avg_skills=options['avg_skills'],
+            cv_ratio=options['cv_ratio'],
+            batch_size=options['batch_size'],
+            log=log,
+        )
+        if not options['skip_derived']:
+            rebuild_derived(workers=options['workers'], log=log)
+
+        summary = ", ".join(f"{n} {model}" for model, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary} in {time.perf_counter() - started:.1f}s."
+        ))
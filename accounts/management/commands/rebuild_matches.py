@@ -0,0 +1,15 @@
+# accounts/management/commands/rebuild_matches.py
+from django.core.management.base import BaseCommand
+
+from accounts.matches import rebuild_all_matches, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Recompute the StudentPositionMatch table from scratch (backfill / repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        written = rebuild_all_matches(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Stored {written} non-zero match scores."))
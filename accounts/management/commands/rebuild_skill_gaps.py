@@ -0,0 +1,15 @@
+# accounts/management/commands/rebuild_skill_gaps.py
+from django.core.management.base import BaseCommand
+
+from accounts.models import SkillGapRollup
+from accounts.skill_gaps import rebuild_skill_gaps
+
+
+class Command(BaseCommand):
+    help = "Recompute the SkillGapRollup supply/demand counters from scratch (backfill / repair)."
+
+    def handle(self, *args, **options):
+        rebuild_skill_gaps()
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {SkillGapRollup.objects.count()} skill-gap rollup rows."
+        ))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from careerpath.replica import REPLICA_DB_ALIAS, refresh_snapshot, replica_configured, replica_lag
+
+
+class Command(BaseCommand):
+    help = ("Snapshot the primary SQLite database into the read replica with the online "
+            "backup API, once or every --interval seconds.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Keep refreshing every this many seconds.")
+        parser.add_argument('--pages', type=int, default=-1,
+                            help="Pages copied per backup step (-1 = all at once).")
+        parser.add_argument('--status', action='store_true',
+                            help="Only report the current replica lag.")
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError(f"No '{REPLICA_DB_ALIAS}' database is configured.")
+        if options['status']:
+            lag = replica_lag()
+            self.stdout.write("No replica snapshot." if lag is None else f"Replica lag: {lag:.1f}s")
+            return
+
+        while True:
+            started = time.perf_counter()
+            refresh_snapshot(pages=options['pages'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Replica refreshed in {time.perf_counter() - started:.2f}s."))
+            if options['interval'] is None:
+                return
+            time.sleep(max(0.0, options['interval'] - (time.perf_counter() - started)))
@@ -0,0 +1,25 @@
+# accounts/management/commands/run_cv_worker.py
+from django.core.management.base import BaseCommand
+
+from accounts.cv_jobs import run_worker, POLL_INTERVAL
+
+
+class Command(BaseCommand):
+    help = "Render queued CV PDFs (CVRenderJob rows) in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None,
+                            help="Render processes (default: CPU count, 0 = render in-process).")
+        parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL,
+                            help="Seconds to wait between polls of an empty queue.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once the queue is empty instead of polling forever.")
+
+    def handle(self, *args, **options):
+        finished = run_worker(
+            processes=options['processes'],
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Finished {finished} CV render jobs."))
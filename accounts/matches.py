@@ -0,0 +1,244 @@
+# accounts/matches.py
+"""
+Incremental maintenance of the StudentPositionMatch table.
+
+A change to one student's skills only affects that student's row of the
+students × positions score matrix, and a change to one position's
+requirements only affects that position's column. The helpers below
+recompute exactly that slice with RequirementMatrix and replace the stored
+rows, so list pages can sort and filter by score with a plain indexed query.
+Only posted positions have rows; a position leaving 'posted' loses them.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from positions.models import Position
+from . import topk
+from .models import StudentSkill, StudentPositionMatch, TopMatch
+from .scoring import RequirementMatrix, PROFICIENCY_LEVELS, student_proficiencies
+
+BATCH_SIZE = 1000
+TOP_K      = 10
+
+
+def _replace(delete_qs, rows):
+    with transaction.atomic():
+        delete_qs.delete()
+        StudentPositionMatch.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def refresh_student_matches(profile, matrix=None):
+    """
+    Recompute one student's scores against every posted position. Only
+    positions requiring one of the student's skills can score above 0, so
+    only those are loaded.
+    """
+    proficiencies = student_proficiencies(profile)
+    if matrix is None:
+        matrix = RequirementMatrix.load(Position.objects.filter(
+            status='posted', requirements__skill_id__in=list(proficiencies),
+        ))
+    rows = _score_rows(matrix, profile.pk, proficiencies)
+    _replace(StudentPositionMatch.objects.filter(profile=profile), rows)
+
+
+def refresh_position_matches(position):
+    """
+    Recompute one position's scores against every student, or drop them
+    if it is not posted. Only students holding at least one of its required
+    skills can score above 0, so only their skills are loaded.
+    """
+    matrix = RequirementMatrix.load([position.pk] if position.status == 'posted' else [])
+    rows = []
+    if len(matrix.position_ids):
+        contrib  = matrix.contributions[0]
+        n_levels = len(PROFICIENCY_LEVELS)
+        offsets  = {level: k for k, level in enumerate(PROFICIENCY_LEVELS)}
+        skills   = StudentSkill.objects.filter(
+            skill_id__in=matrix.skill_ids.tolist()
+        ).values_list('profile_id', 'skill_id', 'proficiency')
+
+        profile_ids, cols = [], []
+        for profile_id, skill_id, prof in skills:
+            if prof in offsets:
+                profile_ids.append(profile_id)
+                cols.append(matrix.skill_index[skill_id] * n_levels + offsets[prof])
+        if profile_ids:
+            uniq, idx = np.unique(np.array(profile_ids), return_inverse=True)
+            scores = np.bincount(idx, weights=contrib[np.array(cols)])
+            rows = [
+                StudentPositionMatch(profile_id=int(pid), position=position, score=float(score))
+                for pid, score in zip(uniq, scores)
+                if score > 0
+            ]
+    _replace(StudentPositionMatch.objects.filter(position=position), rows)
+
+
+def refresh_matches_for_positions(position_ids, group_size=2000, chunk_size=500):
+    """
+    ``refresh_position_matches`` for many positions (a bulk import): the
+    positions are scored ``group_size`` at a time, each group against
+    student chunks streamed once, and rows are written ``BATCH_SIZE`` at a
+    time, so memory stays bounded however many positions and students
+    there are. Only the posted positions among them get rows. Returns the
+    number of rows written.
+    """
+    position_ids = list(position_ids)
+    written = 0
+    for start in range(0, len(position_ids), group_size):
+        group  = position_ids[start:start + group_size]
+        matrix = RequirementMatrix.load(Position.objects.filter(pk__in=group, status='posted'))
+        rows   = []
+        with transaction.atomic():
+            StudentPositionMatch.objects.filter(position_id__in=group).delete()
+            if len(matrix.position_ids):
+                contributions_t = matrix.contributions.T
+                for profile_ids, s_rows, cols in _student_chunks(matrix, chunk_size):
+                    onehot = np.zeros((len(profile_ids), contributions_t.shape[0]))
+                    onehot[s_rows, cols] = 1.0
+                    scores = onehot @ contributions_t
+                    for i, j in zip(*np.nonzero(scores > 0)):
+                        rows.append(StudentPositionMatch(profile_id=int(profile_ids[i]),
+                                                         position_id=int(matrix.position_ids[j]),
+                                                         score=float(scores[i, j])))
+                        if len(rows) == BATCH_SIZE:
+                            StudentPositionMatch.objects.bulk_create(rows)
+                            written += len(rows)
+                            rows = []
+            StudentPositionMatch.objects.bulk_create(rows)
+            written += len(rows)
+    return written
+
+
+def rebuild_all_matches(batch_size=BATCH_SIZE):
+    """
+    Recompute the whole table from scratch (backfill / repair). Loads the
+    requirement matrix once and streams student skills ordered by profile.
+    Returns the number of rows written.
+    """
+    matrix  = RequirementMatrix.load()
+    skills  = StudentSkill.objects.order_by('profile_id').values_list(
+        'profile_id', 'skill_id', 'proficiency'
+    )
+    written = 0
+    rows    = []
+    current, prof_map = None, {}
+    with transaction.atomic():
+        StudentPositionMatch.objects.all().delete()
+        for profile_id, skill_id, prof in skills.iterator(chunk_size=batch_size):
+            if profile_id != current:
+                if current is not None:
+                    rows.extend(_score_rows(matrix, current, prof_map))
+                current, prof_map = profile_id, {}
+                if len(rows) >= batch_size:
+                    StudentPositionMatch.objects.bulk_create(rows, batch_size=batch_size)
+                    written += len(rows)
+                    rows = []
+            prof_map[skill_id] = prof
+        if current is not None:
+            rows.extend(_score_rows(matrix, current, prof_map))
+        StudentPositionMatch.objects.bulk_create(rows, batch_size=batch_size)
+        written += len(rows)
+    return written
+
+
+def _score_rows(matrix, profile_id, prof_map):
+    scores = matrix.scores(prof_map)
+    return [
+        StudentPositionMatch(profile_id=profile_id, position_id=int(pid), score=float(score))
+        for pid, score in zip(matrix.position_ids, scores)
+        if score > 0
+    ]
+
+
+# ---------- All-pairs top-K batch job ----------
+
+def _student_chunks(matrix, chunk_size):
+    """
+    Stream student skills ordered by profile and yield chunks of
+    ``(profile_ids, rows, cols)`` one-hot coordinates for ``topk.score_chunk``.
+    Students holding none of the matrix's skills score 0 everywhere and are
+    skipped.
+    """
+    n_levels = len(PROFICIENCY_LEVELS)
+    offsets  = {level: k for k, level in enumerate(PROFICIENCY_LEVELS)}
+    skills   = StudentSkill.objects.order_by('profile_id').values_list(
+        'profile_id', 'skill_id', 'proficiency'
+    )
+    profile_ids, rows, cols = [], [], []
+    current = None
+    for profile_id, skill_id, prof in skills.iterator(chunk_size=BATCH_SIZE):
+        j, k = matrix.skill_index.get(skill_id), offsets.get(prof)
+        if j is None or k is None:
+            continue
+        if profile_id != current:
+            if len(profile_ids) == chunk_size:
+                yield np.array(profile_ids), np.array(rows), np.array(cols)
+                profile_ids, rows, cols = [], [], []
+            profile_ids.append(profile_id)
+            current = profile_id
+        rows.append(len(profile_ids) - 1)
+        cols.append(j * n_levels + k)
+    if profile_ids:
+        yield np.array(profile_ids), np.array(rows), np.array(cols)
+
+
+def compute_top_matches(k=TOP_K, chunk_size=BATCH_SIZE, workers=None):
+    """
+    Score every student against every posted position in chunks spread over
+    a process pool and replace the TopMatch table with each position's top-K
+    students and each student's top-K positions. ``workers=0`` scores in
+    the current process. Returns the number of rows stored.
+    """
+    matrix = RequirementMatrix.load()
+    contributions_t = np.ascontiguousarray(matrix.contributions.T)
+    position_ids    = matrix.position_ids.tolist()
+    pairs           = {}    # (profile_id, position_id) -> [score, position_rank, student_rank]
+    position_best   = None
+
+    def collect(result):
+        nonlocal position_best
+        profile_ids, (s_idx, s_scores), position_top = result
+        position_best = topk.merge_position_top(position_best, position_top, k)
+        for i, profile_id in enumerate(profile_ids.tolist()):
+            for rank, (j, score) in enumerate(zip(s_idx[i].tolist(), s_scores[i].tolist()), 1):
+                if score > 0:
+                    pairs[(profile_id, position_ids[j])] = [score, None, rank]
+
+    if position_ids:
+        chunks = _student_chunks(matrix, chunk_size)
+        if workers == 0:
+            topk.init_worker(contributions_t)
+            for chunk in chunks:
+                collect(topk.score_chunk(*chunk, k))
+        else:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=topk.init_worker,
+                                     initargs=(contributions_t,)) as pool:
+                futures = [pool.submit(topk.score_chunk, *chunk, k) for chunk in chunks]
+                for future in as_completed(futures):
+                    collect(future.result())
+
+    if position_best is not None:
+        ids, scores = position_best
+        for j, position_id in enumerate(position_ids):
+            for rank in range(ids.shape[0]):
+                score = float(scores[rank, j])
+                if score > 0:
+                    entry = pairs.setdefault((int(ids[rank, j]), position_id), [score, None, None])
+                    entry[1] = rank + 1
+
+    now  = timezone.now()
+    rows = [
+        TopMatch(profile_id=profile_id, position_id=position_id, score=score,
+                 position_rank=position_rank, student_rank=student_rank, computed_at=now)
+        for (profile_id, position_id), (score, position_rank, student_rank) in pairs.items()
+    ]
+    with transaction.atomic():
+        TopMatch.objects.all().delete()
+        TopMatch.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.2 on 2026-10-16 23:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_studentcv_cvlanguage_cvexperience'),
+        ('positions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentPositionMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_matches', to='positions.position')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='position_matches', to='accounts.studentprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', '-score'], name='match_profile_score_idx'), models.Index(fields=['position', '-score'], name='match_position_score_idx')],
+                'unique_together': {('profile', 'position')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.2 on 2026-10-16 23:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_studentpositionmatch'),
+        ('positions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('position_rank', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('student_rank', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='top_matches', to='positions.position')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='top_matches', to='accounts.studentprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['position', 'position_rank'], name='topmatch_position_rank_idx'), models.Index(fields=['profile', 'student_rank'], name='topmatch_student_rank_idx')],
+                'unique_together': {('profile', 'position')},
+            },
+        ),
+    ]
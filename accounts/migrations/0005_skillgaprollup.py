@@ -0,0 +1,28 @@
+# Generated by Django 5.2.2 on 2026-10-17 00:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_topmatch'),
+        ('positions', '0002_position_browse_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillGapRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('supply', models.IntegerField(default=0)),
+                ('demand', models.IntegerField(default=0)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gap_rollups', to='positions.skill')),
+            ],
+            options={
+                'unique_together': {('skill', 'level')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.2 on 2026-10-17 00:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_skillgaprollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVRenderJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('cache_key', models.CharField(max_length=64)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('cv', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='render_jobs', to='accounts.studentcv')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='cvjob_status_created_idx')],
+            },
+        ),
+    ]
@@ -68,30 +68,108 @@ class SavedPosition(models.Model):
     @property
     def match_score(self):
         """
-        Compute and return the % match based on the student's skills
-        versus the position's requirements.
+        % match of the student's skills against the position's
+        requirements (same formula as every other match view). Uses the
+        ``score`` annotation when the queryset provides one (see
+        saved_positions_view); otherwise reads the materialised
+        StudentPositionMatch row in one query.
         """
-        # build map of skill_id -> level code
-        prof_map = {
-            ss.skill_id: ss.proficiency
-            for ss in self.profile.student_skills.all()
-        }
-        reqs = self.position.requirements.all()
-        total_weight = sum(r.importance for r in reqs)
-        if total_weight == 0:
-            return 0.0
+        annotated = self.__dict__.get('score')
+        if annotated is not None:
+            return annotated
+        score = (StudentPositionMatch.objects
+                 .filter(profile_id=self.profile_id, position_id=self.position_id)
+                 .values_list('score', flat=True).first())
+        return score or 0.0
 
-        # numeric ordering of proficiency
-        LEVEL_ORDER = {"low": 1, "medium": 2, "high": 3}
 
-        matched = 0
-        for r in reqs:
-            student_lvl = prof_map.get(r.skill_id)
-            req_lvl     = r.required_proficiency_code if hasattr(r, 'required_proficiency_code') else r.level_pct
-            if student_lvl and LEVEL_ORDER.get(student_lvl,0) >= LEVEL_ORDER.get(req_lvl, 0):
-                matched += r.importance
+class StudentPositionMatch(models.Model):
+    """
+    Materialised match score for one (student, position) pair, maintained
+    incrementally by accounts/matches.py whenever a student's skills or a
+    position's requirements change. Only non-zero scores are stored, so a
+    missing row means 0%.
+    """
+    profile    = models.ForeignKey(
+                     StudentProfile,
+                     on_delete=models.CASCADE,
+                     related_name="position_matches",
+                 )
+    position   = models.ForeignKey(
+                     Position,
+                     on_delete=models.CASCADE,
+                     related_name="student_matches",
+                 )
+    score      = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("profile", "position")
+        indexes = [
+            models.Index(fields=["profile", "-score"], name="match_profile_score_idx"),
+            models.Index(fields=["position", "-score"], name="match_position_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.profile.user.username} ↔ {self.position}: {self.score:.1f}%"
+
+
+class TopMatch(models.Model):
+    """
+    Output of the ``compute_top_matches`` batch job: a (student, posted
+    position) pair that is among the position's top-K students and/or the
+    student's top-K positions. Ranks are 1-based; a null rank means the pair
+    is not in that list.
+    """
+    profile       = models.ForeignKey(
+                        StudentProfile,
+                        on_delete=models.CASCADE,
+                        related_name="top_matches",
+                    )
+    position      = models.ForeignKey(
+                        Position,
+                        on_delete=models.CASCADE,
+                        related_name="top_matches",
+                    )
+    score         = models.FloatField()
+    position_rank = models.PositiveSmallIntegerField(null=True, blank=True)
+    student_rank  = models.PositiveSmallIntegerField(null=True, blank=True)
+    computed_at   = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ("profile", "position")
+        indexes = [
+            models.Index(fields=["position", "position_rank"], name="topmatch_position_rank_idx"),
+            models.Index(fields=["profile", "student_rank"], name="topmatch_student_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.profile.user.username} ↔ {self.position}: {self.score:.1f}%"
+
+
+class SkillGapRollup(models.Model):
+    """
+    Running supply/demand counters per (skill, proficiency level), kept
+    current by the signal handlers in accounts/signals.py (see
+    accounts/skill_gaps.py).
+     - supply: students holding the skill at exactly this level
+     - demand: requirements of posted positions asking for this level
+       (level_pct bucketed to low/medium/high)
+    """
+    skill  = models.ForeignKey(
+                 'positions.Skill',
+                 on_delete=models.CASCADE,
+                 related_name="gap_rollups",
+             )
+    level  = models.CharField(max_length=10, choices=StudentSkill.PROFICIENCY_CHOICES)
+    supply = models.IntegerField(default=0)
+    demand = models.IntegerField(default=0)
 
-        return 100.0 * matched / total_weight
+    class Meta:
+        unique_together = ("skill", "level")
+
+    def __str__(self):
+        return f"{self.skill.name} [{self.level}]: supply={self.supply} demand={self.demand}"
 
 
 # ───────────────────────────────────────────────────────────────────────────────
@@ -173,3 +251,37 @@ class CVLanguage(models.Model):
 
     def __str__(self):
         return f"{self.language} ({'mother' if self.mother_tongue else 'other'})"
+
+
+class CVRenderJob(models.Model):
+    """
+    One queued "Save & Download" PDF render, processed by the
+    ``run_cv_worker`` command. The finished PDF lives in the CV PDF disk
+    cache under ``cache_key``.
+    """
+    STATUS_CHOICES = [
+        ('queued',  'Queued'),
+        ('running', 'Running'),
+        ('done',    'Done'),
+        ('failed',  'Failed'),
+    ]
+
+    cv = models.ForeignKey(
+        StudentCV,
+        on_delete=models.CASCADE,
+        related_name='render_jobs'
+    )
+    status      = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    cache_key   = models.CharField(max_length=64)
+    error       = models.TextField(blank=True)
+    created_at  = models.DateTimeField(auto_now_add=True)
+    started_at  = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='cvjob_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"CV render #{self.pk} ({self.status})"
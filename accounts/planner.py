@@ -0,0 +1,101 @@
+# accounts/planner.py
+"""
+Career optimizer: the smallest skill-upgrade plan that lifts the most
+posted positions to a target match score.
+
+Each candidate move is "acquire skill S at level L" or "raise S to L"; it
+costs one step per proficiency level gained (none → low → medium → high).
+The planner is greedy: it repeatedly applies the move that pushes the most
+positions across the threshold per step, breaking ties (and making
+progress when no single move crosses anything) by how much closer it gets
+below-threshold positions to it. Scores are kept in one array over the
+SkillIndex's positions and updated in place from the moved skill's
+postings only, so each round costs O(total postings), not a re-score.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from .scoring import PROFICIENCY_LEVELS, get_skill_index
+
+LEVEL_RANK = {None: 0, **{level: k + 1 for k, level in enumerate(PROFICIENCY_LEVELS)}}
+
+
+def plan_upgrades(proficiencies, threshold=70.0, max_cost=6, index=None):
+    """
+    Greedy upgrade plan for a ``{skill_id: level}`` map, spending at most
+    ``max_cost`` level steps. Only posted positions count.
+
+    Returns a namespace with ``threshold``, ``initial_above``,
+    ``final_above``, ``total_cost`` and ``steps``; each step has
+    ``skill_id``, ``from_level``, ``to_level``, ``cost``, ``newly_above``
+    (position ids) and the running ``total_above``.
+    """
+    index   = index or get_skill_index()
+    current = dict(proficiencies)
+    floor   = threshold - 1e-9
+
+    scores = np.zeros(len(index.position_ids))
+    idx, acc = index.accumulate(current)
+    scores[idx] = acc
+    posted = index.posted
+
+    # restrict every skill's postings to posted positions once
+    postings = {}
+    for skill_id, (pos_idx, contrib) in index.postings.items():
+        keep = posted[pos_idx]
+        if keep.any():
+            postings[skill_id] = (pos_idx[keep], contrib[:, keep])
+
+    initial_above = int(((scores >= floor) & posted).sum())
+    total_above   = initial_above
+    steps, spent  = [], 0
+
+    while spent < max_cost:
+        best = None
+        for skill_id, (pos_idx, contrib) in postings.items():
+            cur_rank = LEVEL_RANK[current.get(skill_id)]
+            if cur_rank == len(PROFICIENCY_LEVELS):
+                continue
+            base   = scores[pos_idx]
+            cur_c  = contrib[cur_rank - 1] if cur_rank else 0.0
+            new    = base + contrib[cur_rank:] - cur_c          # (levels above current, n)
+            below  = base < floor
+            crossed  = ((new >= floor) & below).sum(axis=1)
+            progress = (np.minimum(new, threshold) - np.minimum(base, threshold)).sum(axis=1)
+            for k in range(len(crossed)):
+                cost = k + 1
+                if spent + cost > max_cost or progress[k] <= 1e-9:
+                    continue
+                key = (crossed[k] / cost, progress[k] / cost, -cost)
+                if best is None or key > best[0]:
+                    best = (key, skill_id, cur_rank + k, cost)
+        if best is None:
+            break
+
+        _, skill_id, level_k, cost = best
+        pos_idx, contrib = postings[skill_id]
+        cur_rank = LEVEL_RANK[current.get(skill_id)]
+        before   = scores[pos_idx].copy()
+        scores[pos_idx] += contrib[level_k] - (contrib[cur_rank - 1] if cur_rank else 0.0)
+        newly    = pos_idx[(before < floor) & (scores[pos_idx] >= floor)]
+
+        total_above += len(newly)
+        spent       += cost
+        steps.append(SimpleNamespace(
+            skill_id    = skill_id,
+            from_level  = current.get(skill_id),
+            to_level    = PROFICIENCY_LEVELS[level_k],
+            cost        = cost,
+            newly_above = index.position_ids[newly].tolist(),
+            total_above = total_above,
+        ))
+        current[skill_id] = PROFICIENCY_LEVELS[level_k]
+
+    return SimpleNamespace(
+        threshold     = threshold,
+        initial_above = initial_above,
+        final_above   = total_above,
+        total_cost    = spent,
+        steps         = steps,
+    )
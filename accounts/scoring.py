@@ -0,0 +1,323 @@
+# accounts/scoring.py
+"""
+Vectorised student ↔ position match scoring.
+
+Every page that shows a match % uses the same formula (see
+``_calculate_match_score`` in views.py):
+
+    weight = importance / total_importance * 100
+    num    = {'low': 40, 'medium': 75, 'high': 100}[student_level]
+    score  = sum(weight * min(num / level_pct, 1))
+
+Instead of looping over requirements per position, ``RequirementMatrix``
+loads the requirements of a whole set of positions in one query and
+precomputes, for every (position, skill, proficiency) triple, the amount that
+proficiency would add to the position's score. A student is encoded as a
+one-hot vector over (skill, proficiency) columns, so scoring them against
+every position is a single matrix-vector product.
+"""
+import uuid
+
+import numpy as np
+from django.core.cache import cache
+from careerpath.replica import use_primary
+
+from positions.models import Position, PositionSkillRequirement
+
+PROFICIENCY_PCT = {'low': 40, 'medium': 75, 'high': 100}
+
+# column order of the proficiency axis inside the matrix
+PROFICIENCY_LEVELS = ('low', 'medium', 'high')
+_LEVEL_OFFSET = {level: k for k, level in enumerate(PROFICIENCY_LEVELS)}
+
+
+def requirement_contribution(weight, level_pct, proficiency):
+    """
+    Score a single requirement adds for a student at ``proficiency``
+    (None / '' means the student does not have the skill).
+    """
+    if not proficiency:
+        return 0.0
+    if level_pct <= 0:
+        return weight
+    return weight * min(PROFICIENCY_PCT[proficiency] / level_pct, 1.0)
+
+
+def student_proficiencies(profile):
+    """skill_id -> proficiency code for one StudentProfile (one query)."""
+    return dict(profile.student_skills.values_list('skill_id', 'proficiency'))
+
+
+def _requirement_contributions(rows):
+    """
+    Vectorised per-requirement contributions for
+    ``(position_id, skill_id, importance, level_pct)`` rows.
+
+    Returns ``(position_ids, position_index_per_row, skill_id_per_row,
+    contributions)`` where ``contributions[k, i]`` is what row ``i`` adds to
+    its position's score for a student at ``PROFICIENCY_LEVELS[k]``.
+    """
+    raw = np.array(list(rows), dtype=np.int64).reshape(-1, 4)
+    position_ids, p_idx = np.unique(raw[:, 0], return_inverse=True)
+    importance = raw[:, 2].astype(np.float64)
+    level_pct  = raw[:, 3].astype(np.float64)
+
+    totals = np.bincount(p_idx, weights=importance, minlength=len(position_ids))
+    totals[totals == 0] = 1
+    weight = importance / totals[p_idx] * 100
+
+    contrib = np.empty((len(PROFICIENCY_LEVELS), len(raw)))
+    with np.errstate(divide='ignore'):
+        for k, level in enumerate(PROFICIENCY_LEVELS):
+            contrib[k] = weight * np.minimum(PROFICIENCY_PCT[level] / level_pct, 1.0)
+    return position_ids, p_idx, raw[:, 1], contrib
+
+
+class RequirementMatrix:
+    """
+    Dense positions × (skills × proficiency levels) contribution matrix.
+
+    ``contributions[p, s * 3 + k]`` is what position ``p`` scores for a
+    student holding skill ``s`` at ``PROFICIENCY_LEVELS[k]``. Only skills that
+    appear in at least one loaded requirement get a column; positions without
+    requirements are not stored and score 0.
+    """
+
+    def __init__(self, position_ids, skill_ids, contributions):
+        self.position_ids  = position_ids
+        self.skill_ids     = skill_ids
+        self.contributions = contributions
+        self.position_index = {int(pid): i for i, pid in enumerate(position_ids)}
+        self.skill_index    = {int(sid): j for j, sid in enumerate(skill_ids)}
+
+    @classmethod
+    def load(cls, positions=None):
+        """
+        Build the matrix for ``positions`` (a queryset, list of Position
+        objects or list of ids; defaults to all posted positions) with a
+        single requirements query.
+        """
+        if positions is None:
+            positions = Position.objects.filter(status='posted')
+        rows = PositionSkillRequirement.objects.filter(
+            position__in=positions
+        ).values_list('position_id', 'skill_id', 'importance', 'level_pct')
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build the matrix from ``(position_id, skill_id, importance, level_pct)``
+        tuples.
+        """
+        position_ids, p_idx, raw_skills, contrib = _requirement_contributions(rows)
+        skill_ids, s_idx = np.unique(raw_skills, return_inverse=True)
+
+        n_levels = len(PROFICIENCY_LEVELS)
+        contributions = np.zeros((len(position_ids), len(skill_ids) * n_levels))
+        for k in range(n_levels):
+            contributions[p_idx, s_idx * n_levels + k] = contrib[k]
+        return cls(position_ids, skill_ids, contributions)
+
+    def student_vector(self, proficiencies):
+        """One-hot encoding of a ``{skill_id: proficiency}`` map."""
+        x = np.zeros(self.contributions.shape[1])
+        n_levels = len(PROFICIENCY_LEVELS)
+        for skill_id, level in proficiencies.items():
+            j = self.skill_index.get(skill_id)
+            k = _LEVEL_OFFSET.get(level)
+            if j is not None and k is not None:
+                x[j * n_levels + k] = 1.0
+        return x
+
+    def scores(self, proficiencies):
+        """Scores for every loaded position, aligned with ``position_ids``."""
+        return self.contributions @ self.student_vector(proficiencies)
+
+    def score_map(self, proficiencies):
+        """position_id -> score; positions absent from the map score 0."""
+        return dict(zip(self.position_ids.tolist(), self.scores(proficiencies).tolist()))
+
+
+# ---------- Inverted skill → position index ----------
+
+SKILL_INDEX_VERSION_KEY = 'scoring:skill_index_version'
+
+_skill_index = None
+
+
+class SkillIndex:
+    """
+    In-memory inverted index from skill_id to the positions requiring it.
+
+    For every skill the postings hold the positions (as indices into
+    ``position_ids``) and, per proficiency level, the score that level
+    contributes to each of them. Scoring a student only touches the
+    postings of the skills they hold, so positions sharing no skill with
+    the student cost nothing.
+    """
+
+    def __init__(self, position_ids, posted, postings):
+        self.position_ids   = position_ids
+        self.posted         = posted
+        self.postings       = postings
+        self.position_index = {int(pid): i for i, pid in enumerate(position_ids)}
+
+    @classmethod
+    def build(cls):
+        """Build the index for every position with requirements (one query)."""
+        rows = list(PositionSkillRequirement.objects.values_list(
+            'position_id', 'skill_id', 'importance', 'level_pct', 'position__status'
+        ))
+        position_ids, p_idx, raw_skills, contrib = _requirement_contributions(r[:4] for r in rows)
+        status = {r[0]: r[4] for r in rows}
+        posted = np.array([status[pid] == 'posted' for pid in position_ids.tolist()], dtype=bool)
+
+        order = np.argsort(raw_skills, kind='stable')
+        skill_ids, starts = np.unique(raw_skills[order], return_index=True)
+        postings = {}
+        for skill_id, seg in zip(skill_ids.tolist(), np.split(order, starts[1:])):
+            postings[skill_id] = (p_idx[seg], np.ascontiguousarray(contrib[:, seg]))
+        return cls(position_ids, posted, postings)
+
+    def postings_for(self, skill_id, proficiency):
+        """(position indices, contributions) for one skill at one level."""
+        entry = self.postings.get(skill_id)
+        k = _LEVEL_OFFSET.get(proficiency)
+        if entry is None or k is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        pos_idx, contrib = entry
+        return pos_idx, contrib[k]
+
+    def accumulate(self, proficiencies):
+        """
+        (position indices, scores) for every position the student scores
+        above 0 on, computed only over the student's own skills.
+        """
+        parts = [self.postings_for(sid, level) for sid, level in proficiencies.items()]
+        parts = [p for p in parts if len(p[0])]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        pos_idx = np.concatenate([p[0] for p in parts])
+        contrib = np.concatenate([p[1] for p in parts])
+        uniq, inverse = np.unique(pos_idx, return_inverse=True)
+        return uniq, np.bincount(inverse, weights=contrib)
+
+    def deltas(self, current, changes):
+        """
+        (position indices, score deltas) caused by moving from ``current``
+        to ``current`` updated with ``changes`` (``{skill_id: level or None}``).
+        Only the postings of the changed skills are visited.
+        """
+        idx_parts, delta_parts = [], []
+        for skill_id, new in changes.items():
+            old   = current.get(skill_id)
+            entry = self.postings.get(skill_id)
+            if entry is None or old == new:
+                continue
+            pos_idx, contrib = entry
+            delta = np.zeros(len(pos_idx))
+            if new in _LEVEL_OFFSET:
+                delta += contrib[_LEVEL_OFFSET[new]]
+            if old in _LEVEL_OFFSET:
+                delta -= contrib[_LEVEL_OFFSET[old]]
+            idx_parts.append(pos_idx)
+            delta_parts.append(delta)
+        if not idx_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        uniq, inverse = np.unique(np.concatenate(idx_parts), return_inverse=True)
+        return uniq, np.bincount(inverse, weights=np.concatenate(delta_parts))
+
+    def score_map(self, proficiencies):
+        """position_id -> score for positions scoring above 0."""
+        idx, scores = self.accumulate(proficiencies)
+        return dict(zip(self.position_ids[idx].tolist(), scores.tolist()))
+
+    def top(self, proficiencies, n, posted_only=True):
+        """The ``n`` best ``(position_id, score)`` pairs, best first."""
+        idx, scores = self.accumulate(proficiencies)
+        if posted_only and len(idx):
+            keep = self.posted[idx]
+            idx, scores = idx[keep], scores[keep]
+        if len(idx) > n:
+            part = np.argpartition(-scores, n - 1)[:n]
+            idx, scores = idx[part], scores[part]
+        order = np.lexsort((self.position_ids[idx], -scores))
+        return list(zip(self.position_ids[idx][order].tolist(), scores[order].tolist()))
+
+
+def get_skill_index():
+    """
+    The process-wide SkillIndex, rebuilt when ``invalidate_skill_index`` has
+    bumped the shared version key (in the ``CACHES`` backend every worker
+    process reads) since it was built.
+    """
+    global _skill_index
+    version = cache.get(SKILL_INDEX_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(SKILL_INDEX_VERSION_KEY, version, None)
+        version = cache.get(SKILL_INDEX_VERSION_KEY, version)
+    if _skill_index is None or _skill_index[0] != version:
+        with use_primary():     # cached under the current version; must not be stale
+            _skill_index = (version, SkillIndex.build())
+    return _skill_index[1]
+
+
+def invalidate_skill_index():
+    """Mark every process's SkillIndex stale (requirements or statuses changed)."""
+    cache.set(SKILL_INDEX_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+# ---------- Reverse (position → students) search ----------
+
+def rank_students(position, min_score):
+    """
+    All students scoring at least ``min_score`` on ``position``, as
+    ``(profile_id, score)`` pairs best first.
+
+    Requirements are applied in descending weight order, term at a time.
+    After each one a student's upper bound is their score so far plus the
+    maximum the remaining requirements could add; once that drops below
+    ``min_score`` the student is dropped and never looked at again. Students
+    holding none of the required skills are never loaded.
+    """
+    from .models import StudentSkill
+
+    reqs = list(position.requirements.values_list('skill_id', 'importance', 'level_pct'))
+    if not reqs:
+        return []
+    _, _, skill_ids, contrib = _requirement_contributions(
+        (position.pk, sid, imp, lvl) for sid, imp, lvl in reqs
+    )
+    best  = contrib.max(axis=0)                        # full-credit contribution per requirement
+    order = np.argsort(-best, kind='stable')
+    remaining = np.concatenate([np.cumsum(best[order][::-1])[::-1][1:], [0.0]])
+
+    rows = list(StudentSkill.objects.filter(
+        skill_id__in=skill_ids.tolist()
+    ).values_list('profile_id', 'skill_id', 'proficiency'))
+    if not rows:
+        return []
+    profile_ids, cand = np.unique(np.array([r[0] for r in rows]), return_inverse=True)
+    row_skill = np.array([r[1] for r in rows])
+    row_level = np.array([_LEVEL_OFFSET.get(r[2], -1) for r in rows])
+    srt = np.argsort(row_skill, kind='stable')
+    uniq, starts = np.unique(row_skill[srt], return_index=True)
+    by_skill = dict(zip(uniq.tolist(), np.split(srt, starts[1:])))
+
+    acc   = np.zeros(len(profile_ids))
+    alive = np.ones(len(profile_ids), dtype=bool)
+    floor = min_score - 1e-9                           # tolerate float rounding at the boundary
+    for step, i in enumerate(order):
+        seg = by_skill.get(int(skill_ids[i]))
+        if seg is not None:
+            seg = seg[alive[cand[seg]] & (row_level[seg] >= 0)]
+            acc[cand[seg]] += contrib[row_level[seg], i]
+        alive &= acc + remaining[step] >= floor
+        if not alive.any():
+            return []
+
+    idx = np.flatnonzero(alive & (acc > 0))
+    idx = idx[np.lexsort((profile_ids[idx], -acc[idx]))]
+    return list(zip(profile_ids[idx].tolist(), acc[idx].tolist()))
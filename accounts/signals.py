@@ -0,0 +1,179 @@
+# accounts/signals.py
+"""
+Model signal handlers that keep derived scoring data in step with the
+tables it is computed from. Connected in AccountsConfig.ready().
+
+Bulk writers that bring the derived data up to date themselves (one
+counter adjustment per diff rather than one per row) wrap their writes in
+``muted()``; the receivers below then do nothing for this thread or task.
+"""
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db.models.signals import post_init, post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from positions.models import Position, PositionSkillRequirement
+from .models import StudentSkill
+from .scoring import invalidate_skill_index
+from . import skill_gaps
+
+_muted = contextvars.ContextVar('accounts_signals_muted', default=False)
+
+
+@contextmanager
+def muted():
+    """Skip the derived-data receivers inside the block; the caller updates that data."""
+    token = _muted.set(True)
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+@receiver(post_save,   sender=PositionSkillRequirement)
+@receiver(post_delete, sender=PositionSkillRequirement)
+@receiver(post_save,   sender=Position)
+@receiver(post_delete, sender=Position)
+def _requirements_changed(sender, **kwargs):
+    if _muted.get():
+        return
+    invalidate_skill_index()
+
+
+# ─── Skill-gap rollups ─────────────────────────────────────────────
+#
+# A save moves the counters from the row's stored values to its new ones.
+# The stored values are stashed on the instance when it is constructed
+# (from the database or by the caller) and again after every save, so a
+# save only queries for them when they are unknown: a row built with an
+# explicit pk, or one loaded with the relevant fields deferred.
+
+_TRACKED = {
+    StudentSkill:             ('skill_id', 'proficiency'),
+    PositionSkillRequirement: ('skill_id', 'level_pct'),
+    Position:                 ('status',),
+}
+
+
+def _stash(instance, fields):
+    values = tuple(instance.__dict__.get(f) for f in fields)
+    instance._gap_loaded = None if None in values else values
+
+
+@receiver(post_init, sender=StudentSkill)
+@receiver(post_init, sender=PositionSkillRequirement)
+@receiver(post_init, sender=Position)
+def _remember_loaded(sender, instance, **kwargs):
+    _stash(instance, _TRACKED[sender])
+
+
+def _names(fields):
+    return {f.removesuffix('_id') for f in fields}
+
+
+def _previous(instance, raw, update_fields):
+    """
+    ``(stored values, changed)`` for the tracked fields before this save;
+    the stored values are None for a new row.
+    """
+    fields = _TRACKED[type(instance)]
+    if raw or instance.pk is None:
+        return None, True
+    if update_fields is not None and not _names(fields) & _names(update_fields):
+        return None, False
+    previous = getattr(instance, '_gap_loaded', None)
+    if previous is None or instance._state.adding:     # not loaded from the database
+        previous = type(instance).objects.filter(pk=instance.pk).values_list(*fields).first()
+    current = tuple(getattr(instance, f) for f in fields)
+    return previous, previous != current
+
+
+@receiver(pre_save, sender=StudentSkill)
+def _stash_student_skill(sender, instance, raw=False, update_fields=None, **kwargs):
+    if _muted.get():
+        return
+    instance._gap_previous, instance._gap_changed = _previous(instance, raw, update_fields)
+
+
+@receiver(post_save, sender=StudentSkill)
+def _student_skill_saved(sender, instance, raw=False, **kwargs):
+    if raw or _muted.get() or not getattr(instance, '_gap_changed', True):
+        return
+    _stash(instance, _TRACKED[sender])
+    counts = Counter({(instance.skill_id, instance.proficiency): 1})
+    previous = getattr(instance, '_gap_previous', None)
+    if previous:
+        counts[previous] -= 1
+    skill_gaps.adjust('supply', counts)
+
+
+@receiver(post_delete, sender=StudentSkill)
+def _student_skill_deleted(sender, instance, **kwargs):
+    if _muted.get():
+        return
+    skill_gaps.adjust('supply', {(instance.skill_id, instance.proficiency): -1})
+
+
+def _is_posted(requirement):
+    position = requirement._state.fields_cache.get('position')
+    if position is not None:
+        return position.status == 'posted'
+    return Position.objects.filter(pk=requirement.position_id, status='posted').exists()
+
+
+@receiver(pre_save, sender=PositionSkillRequirement)
+def _stash_requirement(sender, instance, raw=False, update_fields=None, **kwargs):
+    if _muted.get():
+        return
+    instance._gap_previous, instance._gap_changed = _previous(instance, raw, update_fields)
+
+
+@receiver(post_save, sender=PositionSkillRequirement)
+def _requirement_saved(sender, instance, raw=False, **kwargs):
+    if raw or _muted.get() or not getattr(instance, '_gap_changed', True):
+        return
+    _stash(instance, _TRACKED[sender])
+    if not _is_posted(instance):
+        return
+    counts = skill_gaps.requirement_counts([(instance.skill_id, instance.level_pct)])
+    previous = getattr(instance, '_gap_previous', None)
+    if previous:
+        counts.update(skill_gaps.requirement_counts([previous], sign=-1))
+    skill_gaps.adjust('demand', counts)
+
+
+@receiver(post_delete, sender=PositionSkillRequirement)
+def _requirement_deleted(sender, instance, **kwargs):
+    if _muted.get():
+        return
+    # cascaded deletes run before the position row itself is removed
+    if _is_posted(instance):
+        skill_gaps.adjust('demand', skill_gaps.requirement_counts(
+            [(instance.skill_id, instance.level_pct)], sign=-1
+        ))
+
+
+@receiver(pre_save, sender=Position)
+def _stash_position_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    if _muted.get():
+        return
+    previous, changed = _previous(instance, raw, update_fields)
+    instance._gap_was_posted = bool(previous) and previous[0] == 'posted'
+    instance._gap_changed    = changed
+
+
+@receiver(post_save, sender=Position)
+def _position_saved(sender, instance, raw=False, **kwargs):
+    if raw or _muted.get() or not getattr(instance, '_gap_changed', True):
+        return
+    _stash(instance, _TRACKED[sender])
+    was_posted = getattr(instance, '_gap_was_posted', False)
+    is_posted  = instance.status == 'posted'
+    if was_posted == is_posted:
+        return
+    skill_gaps.bulk_adjust('demand', skill_gaps.requirement_counts(
+        instance.requirements.values_list('skill_id', 'level_pct'),
+        sign=1 if is_posted else -1,
+    ))
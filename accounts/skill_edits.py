@@ -0,0 +1,109 @@
+# accounts/skill_edits.py
+"""
+Diff-based editing of a student's skill set.
+
+``apply_skill_diff`` applies additions, level changes and removals to one
+student's StudentSkill rows in a single transaction with one DELETE, one
+``bulk_update`` and one ``bulk_create``, whatever the size of the diff.
+Bulk writes skip the model signals (and the DELETE mutes them with
+``signals.muted()``), so the skill-gap supply counters are moved here with
+``skill_gaps.bulk_adjust`` and the student's stored match scores are
+refreshed once. (Student skills do not feed the SkillIndex,
+which only holds position requirements.)
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from positions.models import Skill
+from . import signals, skill_gaps
+from .matches import refresh_student_matches
+from .models import StudentSkill
+
+LEVELS = dict(StudentSkill.PROFICIENCY_CHOICES)
+
+
+class SkillDiffError(ValueError):
+    pass
+
+
+def parse_skill_diff(data):
+    """
+    ``(add, update, delete)`` from a request body of the form
+    ``{"add": {"<skill_id>": level}, "update": {"<pk>": level}, "delete": [pk, …]}``,
+    where pks are StudentSkill ids; every key is optional.
+    """
+    try:
+        add    = {int(sid): level for sid, level in (data.get('add') or {}).items()}
+        update = {int(pk): level for pk, level in (data.get('update') or {}).items()}
+        delete = {int(pk) for pk in (data.get('delete') or [])}
+    except (TypeError, ValueError, AttributeError):
+        raise SkillDiffError("Malformed skill diff.")
+    for level in [*add.values(), *update.values()]:
+        if level not in LEVELS:
+            raise SkillDiffError(f"Unknown proficiency {level!r}.")
+    if delete & update.keys():
+        raise SkillDiffError("A skill cannot be both updated and deleted.")
+    return add, update, delete
+
+
+def apply_skill_diff(profile, add=None, update=None, delete=()):
+    """
+    Apply a diff to ``profile``'s skills and return how many rows changed.
+    ``add`` maps skill ids to levels (adding a skill the student already
+    holds changes its level), ``update`` maps StudentSkill pks to levels and
+    ``delete`` lists StudentSkill pks; pks must belong to ``profile``.
+    Nothing is written unless the whole diff is valid. The diff is checked
+    against the rows as read inside the transaction that writes it, so a
+    concurrent edit cannot make it double-count the supply counters.
+    """
+    update  = dict(update or {})
+    delete  = set(delete)
+    with transaction.atomic():
+        current = {
+            pk: (skill_id, level) for pk, skill_id, level in
+            StudentSkill.objects.filter(profile=profile).values_list('pk', 'skill_id', 'proficiency')
+        }
+        unknown = (update.keys() | delete) - current.keys()
+        if unknown:
+            raise SkillDiffError(f"Unknown skill rows: {sorted(unknown)}.")
+
+        held = {skill_id: pk for pk, (skill_id, _) in current.items() if pk not in delete}
+        new  = {}
+        for skill_id, level in (add or {}).items():
+            if skill_id in held:
+                update[held[skill_id]] = level
+            else:
+                new[skill_id] = level
+        if new:
+            missing = new.keys() - set(Skill.objects.filter(pk__in=new).values_list('pk', flat=True))
+            if missing:
+                raise SkillDiffError(f"Unknown skills: {sorted(missing)}.")
+
+        changed = [StudentSkill(pk=pk, proficiency=level)
+                   for pk, level in update.items() if current[pk][1] != level]
+        if not (delete or changed or new):
+            return 0
+
+        supply = Counter()
+        for pk in delete:
+            supply[current[pk]] -= 1
+        for obj in changed:
+            supply[current[obj.pk]] -= 1
+            supply[(current[obj.pk][0], obj.proficiency)] += 1
+        for skill_id, level in new.items():
+            supply[(skill_id, level)] += 1
+
+        if delete:      # before the inserts: a deleted skill may be re-added
+            with signals.muted():
+                StudentSkill.objects.filter(pk__in=delete).delete()
+        if changed:
+            StudentSkill.objects.bulk_update(changed, ['proficiency'])
+        if new:
+            StudentSkill.objects.bulk_create([
+                StudentSkill(profile=profile, skill_id=skill_id, proficiency=level)
+                for skill_id, level in new.items()
+            ])
+        skill_gaps.bulk_adjust('supply', supply)
+        refresh_student_matches(profile)
+    return len(delete) + len(changed) + len(new)
@@ -0,0 +1,169 @@
+# accounts/skill_gaps.py
+"""
+Skill supply vs. demand analytics backed by the SkillGapRollup counters.
+
+The counters are adjusted by +1/-1 from model signals as student skills and
+position requirements change, so the admin dashboard reads a handful of
+rollup rows instead of joining every student's skills against every
+requirement. Bulk edits that bypass signals apply their net deltas with
+``bulk_adjust``; ``rebuild_skill_gaps`` recomputes everything from scratch.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from positions.models import PositionSkillRequirement
+from .models import SkillGapRollup, StudentProfile, StudentSkill
+from .scoring import PROFICIENCY_LEVELS, PROFICIENCY_PCT
+
+LEVEL_RANK = {level: k for k, level in enumerate(PROFICIENCY_LEVELS)}
+
+
+def level_bucket(level_pct):
+    """Proficiency level a requirement's level_pct asks for."""
+    for level in PROFICIENCY_LEVELS:
+        if level_pct <= PROFICIENCY_PCT[level]:
+            return level
+    return PROFICIENCY_LEVELS[-1]
+
+
+def adjust(field, counts):
+    """Add ``counts`` ({(skill_id, level): delta}) to the ``field`` counters."""
+    for (skill_id, level), delta in counts.items():
+        if not delta:
+            continue
+        updated = SkillGapRollup.objects.filter(skill_id=skill_id, level=level).update(
+            **{field: F(field) + delta}
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    SkillGapRollup.objects.create(skill_id=skill_id, level=level, **{field: delta})
+            except IntegrityError:      # created concurrently
+                SkillGapRollup.objects.filter(skill_id=skill_id, level=level).update(
+                    **{field: F(field) + delta}
+                )
+
+
+def bulk_adjust(field, counts):
+    """
+    ``adjust`` for many keys at once: one SELECT, one UPDATE and one INSERT
+    however many counters change.
+    """
+    counts = {key: delta for key, delta in counts.items() if delta}
+    if not counts:
+        return
+    rows = {
+        (r.skill_id, r.level): r
+        for r in SkillGapRollup.objects.filter(skill_id__in={skill_id for skill_id, _ in counts})
+        if (r.skill_id, r.level) in counts
+    }
+    for key, row in rows.items():
+        setattr(row, field, F(field) + counts[key])
+    SkillGapRollup.objects.bulk_update(rows.values(), [field])
+    missing = {key: delta for key, delta in counts.items() if key not in rows}
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            SkillGapRollup.objects.bulk_create([
+                SkillGapRollup(skill_id=skill_id, level=level, **{field: delta})
+                for (skill_id, level), delta in missing.items()
+            ])
+    except IntegrityError:      # some created concurrently
+        adjust(field, missing)
+
+
+def requirement_counts(requirements, sign=1):
+    """Demand deltas for an iterable of (skill_id, level_pct) pairs."""
+    counts = Counter()
+    for skill_id, level_pct in requirements:
+        counts[(skill_id, level_bucket(level_pct))] += sign
+    return counts
+
+
+def rebuild_skill_gaps():
+    """Recompute every counter from the source tables (three queries)."""
+    supply = StudentSkill.objects.values_list('skill_id', 'proficiency').annotate(n=Count('id'))
+    demand = requirement_counts(
+        PositionSkillRequirement.objects.filter(position__status='posted')
+        .values_list('skill_id', 'level_pct')
+    )
+    rows = {}
+    for skill_id, level, n in supply:
+        rows[(skill_id, level)] = SkillGapRollup(skill_id=skill_id, level=level, supply=n)
+    for (skill_id, level), n in demand.items():
+        rows.setdefault((skill_id, level), SkillGapRollup(skill_id=skill_id, level=level)).demand = n
+    with transaction.atomic():
+        SkillGapRollup.objects.all().delete()
+        SkillGapRollup.objects.bulk_create(rows.values())
+
+
+def _by_skill(rows):
+    """skill_id -> {'supply': {level: n}, 'demand': {level: n}}"""
+    out = {}
+    for r in rows:
+        entry = out.setdefault(r.skill_id, {'skill': r.skill, 'supply': Counter(), 'demand': Counter()})
+        entry['supply'][r.level] += r.supply
+        entry['demand'][r.level] += r.demand
+    return out
+
+
+def _at_or_above(supply, level):
+    return sum(n for lvl, n in supply.items() if LEVEL_RANK[lvl] >= LEVEL_RANK[level])
+
+
+def catalogue_gaps(limit=10):
+    """
+    Skills ranked by unmet demand across all posted positions. Shares are
+    averaged over the levels positions ask for, weighted by how many
+    positions ask for each; ``shortfall`` is positions × students not
+    meeting the level.
+    """
+    total = StudentProfile.objects.count()
+    gaps  = []
+    for entry in _by_skill(SkillGapRollup.objects.select_related('skill')).values():
+        demand = sum(entry['demand'].values())
+        if not demand:
+            continue
+        holders = sum(entry['supply'].values())
+        meeting = sum(
+            n * _at_or_above(entry['supply'], level) for level, n in entry['demand'].items()
+        ) / demand
+        gaps.append({
+            'skill':       entry['skill'],
+            'demand':      demand,
+            'holders':     holders,
+            'lacking_pct': 100.0 * (total - holders) / total if total else 0.0,
+            'below_pct':   100.0 * (holders - meeting) / total if total else 0.0,
+            'shortfall':   demand * (total - meeting),
+        })
+    gaps.sort(key=lambda g: (-g['shortfall'], -g['demand']))
+    return gaps[:limit]
+
+
+def position_gaps(position, requirements=None):
+    """
+    For each requirement of ``position`` (or the already-loaded
+    ``requirements``): share of students lacking the skill entirely and
+    share holding it below the required level.
+    """
+    reqs  = list(requirements if requirements is not None else position.requirements.select_related('skill'))
+    total = StudentProfile.objects.count()
+    stats = _by_skill(
+        SkillGapRollup.objects.select_related('skill')
+        .filter(skill_id__in=[r.skill_id for r in reqs])
+    )
+    out = []
+    for r in reqs:
+        supply  = stats.get(r.skill_id, {}).get('supply', Counter())
+        holders = sum(supply.values())
+        meeting = _at_or_above(supply, level_bucket(r.level_pct))
+        out.append({
+            'requirement': r,
+            'lacking_pct': 100.0 * (total - holders) / total if total else 0.0,
+            'below_pct':   100.0 * (holders - meeting) / total if total else 0.0,
+        })
+    out.sort(key=lambda g: -(g['lacking_pct'] + g['below_pct']))
+    return out
@@ -0,0 +1,314 @@
+# accounts/synthetic.py
+"""
+Seeded synthetic data at realistic scale, for performance work.
+
+``generate`` fills the database with students (User + StudentProfile),
+their skills, saved positions and CVs, plus a tagged position catalogue
+with skill requirements. Every choice comes from one numpy generator
+seeded by ``seed``, so the same arguments on an empty database always
+produce the same rows. Rows are written with ``bulk_create`` in batches,
+one transaction per batch, which bypasses the model signals; the derived
+tables (matches, top matches, skill-gap rollups, skill index) are rebuilt
+at the end instead.
+
+Synthetic students are the users whose username starts with ``PREFIX``
+and synthetic positions carry the ``TAG`` tag; ``purge`` removes both.
+"""
+import datetime
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from positions.models import Position, PositionSkillRequirement, Skill, Tag
+from . import signals
+from .forms import LANGUAGE_CHOICES
+from .models import (
+    CVExperience, CVLanguage, SavedPosition, StudentCV, StudentProfile, StudentSkill, User,
+)
+
+PREFIX   = 'synth'
+TAG      = 'synthetic'
+PASSWORD = 'synthetic-password'
+
+BATCH_SIZE = 2000
+
+SKILL_STEMS = {
+    'coding':     ['Python', 'Java', 'JavaScript', 'TypeScript', 'C', 'C++', 'C#', 'Go', 'Rust',
+                   'SQL', 'Kotlin', 'Swift', 'PHP', 'Ruby', 'Scala', 'Bash', 'HTML/CSS', 'React',
+                   'Django', 'Spring', 'Docker', 'Kubernetes', 'Git', 'Linux', 'AWS', 'Testing'],
+    'management': ['Project Planning', 'Scrum', 'Kanban', 'Budgeting', 'Stakeholder Management',
+                   'Risk Management', 'Team Leadership', 'Hiring', 'Roadmapping', 'Negotiation',
+                   'Public Speaking', 'Technical Writing', 'Mentoring', 'Vendor Management'],
+    'ai':         ['Machine Learning', 'Deep Learning', 'NLP', 'Computer Vision', 'PyTorch',
+                   'TensorFlow', 'scikit-learn', 'Statistics', 'Data Visualisation', 'MLOps',
+                   'Reinforcement Learning', 'Prompt Engineering', 'Pandas', 'Feature Engineering'],
+}
+TAG_NAMES = ['Remote', 'Hybrid', 'On-site', 'Internship', 'Graduate', 'Part-time', 'Full-time',
+             'Contract', 'Backend', 'Frontend', 'Full-stack', 'Data', 'Research', 'DevOps',
+             'Security', 'Mobile', 'Cloud', 'Consulting', 'FinTech', 'HealthTech', 'EdTech',
+             'Startup', 'Enterprise', 'Public Sector', 'Non-profit', 'Visa Sponsorship']
+ROLES      = ['Software Engineer', 'Data Analyst', 'Data Scientist', 'ML Engineer',
+              'Project Manager', 'Product Manager', 'DevOps Engineer', 'QA Engineer',
+              'Web Developer', 'Research Assistant', 'Business Analyst', 'Scrum Master']
+SENIORITY  = ['Junior', 'Graduate', 'Intern', '', 'Associate', 'Senior']
+COMPANIES  = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark', 'Wayne', 'Soylent',
+              'Cyberdyne', 'Tyrell', 'Wonka', 'Vandelay', 'Aperture', 'Monarch', 'Oscorp']
+SUFFIXES   = ['Labs', 'Systems', 'Group', 'Analytics', 'Software', 'Consulting', 'Digital', 'Partners']
+FIRST      = ['Alex', 'Sam', 'Maria', 'Chen', 'Aisha', 'Liam', 'Noor', 'Mateo', 'Yuki', 'Olga',
+              'Kwame', 'Priya', 'Jonas', 'Fatima', 'Diego', 'Hana', 'Ivan', 'Zoe', 'Omar', 'Lena']
+LAST       = ['Smith', 'Garcia', 'Wang', 'Khan', 'Müller', 'Rossi', 'Kowalski', 'Nguyen', 'Silva',
+              'Okafor', 'Sato', 'Novak', 'Haddad', 'Larsen', 'Patel', 'Cohen', 'Dubois', 'Ivanova']
+CITIES     = [('Dublin', 'Ireland'), ('Berlin', 'Germany'), ('Lisbon', 'Portugal'), ('Warsaw', 'Poland'),
+              ('Madrid', 'Spain'), ('Lyon', 'France'), ('Milan', 'Italy'), ('Athens', 'Greece')]
+LANGUAGES  = [value for value, _ in LANGUAGE_CHOICES if value not in ('', 'Other')]
+
+TRACK_WEIGHTS       = {'coding': .60, 'ai': .25, 'management': .15}
+TRACK_AFFINITY      = 20
+STATUS_WEIGHTS      = {'posted': .70, 'draft': .15, 'retracted': .10, 'deleted': .05}
+PROFICIENCY_WEIGHTS = {'low': .40, 'medium': .40, 'high': .20}
+LEVEL_PCTS          = [30, 40, 50, 60, 70, 75, 80, 90, 100]
+CEFR                = [code for code, _ in CVLanguage.CEFR_CHOICES]
+
+
+def _skill_names(count):
+    """``count`` (name, category) pairs: the stems first, then numbered variants."""
+    stems = [(name, category) for category, names in SKILL_STEMS.items() for name in names]
+    pairs = []
+    round_ = 1
+    while len(pairs) < count:
+        for name, category in stems[: count - len(pairs)]:
+            pairs.append((name if round_ == 1 else f"{name} {round_}", category))
+        round_ += 1
+    return pairs
+
+
+def _ensure(model, names, **defaults):
+    """ids of the rows named ``names`` (in order), bulk-creating the missing ones."""
+    existing = dict(model.objects.filter(name__in=names).values_list('name', 'id'))
+    missing  = [model(name=name, **defaults.get(name, {})) for name in names if name not in existing]
+    for obj in model.objects.bulk_create(missing, batch_size=BATCH_SIZE):
+        existing[obj.name] = obj.pk
+    return [existing[name] for name in names]
+
+
+def _pick(rng, weights, size):
+    """``size`` keys of ``weights`` ({value: weight}) drawn with replacement."""
+    values = list(weights)
+    p = np.array(list(weights.values()), dtype=float)
+    return [values[i] for i in rng.choice(len(values), size=size, p=p / p.sum())]
+
+
+def _distinct_samples(rng, log_weights, counts):
+    """
+    For each entry of ``counts``, that many distinct column indices drawn
+    without replacement in proportion to ``exp(log_weights)`` (Gumbel top-k).
+    ``log_weights`` is one row shared by every draw or one row per draw.
+    """
+    log_weights = np.atleast_2d(log_weights)
+    keys  = log_weights + rng.gumbel(size=(len(counts), log_weights.shape[1]))
+    order = np.argsort(-keys, axis=1)
+    return [order[i, :n].tolist() for i, n in enumerate(counts)]
+
+
+def _popularity(rng, n, exponent=0.9):
+    """Zipf-like log weights over ``n`` items in a random order."""
+    ranks = rng.permutation(n) + 1
+    return -exponent * np.log(ranks)
+
+
+def _track_weights(popularity, categories):
+    """
+    One row of skill log weights per track (skill category): skills of the
+    track's own category are ``TRACK_AFFINITY`` times likelier, so students
+    and positions cluster the way real ones do instead of all overlapping.
+    """
+    categories = np.array(categories)
+    return np.stack([
+        popularity + np.where(categories == track, np.log(TRACK_AFFINITY), 0.0)
+        for track in TRACK_WEIGHTS
+    ])
+
+
+def generate(students=100_000, positions=10_000, skills=300, seed=0,
+             avg_skills=8, max_skills=30, max_requirements=10, max_saved=8,
+             cv_ratio=0.3, batch_size=BATCH_SIZE, log=None):
+    """
+    Write the synthetic dataset and return ``{model name: rows created}``.
+    ``log`` (optional) is called with a progress line after each phase.
+    """
+    log    = log or (lambda message: None)
+    rng    = np.random.default_rng(seed)
+    counts = {}
+    max_skills       = max(1, min(max_skills, skills))
+    max_requirements = max(1, min(max_requirements, skills))
+
+    # catalogue
+    skill_pairs = _skill_names(skills)
+    skill_ids   = np.array(_ensure(Skill, [n for n, _ in skill_pairs],
+                                   **{n: {'category': c} for n, c in skill_pairs}))
+    tag_ids     = _ensure(Tag, [TAG] + TAG_NAMES)
+    synth_tag, tag_ids = tag_ids[0], np.array(tag_ids[1:])
+    skill_pop   = _track_weights(_popularity(rng, len(skill_ids), exponent=0.7),
+                                 [c for _, c in skill_pairs])
+    tracks      = list(TRACK_WEIGHTS)
+    tag_pop     = _popularity(rng, len(tag_ids), exponent=0.7)
+
+    position_ids, posted_ids = [], []
+    counts['Position'] = counts['PositionSkillRequirement'] = 0
+    for start in range(0, positions, batch_size):
+        n = min(batch_size, positions - start)
+        statuses = _pick(rng, STATUS_WEIGHTS, n)
+        roles    = rng.integers(len(ROLES), size=n)
+        levels   = rng.integers(len(SENIORITY), size=n)
+        firms    = rng.integers(len(COMPANIES), size=n)
+        kinds    = rng.integers(len(SUFFIXES), size=n)
+        n_reqs   = rng.integers(min(3, max_requirements), max_requirements + 1, size=n)
+        n_tags   = rng.integers(1, 5, size=n)
+        track    = [tracks.index(t) for t in _pick(rng, TRACK_WEIGHTS, n)]
+        req_cols = _distinct_samples(rng, skill_pop[track], n_reqs)
+        tag_cols = _distinct_samples(rng, tag_pop, n_tags)
+        with transaction.atomic():
+            objs = Position.objects.bulk_create([
+                Position(
+                    title=f"{SENIORITY[levels[i]]} {ROLES[roles[i]]}".strip(),
+                    company=f"{COMPANIES[firms[i]]} {SUFFIXES[kinds[i]]}",
+                    description=f"Synthetic position #{start + i}.",
+                    status=statuses[i],
+                )
+                for i in range(n)
+            ], batch_size=batch_size)
+            reqs, links = [], []
+            for obj, cols, tcols in zip(objs, req_cols, tag_cols):
+                for col in cols:
+                    reqs.append(PositionSkillRequirement(
+                        position_id=obj.pk, skill_id=int(skill_ids[col]),
+                        level_pct=LEVEL_PCTS[int(rng.integers(len(LEVEL_PCTS)))],
+                        importance=int(rng.integers(1, 6)),
+                    ))
+                links.append(Position.tags.through(position_id=obj.pk, tag_id=synth_tag))
+                links.extend(Position.tags.through(position_id=obj.pk, tag_id=int(tag_ids[c])) for c in tcols)
+            PositionSkillRequirement.objects.bulk_create(reqs, batch_size=batch_size)
+            Position.tags.through.objects.bulk_create(links, batch_size=batch_size)
+        position_ids += [obj.pk for obj in objs]
+        posted_ids   += [obj.pk for obj, status in zip(objs, statuses) if status == 'posted']
+        counts['Position'] += n
+        counts['PositionSkillRequirement'] += len(reqs)
+        log(f"positions: {counts['Position']}/{positions}")
+
+    # students
+    password  = make_password(PASSWORD)
+    posted    = np.array(posted_ids)
+    saved_pop = _popularity(rng, len(posted), exponent=1.0) if len(posted) else None
+    offset    = User.objects.filter(username__startswith=PREFIX).count()
+    for key in ('User', 'StudentSkill', 'SavedPosition', 'StudentCV', 'CVExperience', 'CVLanguage'):
+        counts[key] = 0
+    for start in range(0, students, batch_size):
+        n = min(batch_size, students - start)
+        first = rng.integers(len(FIRST), size=n)
+        last  = rng.integers(len(LAST), size=n)
+        n_skills = np.clip(rng.poisson(avg_skills, size=n), 1, max_skills)
+        track = [tracks.index(t) for t in _pick(rng, TRACK_WEIGHTS, n)]
+        skill_cols = _distinct_samples(rng, skill_pop[track], n_skills)
+        profs = _pick(rng, PROFICIENCY_WEIGHTS, int(n_skills.sum()))
+        n_saved = np.clip(rng.poisson(max_saved / 4, size=n), 0, min(max_saved, len(posted)))
+        saved_cols = _distinct_samples(rng, saved_pop, n_saved) if len(posted) else [[]] * n
+        has_cv = rng.random(n) < cv_ratio
+
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(
+                    username=f"{PREFIX}{offset + start + i:07d}",
+                    first_name=FIRST[first[i]], last_name=LAST[last[i]],
+                    email=f"{PREFIX}{offset + start + i:07d}@example.com",
+                    password=password,
+                )
+                for i in range(n)
+            ], batch_size=batch_size)
+            profiles = StudentProfile.objects.bulk_create(
+                [StudentProfile(user_id=u.pk) for u in users], batch_size=batch_size,
+            )
+            rows, saved, k = [], [], 0
+            for profile, cols, scols in zip(profiles, skill_cols, saved_cols):
+                for col in cols:
+                    rows.append(StudentSkill(profile_id=profile.pk, skill_id=int(skill_ids[col]),
+                                             proficiency=profs[k]))
+                    k += 1
+                saved.extend(SavedPosition(profile_id=profile.pk, position_id=int(posted[c])) for c in scols)
+            StudentSkill.objects.bulk_create(rows, batch_size=batch_size)
+            SavedPosition.objects.bulk_create(saved, batch_size=batch_size)
+            cv_counts = _create_cvs(rng, [(u, p) for u, p, cv in zip(users, profiles, has_cv) if cv], batch_size)
+
+        counts['User']          += n
+        counts['StudentSkill']  += len(rows)
+        counts['SavedPosition'] += len(saved)
+        for key, value in cv_counts.items():
+            counts[key] += value
+        log(f"students: {counts['User']}/{students}")
+    return counts
+
+
+def _create_cvs(rng, owners, batch_size):
+    cvs = StudentCV.objects.bulk_create([
+        StudentCV(
+            profile_id=profile.pk,
+            full_name=f"{user.first_name} {user.last_name}",
+            email=user.email,
+            phone=f"+30 69{int(rng.integers(10**8)):08d}",
+            address=", ".join(CITIES[int(rng.integers(len(CITIES)))]),
+            objective=f"Looking for a {ROLES[int(rng.integers(len(ROLES)))]} role.",
+        )
+        for user, profile in owners
+    ], batch_size=batch_size)
+    experiences, languages = [], []
+    for cv in cvs:
+        year = 2024
+        for j in range(int(rng.integers(1, 5))):
+            start = year - int(rng.integers(1, 4))
+            city, country = CITIES[int(rng.integers(len(CITIES)))]
+            experiences.append(CVExperience(
+                cv_id=cv.pk,
+                job_title=ROLES[int(rng.integers(len(ROLES)))],
+                company=COMPANIES[int(rng.integers(len(COMPANIES)))],
+                city=city, country=country,
+                start_date=datetime.date(start, int(rng.integers(1, 13)), 1),
+                end_date=None if j == 0 else datetime.date(year, int(rng.integers(1, 13)), 1),
+                description="Worked on internal tools and reporting.",
+            ))
+            year = start
+        picks = rng.choice(len(LANGUAGES), size=int(rng.integers(1, 4)), replace=False)
+        for j, lang in enumerate(picks):
+            levels = [CEFR[int(x)] for x in rng.integers(2, len(CEFR), size=5)]
+            languages.append(CVLanguage(
+                cv_id=cv.pk, language=LANGUAGES[int(lang)], mother_tongue=(j == 0),
+                listening=levels[0], reading=levels[1], spoken_interaction=levels[2],
+                spoken_production=levels[3], writing=levels[4],
+            ))
+    CVExperience.objects.bulk_create(experiences, batch_size=batch_size)
+    CVLanguage.objects.bulk_create(languages, batch_size=batch_size)
+    return {'StudentCV': len(cvs), 'CVExperience': len(experiences), 'CVLanguage': len(languages)}
+
+
+def purge():
+    """
+    Delete every synthetic student and position. The deletes run with the
+    derived-data signals muted (no per-row counter updates), so rebuild the
+    derived tables afterwards, as ``rebuild_derived`` does.
+    """
+    with transaction.atomic(), signals.muted():
+        User.objects.filter(username__startswith=PREFIX).delete()
+        Position.objects.filter(tags__name=TAG).delete()
+
+
+def rebuild_derived(workers=None, log=None):
+    """Recompute everything bulk writes skipped: matches, top matches, rollups, skill index."""
+    from .matches import compute_top_matches, rebuild_all_matches
+    from .scoring import invalidate_skill_index
+    from .skill_gaps import rebuild_skill_gaps
+
+    log = log or (lambda message: None)
+    log(f"matches: {rebuild_all_matches()} rows")
+    log(f"top matches: {compute_top_matches(workers=workers)} rows")
+    rebuild_skill_gaps()
+    log("skill-gap rollups rebuilt")
+    invalidate_skill_index()
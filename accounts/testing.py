@@ -0,0 +1,28 @@
+# accounts/testing.py
+"""Test-only helpers for the accounts app's derived data."""
+from .models import SkillGapRollup, StudentPositionMatch, StudentProfile
+from .scoring import RequirementMatrix, student_proficiencies
+from .skill_gaps import rebuild_skill_gaps
+
+
+class DerivedDataTestMixin:
+    """
+    TestCase mixin for code that writes around the model signals: the
+    stored matches must equal a fresh RequirementMatrix scoring and the
+    skill-gap rollups a ``rebuild_skill_gaps``.
+    """
+
+    def assertDerivedDataCurrent(self, profiles=None):
+        matrix = RequirementMatrix.load()
+        for profile in StudentProfile.objects.all() if profiles is None else profiles:
+            stored   = dict(StudentPositionMatch.objects.filter(profile=profile)
+                            .values_list('position_id', 'score'))
+            expected = {pid: score for pid, score in
+                        matrix.score_map(student_proficiencies(profile)).items() if score > 0}
+            self.assertEqual(stored.keys(), expected.keys())
+            for pid, score in expected.items():
+                self.assertAlmostEqual(stored[pid], score)
+        rollups = set(SkillGapRollup.objects.exclude(supply=0, demand=0)
+                      .values_list('skill_id', 'level', 'supply', 'demand'))
+        rebuild_skill_gaps()
+        self.assertEqual(rollups, set(SkillGapRollup.objects.values_list('skill_id', 'level', 'supply', 'demand')))
@@ -1,7 +1,14 @@
 # accounts/tests.py
 
+import datetime
 import io
+import json
+import time
+from unittest import mock
+from django.db.models import Q
 from django.test import TestCase
+from careerpath.testing import QueryBudgetTestMixin
+from accounts.testing import DerivedDataTestMixin
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -88,3 +95,919 @@ class CVWorkflowTests(TestCase):
         response = self.client.post(url, post_data)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+class MatchScoringTests(TestCase):
+    def setUp(self):
+        from positions.models import Skill, Position, PositionSkillRequirement
+        from accounts.models import StudentProfile, StudentSkill
+
+        self.user = User.objects.create_user(
+            username='scorer', email='scorer@example.com',
+            password='correcthorsebatterystaple',
+        )
+        self.profile = StudentProfile.objects.create(user=self.user)
+        self.skills = [Skill.objects.create(name=f'Skill {i}') for i in range(4)]
+        self.positions = []
+        for i, levels in enumerate([(40, 75), (100, 75, 40), (75,)]):
+            pos = Position.objects.create(title=f'Pos {i}', company='Acme', status='posted')
+            for j, level in enumerate(levels):
+                PositionSkillRequirement.objects.create(
+                    position=pos, skill=self.skills[j], level_pct=level, importance=j + 1,
+                )
+            self.positions.append(pos)
+        Position.objects.create(title='Empty', company='Acme', status='posted')
+        StudentSkill.objects.create(profile=self.profile, skill=self.skills[0], proficiency='medium')
+        StudentSkill.objects.create(profile=self.profile, skill=self.skills[2], proficiency='low')
+
+    def _reference_score(self, pos, student_map):
+        reqs      = list(pos.requirements.all())
+        total_imp = sum(r.importance for r in reqs) or 1
+        score     = 0.0
+        for r in reqs:
+            weight = r.importance / total_imp * 100
+            sp     = student_map.get(r.skill_id)
+            if sp:
+                num    = {'low': 40, 'medium': 75, 'high': 100}[sp]
+                score += weight * min(num / r.level_pct, 1.0)
+        return score
+
+    def test_matrix_matches_reference_formula(self):
+        from accounts.scoring import RequirementMatrix, student_proficiencies
+
+        student_map = student_proficiencies(self.profile)
+        scores = RequirementMatrix.load().score_map(student_map)
+        for pos in self.positions:
+            self.assertAlmostEqual(scores[pos.pk], self._reference_score(pos, student_map))
+
+    def test_skill_index_ranks_only_matching_positions(self):
+        from accounts.scoring import get_skill_index, student_proficiencies
+
+        student_map = student_proficiencies(self.profile)
+        top = get_skill_index().top(student_map, 10)
+        expected = sorted(
+            ((self._reference_score(p, student_map), p.pk) for p in self.positions), reverse=True
+        )
+        self.assertEqual([pk for pk, _ in top], [pk for score, pk in expected if score > 0])
+        for (pk, score), (ref, _) in zip(top, expected):
+            self.assertAlmostEqual(score, ref)
+
+    def test_skill_index_version_is_shared_between_processes(self):
+        from django.conf import settings
+        from django.core.cache.backends.filebased import FileBasedCache
+        from accounts.scoring import SKILL_INDEX_VERSION_KEY, get_skill_index
+
+        index = get_skill_index()
+        other = FileBasedCache(settings.CACHES['default']['LOCATION'], {})    # another worker's view
+        other.set(SKILL_INDEX_VERSION_KEY, 'bumped elsewhere', None)
+        self.assertIsNot(get_skill_index(), index)
+
+    def test_browse_uses_constant_queries(self):
+        self.client.login(username='scorer', password='correcthorsebatterystaple')
+        url = reverse('accounts:student_positions')
+        with self.assertNumQueries(12):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        expected = self._reference_score(self.positions[0], {self.skills[0].pk: 'medium', self.skills[2].pk: 'low'})
+        self.assertContains(response, f'{expected:.1f}%')
+
+    def test_browse_keyset_pages_cover_posted_positions_once(self):
+        from unittest import mock
+        from accounts.matches import rebuild_all_matches
+        from positions.models import Position
+
+        Position.objects.create(title='Hidden', company='Acme', status='draft')
+        rebuild_all_matches()
+        self.client.login(username='scorer', password='correcthorsebatterystaple')
+        url = reverse('accounts:student_positions')
+        for sort in ('score', 'created', 'company'):
+            seen, cursor = [], ''
+            with mock.patch('accounts.views.BROWSE_PAGE_SIZE', 2):
+                while True:
+                    response = self.client.get(url, {'sort': sort, 'cursor': cursor})
+                    seen += [p.pk for p in response.context['positions']]
+                    cursor = response.context['next_cursor']
+                    if not cursor:
+                        break
+            posted = Position.objects.filter(status='posted').values_list('pk', flat=True)
+            self.assertEqual(sorted(seen), sorted(posted))
+            if sort == 'score':
+                scores = [self._reference_score(Position.objects.get(pk=pk),
+                                                {self.skills[0].pk: 'medium', self.skills[2].pk: 'low'})
+                          for pk in seen]
+                self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_browse_scores_retracted_positions_on_the_fly(self):
+        from accounts.models import StudentPositionMatch
+
+        self.positions[0].status = 'retracted'
+        self.positions[0].save()
+        self.assertFalse(StudentPositionMatch.objects.filter(position=self.positions[0]).exists())
+        self.client.login(username='scorer', password='correcthorsebatterystaple')
+        response = self.client.get(reverse('accounts:student_positions'), {'status': 'retracted', 'sort': 'score'})
+        self.assertEqual(response.context['current_sort'], 'created')
+        self.assertEqual([p.pk for p in response.context['positions']], [self.positions[0].pk])
+        expected = self._reference_score(self.positions[0], {self.skills[0].pk: 'medium', self.skills[2].pk: 'low'})
+        self.assertGreater(expected, 0)
+        self.assertAlmostEqual(response.context['positions'][0].match_score, expected)
+        self.assertContains(response, f'{expected:.1f}%')
+
+    def test_skill_edits_refresh_materialized_matches(self):
+        from accounts.models import StudentPositionMatch
+
+        self.client.login(username='scorer', password='correcthorsebatterystaple')
+        self.client.post(reverse('accounts:add_skill'), {
+            'add_skill_id': self.skills[1].pk, 'proficiency': 'high',
+        })
+        stored = dict(StudentPositionMatch.objects.filter(profile=self.profile)
+                      .values_list('position_id', 'score'))
+        student_map = {self.skills[0].pk: 'medium', self.skills[1].pk: 'high', self.skills[2].pk: 'low'}
+        for pos in self.positions:
+            self.assertAlmostEqual(stored.get(pos.pk, 0.0), self._reference_score(pos, student_map))
+
+    def test_stored_matches_cover_posted_positions_only(self):
+        from accounts.matches import refresh_student_matches
+        from accounts.models import StudentPositionMatch
+        from positions.models import Position, PositionSkillRequirement
+
+        draft = Position.objects.create(title='Draft', company='Acme', status='draft')
+        PositionSkillRequirement.objects.create(position=draft, skill=self.skills[0], level_pct=75)
+        refresh_student_matches(self.profile)
+        stored = StudentPositionMatch.objects.filter(profile=self.profile)
+        self.assertFalse(stored.filter(position=draft).exists())
+        self.assertEqual(set(stored.values_list('position_id', flat=True)), {p.pk for p in self.positions})
+
+        self.client.force_login(User.objects.create(username='boss', is_admin=True))
+        url = reverse('positions:status', args=[draft.pk])
+        self.client.post(url, {'status': 'posted'})
+        self.assertAlmostEqual(stored.get(position=draft).score, 100.0)
+        self.client.post(url, {'status': 'retracted'})
+        self.assertFalse(stored.filter(position=draft).exists())
+
+    def test_top_matches_job_and_admin_page(self):
+        from accounts.matches import compute_top_matches
+        from accounts.models import TopMatch
+
+        compute_top_matches(k=2, workers=0)
+        student_map = {self.skills[0].pk: 'medium', self.skills[2].pk: 'low'}
+        expected = sorted(
+            ((self._reference_score(p, student_map), p.pk) for p in self.positions), reverse=True
+        )
+        ranked = list(TopMatch.objects.filter(profile=self.profile, student_rank__isnull=False)
+                      .order_by('student_rank').values_list('position_id', flat=True))
+        self.assertEqual(ranked, [pk for score, pk in expected if score > 0][:2])
+
+        admin = User.objects.create_user(username='boss', password='correcthorsebatterystaple', is_admin=True)
+        self.client.force_login(admin)
+        response = self.client.get(reverse('accounts:admin_matches'))
+        self.assertContains(response, 'scorer')
+
+    def test_what_if_reports_deltas_without_writing(self):
+        import json
+        from accounts.matches import rebuild_all_matches
+        from accounts.models import StudentSkill
+
+        rebuild_all_matches()
+        self.client.login(username='scorer', password='correcthorsebatterystaple')
+        changes = {str(self.skills[0].pk): 'high', str(self.skills[1].pk): 'medium'}
+        response = self.client.post(reverse('accounts:what_if_skills'),
+                                    json.dumps({'changes': changes}), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        before = {self.skills[0].pk: 'medium', self.skills[2].pk: 'low'}
+        after  = {**before, self.skills[0].pk: 'high', self.skills[1].pk: 'medium'}
+        rows = response.json()['positions']
+        self.assertTrue(rows)
+        for row in rows:
+            pos = next(p for p in self.positions if p.pk == row['id'])
+            delta = self._reference_score(pos, after) - self._reference_score(pos, before)
+            self.assertAlmostEqual(row['delta'], round(delta, 1))
+        self.assertEqual(
+            StudentSkill.objects.get(profile=self.profile, skill=self.skills[0]).proficiency, 'medium'
+        )
+
+    def test_career_plan_counts_match_reference_scores(self):
+        from accounts.planner import plan_upgrades
+        from accounts.scoring import student_proficiencies
+
+        current = student_proficiencies(self.profile)
+        plan = plan_upgrades(current, threshold=90, max_cost=4)
+        self.assertLessEqual(plan.total_cost, 4)
+        for st in plan.steps:
+            current[st.skill_id] = st.to_level
+        above = sum(self._reference_score(p, current) >= 90 for p in self.positions)
+        self.assertEqual(plan.final_above, above)
+        self.assertGreater(plan.final_above, plan.initial_above)
+
+        self.client.login(username='scorer', password='correcthorsebatterystaple')
+        self.assertEqual(self.client.get(reverse('accounts:student_plan')).status_code, 200)
+
+    def test_skill_gap_rollups_follow_signals(self):
+        from accounts.models import SkillGapRollup, StudentSkill
+        from accounts.skill_gaps import rebuild_skill_gaps
+
+        def snapshot():
+            return sorted(SkillGapRollup.objects.filter(Q(supply__gt=0) | Q(demand__gt=0))
+                          .values_list('skill_id', 'level', 'supply', 'demand'))
+
+        ss = StudentSkill.objects.get(profile=self.profile, skill=self.skills[0])
+        ss.proficiency = 'high'
+        ss.save()
+        StudentSkill.objects.filter(pk=ss.pk).first().delete()
+        req = self.positions[1].requirements.first()
+        req.level_pct = 40
+        req.save()
+        self.positions[2].status = 'draft'
+        self.positions[2].save()
+        self.positions[0].delete()
+
+        live = snapshot()
+        rebuild_skill_gaps()
+        self.assertEqual(live, snapshot())
+
+        admin = User.objects.create_user(username='boss', password='correcthorsebatterystaple', is_admin=True)
+        self.client.force_login(admin)
+        response = self.client.get(reverse('accounts:admin_dashboard'))
+        self.assertContains(response, 'Biggest Skill Gaps')
+        self.assertContains(response, self.skills[1].name)
+
+    def test_signal_saves_reuse_the_loaded_values(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from accounts.models import SkillGapRollup, StudentSkill
+        from accounts.skill_gaps import rebuild_skill_gaps
+
+        rebuild_skill_gaps()
+        ss  = StudentSkill.objects.get(profile=self.profile, skill=self.skills[0])
+        req = self.positions[1].requirements.select_related('position').first()
+        with CaptureQueriesContext(connection) as ctx:
+            ss.proficiency = 'high'
+            ss.save()
+            ss.save()                                   # unchanged: counters untouched
+            req.level_pct = 100
+            req.save(update_fields=['importance'])      # level not written
+            req.save()
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')
+                   and 'skillgaprollup' not in q['sql']]
+        self.assertEqual(selects, [])
+
+        StudentSkill(pk=ss.pk, profile=self.profile, skill=self.skills[0], proficiency='low').save()
+        live = sorted(SkillGapRollup.objects.exclude(supply=0, demand=0)
+                      .values_list('skill_id', 'level', 'supply', 'demand'))
+        rebuild_skill_gaps()
+        self.assertEqual(live, sorted(SkillGapRollup.objects.exclude(supply=0, demand=0)
+                                      .values_list('skill_id', 'level', 'supply', 'demand')))
+
+
+class CVPDFCacheTests(TestCase):
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_lru_eviction_keeps_recently_used_entries(self):
+        import os
+        import time
+        from accounts.cv_pdf import PDFDiskCache
+
+        cache = PDFDiskCache(self.tmp.name, max_bytes=250)
+        keys  = [cache.key_for(f'<p>{i}</p>') for i in range(3)]
+        cache.set(keys[0], b'a' * 100)
+        cache.set(keys[1], b'b' * 100)
+        past = time.time() - 60
+        os.utime(cache._path(keys[0]), (past, past))
+        os.utime(cache._path(keys[1]), (past - 60, past - 60))
+        self.assertEqual(cache.get(keys[1]), b'b' * 100)   # bumps keys[1]
+        cache.set(keys[2], b'c' * 100)
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+
+    def test_eviction_scans_once_per_tenth_of_the_bound(self):
+        from unittest import mock
+        from accounts.cv_pdf import PDFDiskCache
+
+        cache = PDFDiskCache(self.tmp.name, max_bytes=1000)
+        with mock.patch.object(PDFDiskCache, '_entries', autospec=True,
+                               side_effect=PDFDiskCache._entries) as scan:
+            for i in range(100):
+                cache.set(cache.key_for(str(i)), b'x' * 20)
+        self.assertEqual(scan.call_count, 20)               # 2000 bytes written, a scan per 100
+        self.assertLessEqual(sum(e[1] for e in cache._entries()), 1000)
+
+    def test_unchanged_cv_is_rendered_once(self):
+        from unittest import mock
+        from accounts import cv_pdf
+        from accounts.models import StudentCV, StudentProfile
+
+        user = User.objects.create_user(username='cvcache', password='correcthorsebatterystaple')
+        cv = StudentCV.objects.create(profile=StudentProfile.objects.create(user=user), full_name='Jane')
+        cache = cv_pdf.PDFDiskCache(self.tmp.name, max_bytes=10 ** 7)
+        with mock.patch.object(cv_pdf, 'html_to_pdf', wraps=cv_pdf.html_to_pdf) as render:
+            first  = cv_pdf.render_cv_pdf(cv, cache)
+            second = cv_pdf.render_cv_pdf(cv, cache)
+            cv.full_name = 'Jane Q.'
+            cv.save()
+            cv_pdf.render_cv_pdf(cv, cache)
+        self.assertTrue(first.startswith(b'%PDF-'))
+        self.assertEqual(first, second)
+        self.assertEqual(render.call_count, 2)
+
+    def test_queued_render_job_becomes_downloadable(self):
+        from django.test import override_settings
+        from accounts.cv_jobs import enqueue_cv_render, run_worker
+        from accounts.cv_pdf import prepare_cv
+        from accounts.models import StudentCV, StudentProfile
+
+        user = User.objects.create_user(username='cvjob', password='correcthorsebatterystaple')
+        cv = StudentCV.objects.create(profile=StudentProfile.objects.create(user=user), full_name='Jane')
+        self.client.force_login(user)
+        with override_settings(CV_PDF_CACHE_DIR=self.tmp.name):
+            key, _, _ = prepare_cv(cv)
+            job = enqueue_cv_render(cv, key)
+            self.assertEqual(enqueue_cv_render(cv, key), job)
+            status_url = reverse('accounts:cv_job_status', args=[job.pk])
+            self.assertEqual(self.client.get(status_url, {'format': 'json'}).json()['status'], 'queued')
+
+            self.assertEqual(run_worker(processes=0, once=True), 1)
+            data = self.client.get(status_url, {'format': 'json'}).json()
+            self.assertEqual(data['status'], 'done')
+            response = self.client.get(data['download_url'])
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF-'))
+
+    def test_idle_worker_requeues_jobs_of_crashed_workers(self):
+        import datetime
+        from unittest import mock
+        from django.test import override_settings
+        from django.utils import timezone
+        from accounts.cv_jobs import run_worker
+        from accounts.models import CVRenderJob, StudentCV, StudentProfile
+
+        user = User.objects.create_user(username='cvstale', password='correcthorsebatterystaple')
+        cv = StudentCV.objects.create(profile=StudentProfile.objects.create(user=user), full_name='Jane')
+
+        class Stop(Exception):
+            pass
+
+        def sleep(seconds):
+            if CVRenderJob.objects.exists():
+                raise Stop
+            # another worker claims a job, then dies while rendering it
+            CVRenderJob.objects.create(cv=cv, cache_key='x', status='running',
+                                       started_at=timezone.now() - datetime.timedelta(hours=1))
+
+        with override_settings(CV_PDF_CACHE_DIR=self.tmp.name), \
+                mock.patch('accounts.cv_jobs.time.sleep', sleep), \
+                mock.patch('accounts.cv_jobs.close_old_connections'):
+            with self.assertRaises(Stop):
+                run_worker(processes=0)
+        self.assertEqual(CVRenderJob.objects.get().status, 'done')
+
+    def test_admin_export_streams_zip_of_matched_cvs(self):
+        import zipfile
+        from django.test import override_settings
+        from accounts.cv_export import export_queryset, stream_cv_zip
+        from accounts.matches import refresh_student_matches
+        from accounts.models import StudentCV, StudentProfile, StudentSkill
+        from positions.models import Position, PositionSkillRequirement, Skill
+
+        skill = Skill.objects.create(name='Export skill')
+        pos = Position.objects.create(title='Export', company='Acme', status='posted')
+        PositionSkillRequirement.objects.create(position=pos, skill=skill, level_pct=75, importance=1)
+        for i, level in enumerate(['high', 'low', None]):
+            user = User.objects.create_user(username=f'export{i}', password='correcthorsebatterystaple')
+            profile = StudentProfile.objects.create(user=user)
+            StudentCV.objects.create(profile=profile, full_name=f'Student {i}')
+            if level:
+                StudentSkill.objects.create(profile=profile, skill=skill, proficiency=level)
+            refresh_student_matches(profile)
+
+        with override_settings(CV_PDF_CACHE_DIR=self.tmp.name):
+            archive = io.BytesIO(b''.join(
+                stream_cv_zip(export_queryset(pos, min_score=70), processes=0)
+            ))
+            names = zipfile.ZipFile(archive).namelist()
+            self.assertEqual(len(names), 1)
+            self.assertTrue(names[0].startswith('export0-'))
+
+            admin = User.objects.create_user(username='boss', password='correcthorsebatterystaple', is_admin=True)
+            self.client.force_login(admin)
+            with mock.patch('accounts.views.stream_cv_zip',
+                            side_effect=lambda cvs, engine: stream_cv_zip(cvs, 0, engine)):
+                response = self.client.get(reverse('accounts:admin_cv_export'))
+            self.assertEqual(response['Content-Type'], 'application/zip')
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual(len(archive.namelist()), 3)
+            self.assertTrue(archive.read(archive.namelist()[0]).startswith(b'%PDF-'))
+            self.assertEqual(self.client.get(reverse('accounts:admin_cv_export'),
+                                             {'position': 'x'}).status_code, 400)
+
+    def test_export_lists_crashed_renders_in_errors_txt(self):
+        import zipfile
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+        from django.test import override_settings
+        from accounts.cv_export import export_queryset, stream_cv_zip
+        from accounts.models import StudentCV, StudentProfile
+
+        class DeadPool:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def submit(self, fn, *args):
+                future = Future()
+                future.set_exception(BrokenProcessPool("worker died"))
+                return future
+
+            def shutdown(self, **kwargs):
+                pass
+
+        for i in range(2):
+            user = User.objects.create_user(username=f'crash{i}', password='correcthorsebatterystaple')
+            StudentCV.objects.create(profile=StudentProfile.objects.create(user=user), full_name=f'S {i}')
+        with override_settings(CV_PDF_CACHE_DIR=self.tmp.name), \
+                mock.patch('accounts.cv_export.ProcessPoolExecutor', DeadPool), \
+                self.assertLogs('accounts.cv_export', 'ERROR'):
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_cv_zip(export_queryset(), processes=1))))
+        self.assertEqual(archive.namelist(), ['errors.txt'])
+        self.assertIn(b'crash1-cv-', archive.read('errors.txt'))
+
+    def test_reportlab_engine_renders_cv_and_is_cached_separately(self):
+        from accounts import cv_pdf
+        from accounts.models import CVExperience, CVLanguage, StudentCV, StudentProfile
+
+        user = User.objects.create_user(username='cvreportlab', password='correcthorsebatterystaple')
+        cv = StudentCV.objects.create(profile=StudentProfile.objects.create(user=user), full_name='Jane Roe')
+        CVExperience.objects.create(cv=cv, job_title='Intern', company='Acme', start_date='2020-01-01')
+        CVLanguage.objects.create(cv=cv, language='English', mother_tongue=True)
+
+        cache = cv_pdf.PDFDiskCache(self.tmp.name, max_bytes=10 ** 7)
+        data  = cv_pdf.render_cv_pdf(cv, cache, engine='reportlab')
+        self.assertTrue(data.startswith(b'%PDF-'))
+        self.assertNotEqual(cv_pdf.prepare_cv(cv, 'reportlab')[0], cv_pdf.prepare_cv(cv, 'xhtml2pdf')[0])
+        self.assertEqual(cv_pdf.render_cv_pdf(cv, cache, engine='reportlab'), data)
+
+        with mock.patch.object(cv_pdf.cv_reportlab, 'render', side_effect=ValueError("bad flowable")), \
+                self.assertLogs('accounts.cv_pdf', 'ERROR'):
+            self.assertIsNone(cv_pdf.render_payload('reportlab', {'full_name': 'Jane Roe'}))
+
+    def test_cv_download_returns_503_when_slots_and_queue_are_full(self):
+        from django.test import override_settings
+        from accounts import views
+        from careerpath.concurrency import ConcurrencyLimiter, Overloaded
+
+        limiter = views.cv_job_download_view.limiter
+        user = User.objects.create_user(username='cvbusy', password='correcthorsebatterystaple')
+        self.client.force_login(user)
+        with override_settings(CONCURRENCY_LOCK_DIR=self.tmp.name):
+            hog = ConcurrencyLimiter(limiter.name, limiter.max_concurrent, limiter.max_queue, timeout=0)
+            with mock.patch.object(limiter, 'timeout', 0.05):
+                held = [hog.slot() for _ in range(limiter.max_concurrent)]
+                for ctx in held:
+                    ctx.__enter__()
+                response = self.client.get(reverse('accounts:cv_job_download', args=[1]))
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response['Retry-After'], str(limiter.retry_after))
+                for ctx in held:
+                    ctx.__exit__(None, None, None)
+            self.assertEqual(self.client.get(reverse('accounts:cv_job_download', args=[1])).status_code, 404)
+
+            tight = ConcurrencyLimiter('tight', max_concurrent=1, max_queue=0, timeout=5)
+            with tight.slot():
+                started = time.monotonic()
+                with self.assertRaises(Overloaded):       # queue full: rejected without waiting
+                    with tight.slot():
+                        pass
+                self.assertLess(time.monotonic() - started, 1)
+
+
+class RequestMetricsTests(TestCase):
+    def test_histograms_per_url_name_and_admin_endpoint(self):
+        from careerpath.metrics import registry
+
+        registry.reset()
+        user = User.objects.create_user(username='metrics', password='correcthorsebatterystaple')
+        self.client.force_login(user)
+        self.client.get(reverse('accounts:student_skills'))
+        snapshot = registry.snapshot()
+        bounds, counts, total, count = snapshot[('accounts:student_skills', 'sql_queries')]
+        self.assertEqual(count, 1)
+        self.assertGreater(total, 0)
+        self.assertGreater(snapshot[('accounts:student_skills', 'template_duration')][2], 0)
+        self.assertGreater(snapshot[('accounts:student_skills', 'response_size')][2], 0)
+
+        self.assertEqual(self.client.get(reverse('accounts:admin_metrics')).status_code, 403)
+        admin = User.objects.create_user(username='boss', password='correcthorsebatterystaple', is_admin=True)
+        self.client.force_login(admin)
+        body = self.client.get(reverse('accounts:admin_metrics')).content.decode()
+        self.assertIn('# TYPE careerpath_request_duration_seconds histogram', body)
+        self.assertIn('careerpath_sql_queries_count{view="accounts:student_skills"', body)
+
+    def test_jsonl_writer_flushes_in_background(self):
+        import tempfile
+        from careerpath.metrics import JSONLWriter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/requests.jsonl"
+            writer = JSONLWriter(path, flush_interval=0.01)
+            for i in range(3):
+                writer.write({'view': 'x', 'i': i})
+            writer.close()
+            with open(path) as fh:
+                self.assertEqual([json.loads(line)['i'] for line in fh], [0, 1, 2])
+
+
+class RequestProfilingTests(TestCase):
+    def test_admin_switch_and_issued_token_profile_one_request(self):
+        import tempfile
+        from django.test import override_settings
+        from careerpath import profiling
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        student = User.objects.create_user(username='slowpoke', password='correcthorsebatterystaple')
+        admin = User.objects.create_user(username='boss', password='correcthorsebatterystaple', is_admin=True)
+        with override_settings(REQUEST_PROFILE_DIR=tmp.name):
+            self.client.force_login(student)
+            url = reverse('accounts:student_skills')
+            self.assertNotIn('X-Profile-Id', self.client.get(url, {'_profile': '1'}))
+            self.assertNotIn('X-Profile-Id', self.client.get(url))
+
+            token = profiling.issue_token(admin)
+            response = self.client.get(url, HTTP_X_PROFILE=token)
+            profile_id = response['X-Profile-Id']
+
+            self.client.force_login(admin)
+            listing = self.client.get(reverse('accounts:admin_profiles'))
+            self.assertContains(listing, 'accounts:student_skills')
+            detail = self.client.get(reverse('accounts:admin_profile_detail', args=[profile_id]))
+            self.assertContains(detail, 'my_skills_view')
+            self.assertContains(detail, 'SELECT')
+            self.assertIn('X-Profile-Id', self.client.get(reverse('accounts:admin_dashboard'), {'_profile': '1'}))
+
+
+def seed_budget_dataset(positions=12, skills=10, saved=6):
+    """
+    A student with many skills, saved positions and a CV, plus an admin and
+    a catalogue of tagged posted positions, so per-row query patterns show
+    up as repeated queries.
+    """
+    from types import SimpleNamespace
+    from accounts.matches import compute_top_matches, rebuild_all_matches
+    from accounts.models import (
+        CVExperience, CVLanguage, SavedPosition, StudentCV, StudentProfile, StudentSkill,
+    )
+    from positions.models import Position, PositionSkillRequirement, Skill, Tag
+
+    student = User.objects.create_user(username='budget', password='correcthorsebatterystaple')
+    admin   = User.objects.create_user(username='budgetboss', password='correcthorsebatterystaple', is_admin=True)
+    profile = StudentProfile.objects.create(user=student)
+    skill_objs = [Skill.objects.create(name=f'Budget skill {i}', category='coding') for i in range(skills)]
+    tags = [Tag.objects.create(name=f'Budget tag {i}') for i in range(3)]
+    pos_objs = []
+    for i in range(positions):
+        pos = Position.objects.create(title=f'Budget {i}', company=f'Co {i % 4}', status='posted')
+        pos.tags.set(tags[: 1 + i % 3])
+        for j in range(3):
+            PositionSkillRequirement.objects.create(
+                position=pos, skill=skill_objs[(i + j) % skills], level_pct=(40, 75, 100)[j], importance=j + 1,
+            )
+        pos_objs.append(pos)
+    for i, skill in enumerate(skill_objs[: skills - 2]):
+        StudentSkill.objects.create(profile=profile, skill=skill, proficiency=('low', 'medium', 'high')[i % 3])
+    for pos in pos_objs[:saved]:
+        SavedPosition.objects.create(profile=profile, position=pos)
+    cv = StudentCV.objects.create(profile=profile, full_name='Budget Student')
+    for i in range(4):
+        CVExperience.objects.create(cv=cv, job_title=f'Job {i}', start_date=datetime.date(2018 + i, 1, 1))
+        CVLanguage.objects.create(cv=cv, language=f'Language {i}')
+    rebuild_all_matches()
+    compute_top_matches(workers=0)
+    return SimpleNamespace(student=student, admin=admin, profile=profile, positions=pos_objs)
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, DerivedDataTestMixin, TestCase):
+    def setUp(self):
+        self.data = seed_budget_dataset()
+
+    def test_student_views_stay_within_budget(self):
+        pos = self.data.positions[0]
+        self.client.force_login(self.data.student)
+        for url in [
+            reverse('accounts:student_dashboard'),
+            reverse('accounts:student_plan'),
+            reverse('accounts:student_cv'),
+            reverse('accounts:student_positions'),
+            reverse('accounts:student_position_detail', args=[pos.pk]),
+            reverse('accounts:student_saved_positions'),
+            reverse('accounts:student_saved_positions') + '?sort=score',
+            reverse('accounts:student_skills'),
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.assertWithinBudget(url).status_code, 200)
+
+    def test_admin_views_stay_within_budget(self):
+        pos = self.data.positions[0]
+        self.client.force_login(self.data.admin)
+        for url in [
+            reverse('accounts:admin_dashboard'),
+            reverse('accounts:admin_matches'),
+            reverse('accounts:admin_matches') + '?view=students',
+            reverse('positions:list'),
+            reverse('positions:new'),
+            reverse('positions:edit', args=[pos.pk]),
+            reverse('positions:new_skills', args=[pos.pk]),
+            reverse('positions:new_review', args=[pos.pk]),
+            reverse('positions:talent', args=[pos.pk]),
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.assertWithinBudget(url).status_code, 200)
+
+    def test_cv_save_and_download_stays_within_budget(self):
+        import tempfile
+        from accounts.models import CVRenderJob
+
+        url = reverse('accounts:student_cv')
+        self.client.force_login(self.data.student)
+        page = self.client.get(url)
+        data = {'action': 'download'}
+        for name in ('cv_form', 'exp_formset', 'lang_formset'):
+            forms = page.context[name]
+            if name != 'cv_form':
+                data.update({f'{forms.management_form.prefix}-{k}': v
+                             for k, v in forms.management_form.initial.items()})
+                forms = forms.forms
+            else:
+                forms = [forms]
+            for form in forms:
+                data.update({form.add_prefix(f): form[f].value() for f in form.fields
+                             if form[f].value() not in (None, False)})
+        data.update({f'lang-{i}-language': 'English' for i in range(4)})
+        with tempfile.TemporaryDirectory() as tmp, self.settings(CV_PDF_CACHE_DIR=tmp):
+            response = self.assertWithinBudget(url, method='post', data=data)
+        self.assertRedirects(response, reverse('accounts:cv_job_status',
+                                               args=[CVRenderJob.objects.get().pk]),
+                             fetch_redirect_response=False)
+
+    def test_skill_diff_applies_in_constant_queries(self):
+        from accounts.models import StudentSkill
+        from accounts.scoring import student_proficiencies
+        from positions.models import Skill
+
+        extra = [Skill.objects.create(name=f'Extra skill {i}') for i in range(50)]
+        held  = list(StudentSkill.objects.filter(profile=self.data.profile).order_by('pk'))
+        diff  = {
+            'add':    {str(s.pk): 'high' for s in extra[:40]},
+            'update': {str(sk.pk): 'high' if sk.proficiency != 'high' else 'low' for sk in held[:4]},
+            'delete': [sk.pk for sk in held[4:]],
+        }
+        self.client.force_login(self.data.student)
+        response = self.assertWithinBudget(reverse('accounts:edit_skills'), method='post',
+                                           data=json.dumps(diff), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['changed'], 40 + 4 + len(held) - 4)
+        self.assertEqual(len(response.json()['skills']), 44)
+
+        prof = student_proficiencies(self.data.profile)
+        self.assertTrue(all(prof[s.pk] == 'high' for s in extra[:40]))
+        self.assertTrue(all(sk.skill_id not in prof for sk in held[4:]))
+        self.assertDerivedDataCurrent([self.data.profile])
+
+    def test_invalid_skill_diff_changes_nothing(self):
+        from accounts.models import StudentSkill
+
+        before = list(StudentSkill.objects.values_list('pk', 'skill_id', 'proficiency').order_by('pk'))
+        self.client.force_login(self.data.student)
+        for diff in [{'add': {'999999': 'high'}}, {'update': {str(before[0][0]): 'expert'}},
+                     {'delete': [before[0][0]], 'add': {'999999': 'low'}}]:
+            response = self.client.post(reverse('accounts:edit_skills'), json.dumps(diff),
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(StudentSkill.objects.values_list('pk', 'skill_id', 'proficiency').order_by('pk')),
+                         before)
+
+    def test_repeated_query_shapes_are_reported(self):
+        from careerpath.querybudget import check, query_shape
+
+        self.assertEqual(
+            query_shape('SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = \'x\''),
+            query_shape('SELECT * FROM t WHERE id IN (%s) AND name = \'y\''),
+        )
+        sqls = ['SELECT * FROM positions_skill WHERE id = %s'] * 5 + ['SELECT 1']
+        problems = check('view', 3, sqls, limit=5)
+        self.assertEqual(len(problems), 2)
+        self.assertIn('budget is 3', problems[0])
+        self.assertIn('N+1', problems[1])
+
+    def test_saved_position_match_score_uses_stored_score(self):
+        from accounts.models import SavedPosition, StudentPositionMatch
+
+        for sp in SavedPosition.objects.filter(profile=self.data.profile):
+            stored = StudentPositionMatch.objects.filter(
+                profile=self.data.profile, position=sp.position,
+            ).values_list('score', flat=True).first() or 0.0
+            self.assertAlmostEqual(sp.match_score, stored)
+
+
+class SyntheticDataTests(TestCase):
+    def _snapshot(self):
+        from accounts.models import StudentSkill
+
+        return sorted(StudentSkill.objects.values_list(
+            'profile__user__username', 'skill__name', 'proficiency'
+        ))
+
+    def test_generate_is_seeded_and_rebuilds_derived_tables(self):
+        from accounts.models import SkillGapRollup, StudentPositionMatch, StudentCV
+        from accounts.synthetic import TAG, generate, purge, rebuild_derived
+        from positions.models import Position
+
+        counts = generate(students=40, positions=15, skills=30, seed=7, batch_size=16)
+        rebuild_derived(workers=0)
+        self.assertEqual(counts['User'], 40)
+        self.assertEqual(Position.objects.filter(tags__name=TAG).count(), 15)
+        self.assertEqual(StudentCV.objects.count(), counts['StudentCV'])
+        self.assertTrue(StudentPositionMatch.objects.exists())
+        self.assertTrue(SkillGapRollup.objects.exists())
+
+        first = self._snapshot()
+        purge()
+        self.assertFalse(User.objects.filter(username__startswith='synth').exists())
+        self.assertFalse(Position.objects.filter(tags__name=TAG).exists())
+        generate(students=40, positions=15, skills=30, seed=7, batch_size=16)
+        self.assertEqual(self._snapshot(), first)
+
+    def test_command_refuses_to_mix_with_existing_synthetic_data(self):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        out = io.StringIO()
+        call_command('generate_synthetic_data', students=5, positions=3, skills=10,
+                     workers=0, stdout=out)
+        self.assertIn('5 User', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('generate_synthetic_data', students=5, positions=3, skills=10,
+                         workers=0, stdout=out)
+        call_command('generate_synthetic_data', students=5, positions=3, skills=10,
+                     workers=0, replace=True, stdout=out)
+        self.assertEqual(User.objects.filter(username__startswith='synth').count(), 5)
+
+
+class BenchmarkTests(TestCase):
+    def test_cases_run_on_a_tiny_dataset(self):
+        from benchmarks import cases, runner
+
+        cases.ensure_dataset('tiny')
+        results = runner.run(cases.build(cases.fixture()), repeat=1)
+        self.assertIn('pdf.pisa_create_pdf', results)
+        self.assertTrue(all(r['median_ms'] > 0 and r['peak_kib'] > 0 for r in results.values()))
+
+    def test_compare_flags_slowdowns_and_memory_growth(self):
+        from benchmarks.runner import compare
+
+        baseline = {'a': {'median_ms': 10.0, 'peak_kib': 100.0},
+                    'b': {'median_ms': 10.0, 'peak_kib': 100.0}}
+        results  = {'a': {'median_ms': 11.0, 'peak_kib': 300.0},
+                    'b': {'median_ms': 20.0, 'peak_kib': 100.0},
+                    'new': {'median_ms': 1.0, 'peak_kib': 1.0}}
+        self.assertEqual(
+            [(name, metric) for name, metric, _, _ in compare(baseline, results, threshold=0.25)],
+            [('a', 'peak_kib'), ('b', 'median_ms')],
+        )
+
+    def test_load_test_journeys_complete_without_errors(self):
+        import random
+        from accounts.synthetic import PASSWORD, PREFIX, generate
+        from benchmarks.loadtest import JOURNEYS, VirtualUser, summarize
+        from positions.models import Position
+
+        generate(students=5, positions=10, skills=20, seed=3, cv_ratio=1.0)
+        user = User.objects.filter(username__startswith=PREFIX).first()
+        posted = list(Position.objects.filter(status='posted').values_list('pk', flat=True))
+        samples = []
+        vu = VirtualUser(user, posted, samples, random.Random(0))
+        for name, (_, steps) in JOURNEYS.items():
+            self.assertTrue(vu.login(PASSWORD))
+            steps(vu)
+        self.assertEqual([s for s in samples if s[2]], [])
+        report = summarize(samples, elapsed=1.0)
+        self.assertEqual(report['total']['requests'], len(samples))
+        self.assertEqual(report['student_login']['requests'], len(JOURNEYS))
+
+
+class SQLiteBackendTests(TestCase):
+    def test_connections_apply_the_tuned_pragmas(self):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)       # NORMAL
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_retry_locked_retries_only_lock_errors(self):
+        from django.db import OperationalError
+        from careerpath.sqlite.base import retry_locked
+
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError("database is locked")
+            return 'ok'
+
+        self.assertEqual(retry_locked(flaky, retries=5, backoff=0), 'ok')
+        self.assertEqual(len(calls), 3)
+        with self.assertRaises(OperationalError):
+            retry_locked(mock.Mock(side_effect=OperationalError("no such table: x")), retries=5, backoff=0)
+
+
+class ReadReplicaTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='correcthorsebatterystaple',
+        )
+        self.client.login(username='reader', password='correcthorsebatterystaple')
+
+    def test_refresh_snapshot_copies_the_database_and_records_its_time(self):
+        import os
+        import sqlite3
+        import tempfile
+        from careerpath.replica import refresh_snapshot
+
+        with tempfile.TemporaryDirectory() as tmp:
+            source, target = os.path.join(tmp, 'primary.sqlite3'), os.path.join(tmp, 'replica.sqlite3')
+            conn = sqlite3.connect(source)
+            conn.execute("CREATE TABLE t (x)")
+            conn.execute("INSERT INTO t VALUES (1), (2)")
+            conn.commit()
+            conn.close()
+
+            before   = time.time()
+            taken_at = refresh_snapshot(source, target)
+            self.assertGreaterEqual(taken_at, before)
+            with open(target + '.snapshot', encoding='utf-8') as fh:
+                self.assertEqual(json.load(fh)['taken_at'], taken_at)
+            conn = sqlite3.connect(target)
+            self.assertEqual(conn.execute("SELECT count(*) FROM t").fetchone()[0], 2)
+            conn.close()
+
+    def test_replica_used_only_when_fresh_and_newer_than_the_last_write(self):
+        from careerpath import replica
+
+        now = time.time()
+        with mock.patch.object(replica, 'snapshot_time', return_value=now - 10):
+            self.assertTrue(replica.replica_usable(None, now))
+            self.assertTrue(replica.replica_usable(now - 20, now))
+            self.assertFalse(replica.replica_usable(now - 5, now))      # pinned: wrote after the snapshot
+        with mock.patch.object(replica, 'snapshot_time', return_value=now - 10_000):
+            self.assertFalse(replica.replica_usable(None, now))         # too stale
+        with mock.patch.object(replica, 'snapshot_time', return_value=None):
+            self.assertFalse(replica.replica_usable(None, now))
+
+    def test_router_sends_opted_in_reads_to_the_replica(self):
+        from django.contrib.sessions.models import Session
+        from django.urls import resolve
+        from careerpath import replica
+        from positions.models import Position
+
+        router = replica.ReplicaRouter()
+        self.assertTrue(replica._opted_in(resolve(reverse('accounts:student_positions')).func))
+        self.assertFalse(replica._opted_in(resolve(reverse('accounts:student_cv')).func))
+        with mock.patch.object(replica, 'replica_usable', return_value=True), replica.use_replica():
+            self.assertEqual(router.db_for_read(Position), 'replica')
+            self.assertEqual(router.db_for_read(Session), 'default')
+            self.assertEqual(router.db_for_write(Position), 'default')
+            with replica.use_primary():
+                self.assertEqual(router.db_for_read(Position), 'default')
+        self.assertEqual(router.db_for_read(Position), 'default')
+
+    def test_request_user_is_loaded_from_the_primary(self):
+        from django.test import RequestFactory
+        from django.urls import resolve
+        from django.utils.functional import SimpleLazyObject
+        from careerpath import replica
+
+        aliases = []
+        request = RequestFactory().get(reverse('accounts:student_positions'))
+        request.user = SimpleLazyObject(lambda: aliases.append(replica._read_alias.get()) or self.user)
+        middleware = replica.ReplicaMiddleware(lambda r: None)
+        try:
+            with mock.patch.object(replica, 'replica_usable', return_value=True):
+                middleware.process_view(request, resolve(request.path).func, (), {})
+            self.assertEqual(aliases, [None])
+            self.assertEqual(replica._read_alias.get(), 'replica')
+        finally:
+            replica._read_alias.set(None)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        from positions.models import Position
+
+        pos = Position.objects.create(title='P', company='Acme', status='posted')
+        response = self.client.post(reverse('accounts:toggle_save_position'), {'position_id': pos.pk})
+        self.assertIn('db_pin', response.cookies)
+        response = self.client.get(reverse('accounts:student_saved_positions'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Replica-Lag', response)
@@ -0,0 +1,61 @@
+# accounts/topk.py
+"""
+Pure-NumPy helpers for the all-pairs top-K match job.
+
+Nothing in here imports Django, so the functions can run inside
+ProcessPoolExecutor workers on any start method (fork or spawn) without
+calling django.setup(). The requirement matrix is shipped to each worker
+once through ``init_worker``; each task then only carries one chunk of
+students encoded as (row, column) pairs of their one-hot vectors.
+"""
+import numpy as np
+
+_contributions_t = None   # (skills × levels, positions), set per worker
+
+
+def init_worker(contributions_t):
+    global _contributions_t
+    _contributions_t = contributions_t
+
+
+def _top_k(scores, k, axis):
+    """Indices of the k largest entries along ``axis``, best first."""
+    k = min(k, scores.shape[axis])
+    idx = np.argpartition(-scores, k - 1, axis=axis).take(range(k), axis=axis)
+    top = np.take_along_axis(scores, idx, axis=axis)
+    order = np.argsort(-top, axis=axis, kind='stable')
+    return np.take_along_axis(idx, order, axis=axis)
+
+
+def score_chunk(profile_ids, rows, cols, k):
+    """
+    Score one chunk of students against every position.
+
+    ``profile_ids[i]`` is the student of local row ``i``; ``rows``/``cols``
+    are the non-zero coordinates of the chunk's one-hot matrix. Returns
+
+    * ``student_top``: (n, k) position indices and scores, best first
+    * ``position_top``: (k, P) profile ids and scores, best first, to be
+      merged across chunks with ``merge_position_top``.
+    """
+    n = len(profile_ids)
+    x = np.zeros((n, _contributions_t.shape[0]))
+    x[rows, cols] = 1.0
+    scores = x @ _contributions_t                       # (n, P)
+
+    s_idx = _top_k(scores, k, axis=1)
+    student_top = (s_idx, np.take_along_axis(scores, s_idx, axis=1))
+
+    p_idx = _top_k(scores, k, axis=0)
+    position_top = (profile_ids[p_idx], np.take_along_axis(scores, p_idx, axis=0))
+    return profile_ids, student_top, position_top
+
+
+def merge_position_top(best, chunk, k):
+    """Keep the k best (profile_id, score) candidates per position column."""
+    if best is None:
+        return chunk
+    ids    = np.concatenate([best[0], chunk[0]], axis=0)
+    scores = np.concatenate([best[1], chunk[1]], axis=0)
+    idx = _top_k(scores, k, axis=0)
+    return np.take_along_axis(ids, idx, axis=0), np.take_along_axis(scores, idx, axis=0)
@@ -10,6 +10,10 @@ urlpatterns = [
     path('admin/logout/',    views.admin_logout_view,     name='admin_logout'),
     path('admin/dashboard/', views.admin_dashboard,      name='admin_dashboard'),
     path('admin/matches/',   views.admin_view_matches,    name='admin_matches'),
+    path('admin/cv-export/', views.admin_cv_export_view,  name='admin_cv_export'),
+    path('admin/metrics/',   views.admin_metrics_view,    name='admin_metrics'),
+    path('admin/profiles/',  views.admin_profiles_view,   name='admin_profiles'),
+    path('admin/profiles/<str:profile_id>/', views.admin_profile_detail_view, name='admin_profile_detail'),
 
     # Student auth
     path('register/', views.student_register_view, name='student_register'),
@@ -18,7 +22,10 @@ urlpatterns = [
 
     # Dashboard & CV (GET shows form; POST returns PDF OR saves)
     path('dashboard/', views.student_dashboard, name='student_dashboard'),
+    path('plan/',      views.career_plan_view,  name='student_plan'),
     path('cv/',        views.student_cv_view,    name='student_cv'),
+    path('cv/jobs/<int:pk>/',          views.cv_job_status_view,   name='cv_job_status'),
+    path('cv/jobs/<int:pk>/download/', views.cv_job_download_view, name='cv_job_download'),
 
     # Positions
     path('positions/',             views.browse_positions_view,   name='student_positions'),
@@ -32,4 +39,6 @@ urlpatterns = [
     path('skills/update/',    views.update_skill_view,    name='update_skill'),
     path('skills/delete/',    views.delete_skill_view,    name='delete_skill'),
     path('skills/bulk-save/', views.bulk_save_skills,     name='bulk_save_skills'),
+    path('skills/edit/',      views.edit_skills_view,     name='edit_skills'),
+    path('skills/what-if/',   views.what_if_skills_view,  name='what_if_skills'),
 ]
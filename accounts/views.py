@@ -1,22 +1,28 @@
 # accounts/views.py
-import io
-from types import SimpleNamespace
+import datetime
+import json
+import numpy as np
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Max, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_POST
-from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseServerError
-from xhtml2pdf import pisa
-from django.template.loader import render_to_string
-from django.conf import settings
+from django.http import Http404, JsonResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.core import signing
+from django.core.paginator import Paginator
 from django.urls import reverse
+from careerpath.concurrency import limit_concurrency
+from careerpath import profiling, replica
+from careerpath.metrics import render_prometheus
+from careerpath.querybudget import query_budget
+from careerpath.replica import read_replica
 from .models import (
-    User, StudentProfile, StudentSkill, SavedPosition,
-    StudentCV, CVExperience, CVLanguage
+    User, StudentProfile, StudentSkill, SavedPosition, StudentPositionMatch, TopMatch,
+    StudentCV, CVExperience, CVLanguage, CVRenderJob
 )
 from .forms import (
     StudentRegistrationForm,
@@ -24,7 +30,15 @@ from .forms import (
     CVExperienceFormSet, CVLanguageFormSet
 )
 from .decorators import admin_required
-from positions.models import Position, Skill, PositionSkillRequirement
+from .scoring import RequirementMatrix, PROFICIENCY_PCT, get_skill_index, student_proficiencies
+from .matches import refresh_student_matches
+from .planner import plan_upgrades
+from .skill_gaps import catalogue_gaps
+from .skill_edits import SkillDiffError, apply_skill_diff, parse_skill_diff
+from .cv_pdf import ENGINES, get_pdf_cache, prepare_cv
+from .cv_jobs import enqueue_cv_render
+from .cv_export import export_queryset, stream_cv_zip
+from positions.models import Position, Skill, Tag, PositionSkillRequirement
 
 # ---------- (existing admin/student auth views) ----------
 @never_cache
@@ -53,13 +67,100 @@ def admin_logout_view(request):
 
 
 @admin_required
+@query_budget(7)
+@read_replica
 def admin_dashboard(request):
-    return render(request, 'accounts/admin_dashboard.html')
+    return render(request, 'accounts/admin_dashboard.html', {
+        'skill_gaps': catalogue_gaps(),
+    })
+
+
+@admin_required
+def admin_cv_export_view(request):
+    """
+    ZIP of student CV PDFs, streamed while a process pool renders them:
+    every CV, or with ``?position=<pk>`` the students matching it at
+    ``?min_score=`` % (default 70) or more. ``?engine=`` overrides
+    CV_PDF_ENGINE.
+    """
+    position = None
+    if request.GET.get('position'):
+        if not request.GET['position'].isdigit():
+            return HttpResponseBadRequest("position must be a position id.")
+        position = get_object_or_404(Position, pk=request.GET['position'])
+    try:
+        min_score = max(0.0, min(100.0, float(request.GET.get('min_score', 70))))
+    except ValueError:
+        min_score = 70.0
+    engine = request.GET.get('engine') if request.GET.get('engine') in ENGINES else None
+
+    filename = f"cvs-position-{position.pk}.zip" if position else "cvs-all.zip"
+    response = StreamingHttpResponse(
+        stream_cv_zip(export_queryset(position, min_score), engine=engine),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@admin_required
+@never_cache
+def admin_metrics_view(request):
+    """Request metrics histograms in Prometheus text format."""
+    return HttpResponse(render_prometheus() + replica.render_prometheus(),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 @admin_required
+@never_cache
+def admin_profiles_view(request):
+    """
+    Recent request profiles, plus a token that turns on profiling for
+    someone else's session (``?_profile=<token>`` or ``X-Profile: <token>``).
+    """
+    return render(request, 'accounts/admin_profiles.html', {
+        'profiles': profiling.list_profiles(),
+        'token':    profiling.issue_token(request.user),
+        'param':    profiling.PARAM,
+    })
+
+
+@admin_required
+@never_cache
+def admin_profile_detail_view(request, profile_id):
+    profile = profiling.load_profile(profile_id)
+    if profile is None:
+        raise Http404("No such profile.")
+    return render(request, 'accounts/admin_profile_detail.html', {'profile': profile})
+
+
+@admin_required
+@query_budget(9)
+@read_replica
 def admin_view_matches(request):
-    return render(request, 'accounts/admin_matches.html')
+    """
+    Top-K students per posted position (or top-K positions per student) as
+    precomputed by ``manage.py compute_top_matches``.
+    """
+    mode = 'students' if request.GET.get('view') == 'students' else 'positions'
+    if mode == 'students':
+        ranked = (TopMatch.objects.filter(student_rank__isnull=False)
+                  .select_related('position').order_by('student_rank'))
+        qs = (StudentProfile.objects
+              .filter(top_matches__student_rank__isnull=False).distinct()
+              .select_related('user').order_by('user__username')
+              .prefetch_related(Prefetch('top_matches', queryset=ranked, to_attr='ranked')))
+    else:
+        ranked = (TopMatch.objects.filter(position_rank__isnull=False)
+                  .select_related('profile__user').order_by('position_rank'))
+        qs = (Position.objects.filter(status='posted').order_by('-created_at')
+              .prefetch_related(Prefetch('top_matches', queryset=ranked, to_attr='ranked')))
+
+    return render(request, 'accounts/admin_matches.html', {
+        'mode':        mode,
+        'page_obj':    Paginator(qs, 20).get_page(request.GET.get('page')),
+        'computed_at': TopMatch.objects.aggregate(at=Max('computed_at'))['at'],
+    })
 
 
 # Student auth
@@ -100,34 +201,61 @@ def student_logout_view(request):
 
 # Student Dashboard
 @login_required(login_url='accounts:student_login')
+@query_budget(5)
 def student_dashboard(request):
     return render(request, 'accounts/student_dashboard.html')
 
 
-# ---------------- CV view (persistent + PDF export) -------------------------
-
-def _link_callback(uri, rel):
+@login_required(login_url='accounts:student_login')
+@query_budget(10)
+@read_replica
+def career_plan_view(request):
     """
-    Resolve static/media URIs for xhtml2pdf.
+    Career optimizer: smallest set of skill upgrades that lifts the most
+    posted positions to the chosen match threshold.
     """
-    import os
-    from django.conf import settings
-    s_root = settings.STATIC_ROOT or settings.STATICFILES_DIRS[0] if getattr(settings, 'STATICFILES_DIRS', None) else None
-    m_root = settings.MEDIA_ROOT
-
-    if uri.startswith(settings.MEDIA_URL):
-        path = os.path.join(m_root, uri.replace(settings.MEDIA_URL, ""))
-    elif uri.startswith(settings.STATIC_URL):
-        path = os.path.join(s_root, uri.replace(settings.STATIC_URL, ""))
-    else:
-        path = uri
+    try:
+        threshold = max(1.0, min(100.0, float(request.GET.get('threshold', 70))))
+        max_cost  = max(1, min(12, int(request.GET.get('steps', 6))))
+    except ValueError:
+        threshold, max_cost = 70.0, 6
+
+    profile, _ = StudentProfile.objects.get_or_create(user=request.user)
+    plan       = plan_upgrades(student_proficiencies(profile), threshold, max_cost)
+
+    skills    = Skill.objects.in_bulk([st.skill_id for st in plan.steps])
+    positions = Position.objects.in_bulk([pid for st in plan.steps for pid in st.newly_above])
+    for st in plan.steps:
+        st.skill     = skills.get(st.skill_id)
+        st.positions = [positions[pid] for pid in st.newly_above if pid in positions]
+
+    return render(request, 'accounts/student_plan.html', {
+        'plan':      plan,
+        'threshold': threshold,
+        'max_cost':  max_cost,
+    })
+
+
+# ---------------- CV view (persistent + PDF export) -------------------------
+
+def _cv_pdf_response(request, data):
+    filename = f"cv-{request.user.username}.pdf"
+    response = HttpResponse(data, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
-    if not os.path.exists(path):
-        return uri  # fallback to original
-    return path
+
+# "Save & Download" POSTs and PDF downloads share one host-wide limit.
+CV_DOWNLOAD_CONCURRENCY = 4
+CV_DOWNLOAD_QUEUE       = 16
+CV_DOWNLOAD_TIMEOUT     = 10.0
 
 
 @login_required(login_url='accounts:student_login')
+@limit_concurrency('cv-download', CV_DOWNLOAD_CONCURRENCY, CV_DOWNLOAD_QUEUE,
+                   CV_DOWNLOAD_TIMEOUT, methods=('POST',))
+# GET: a first visit creates the profile and CV; POST: formsets look up each row's pk
+@query_budget({'GET': 12, 'POST': 27})
 def student_cv_view(request):
     """
     - GET: show the CV form prefilled from StudentCV if present.
@@ -173,24 +301,14 @@ def student_cv_view(request):
                 obj.cv = cv
                 obj.save()
 
-            # If user clicked download, build PDF
+            # If user clicked download, serve the cached PDF or queue a render
             if action == 'download':
-                # render pdf template
-                html = render_to_string('accounts/student_cv_pdf.html', {
-                    'cv': cv,
-                    'experience': cv.experiences.all(),
-                    'languages': cv.languages.all(),
-                })
-                out = io.BytesIO()
-                # create pdf
-                pdf = pisa.CreatePDF(io.BytesIO(html.encode('utf-8')), dest=out, link_callback=_link_callback)
-                if pdf.err:
-                    return HttpResponseServerError("Error creating PDF.")
-                out.seek(0)
-                filename = f"cv-{request.user.username}.pdf"
-                response = HttpResponse(out.read(), content_type='application/pdf')
-                response['Content-Disposition'] = f'attachment; filename="{filename}"'
-                return response
+                key, _, _ = prepare_cv(cv)
+                data = get_pdf_cache().get(key)
+                if data is not None:
+                    return _cv_pdf_response(request, data)
+                job = enqueue_cv_render(cv, key)
+                return redirect('accounts:cv_job_status', pk=job.pk)
 
             # Otherwise just save and redirect (standard Post/Redirect/Get)
             return redirect('accounts:student_cv')
@@ -226,31 +344,146 @@ def student_cv_view(request):
         })
 
 
+
+@never_cache
+@login_required(login_url='accounts:student_login')
+def cv_job_status_view(request, pk):
+    """
+    Progress of a queued CV render. HTML page that polls itself, or JSON
+    with ``?format=json``: {"status", "download_url", "error"}.
+    """
+    job = get_object_or_404(CVRenderJob, pk=pk, cv__profile__user=request.user)
+    download_url = reverse('accounts:cv_job_download', args=[job.pk]) if job.status == 'done' else None
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'status':       job.status,
+            'download_url': download_url,
+            'error':        job.error,
+        })
+    return render(request, 'accounts/student_cv_job.html', {
+        'job':          job,
+        'download_url': download_url,
+    })
+
+
+@login_required(login_url='accounts:student_login')
+@limit_concurrency('cv-download', CV_DOWNLOAD_CONCURRENCY, CV_DOWNLOAD_QUEUE, CV_DOWNLOAD_TIMEOUT)
+def cv_job_download_view(request, pk):
+    job = get_object_or_404(CVRenderJob, pk=pk, cv__profile__user=request.user)
+    if job.status == 'done':
+        data = get_pdf_cache().get(job.cache_key)
+        if data is not None:
+            return _cv_pdf_response(request, data)
+        # evicted since it was rendered: render it again
+        job = enqueue_cv_render(job.cv, job.cache_key)
+    return redirect('accounts:cv_job_status', pk=job.pk)
+
+
 # ---------- Browse & matching (existing code) ----------
+BROWSE_TOP_N     = 6
+BROWSE_PAGE_SIZE = 24
+BROWSE_STATUSES  = ('posted', 'retracted')     # stored scores cover posted positions only
+
+# sort key -> (ORDER BY fields, keyset field, descending?)
+BROWSE_SORTS = {
+    'score':   (('-match_score', '-id'), 'match_score', True),
+    'created': (('-created_at', '-id'),  'created_at',  True),
+    'company': (('company', 'id'),       'company',     False),
+}
+
+
+def _browse_cursor_filter(sort, cursor):
+    """
+    Keyset condition for the page after ``cursor`` (a signed
+    ``[sort value, id]`` pair); None if the cursor is missing or invalid.
+    """
+    try:
+        value, last_id = signing.loads(cursor, salt='browse-positions')
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    _, field, desc = BROWSE_SORTS[sort]
+    if field == 'created_at':
+        value = datetime.datetime.fromisoformat(value)
+    op = 'lt' if desc else 'gt'
+    return Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': last_id})
+
+
+def _browse_cursor(sort, pos):
+    _, field, _ = BROWSE_SORTS[sort]
+    value = getattr(pos, field)
+    if field == 'created_at':
+        value = value.isoformat()
+    return signing.dumps([value, pos.pk], salt='browse-positions')
+
+
 @login_required(login_url='accounts:student_login')
+@query_budget(12)
+@read_replica
 def browse_positions_view(request):
+    """
+    Keyset-paginated browse. Scores of posted positions come from the
+    materialised StudentPositionMatch table, so sorting by score is a plain
+    ORDER BY and only the rows on the current page are read. Retracted
+    positions have no stored scores: their page is scored on the fly and
+    cannot be sorted by score.
+    """
     profile, _  = StudentProfile.objects.get_or_create(user=request.user)
     saved_ids   = set(profile.saved_positions.values_list('position_id', flat=True))
-    student_map = { ss.skill_id: ss.proficiency for ss in profile.student_skills.all() }
-
-    positions = []
-    for pos in Position.objects.all().order_by('-created_at'):
-        reqs      = PositionSkillRequirement.objects.filter(position=pos)
-        total_imp = sum(r.importance for r in reqs) or 1
-        score     = 0.0
-        for r in reqs:
-            weight = r.importance / total_imp * 100
-            sp     = student_map.get(r.skill_id)
-            if sp:
-                num   = {'low':40,'medium':75,'high':100}[sp]
-                ratio = num / r.level_pct
-                score += weight * min(ratio, 1.0)
-        pos.match_score = f"{score:.1f}"
-        positions.append(pos)
+
+    sort   = request.GET.get('sort') if request.GET.get('sort') in BROWSE_SORTS else 'score'
+    status = request.GET.get('status') if request.GET.get('status') in BROWSE_STATUSES else 'posted'
+    tag    = request.GET.get('tag', '')
+    cursor = request.GET.get('cursor')
+    stored = status == 'posted'
+    if not stored and sort == 'score':
+        sort = 'created'
+
+    qs = Position.objects.filter(status=status)
+    if stored:
+        score = StudentPositionMatch.objects.filter(
+                    profile=profile, position=OuterRef('pk')
+                ).values('score')[:1]
+        qs = qs.annotate(match_score=Coalesce(Subquery(score), 0.0))
+    qs = qs.order_by(*BROWSE_SORTS[sort][0])
+    if tag.isdigit():
+        qs = qs.filter(tags__pk=int(tag))
+    if cursor:
+        keyset = _browse_cursor_filter(sort, cursor)
+        if keyset is not None:
+            qs = qs.filter(keyset)
+
+    positions   = list(qs[:BROWSE_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(positions) > BROWSE_PAGE_SIZE:
+        positions   = positions[:BROWSE_PAGE_SIZE]
+        next_cursor = _browse_cursor(sort, positions[-1])
+    if not stored and positions:
+        scores = RequirementMatrix.load(positions).score_map(student_proficiencies(profile))
+        for pos in positions:
+            pos.match_score = scores.get(pos.pk, 0.0)
+
+    # "best matches" strip on the first page; scores only accumulate over
+    # the postings of the student's own skills
+    top_positions = []
+    if not cursor and stored and not tag:
+        top   = get_skill_index().top(student_proficiencies(profile), BROWSE_TOP_N)
+        by_id = Position.objects.in_bulk([pid for pid, _ in top])
+        for pid, pos_score in top:
+            if pid in by_id:
+                by_id[pid].match_score = pos_score
+                top_positions.append(by_id[pid])
 
     return render(request, 'accounts/student_positions.html', {
-        'positions': positions,
-        'saved_ids': saved_ids,
+        'positions':      positions,
+        'top_positions':  top_positions,
+        'saved_ids':      saved_ids,
+        'tags':           Tag.objects.order_by('name'),
+        'statuses':       [(k, v) for k, v in Position.STATUS_CHOICES if k in BROWSE_STATUSES],
+        'current_sort':   sort,
+        'current_status': status,
+        'current_tag':    tag,
+        'next_cursor':    next_cursor,
+        'is_first_page':  not cursor,
     })
 
 
@@ -268,25 +501,27 @@ def toggle_save_position(request):
 
 
 @login_required(login_url='accounts:student_login')
+@query_budget(9)
+@read_replica
 def student_position_detail(request, pk):
     pos         = get_object_or_404(Position, pk=pk)
-    reqs        = PositionSkillRequirement.objects.filter(position=pos).select_related('skill')
+    reqs        = list(PositionSkillRequirement.objects.filter(position=pos).select_related('skill'))
     profile, _  = StudentProfile.objects.get_or_create(user=request.user)
-    student_map = { ss.skill_id: ss.proficiency for ss in profile.student_skills.all() }
+    student_map = student_proficiencies(profile)
 
+    matrix      = RequirementMatrix.from_rows(
+                      (r.position_id, r.skill_id, r.importance, r.level_pct) for r in reqs
+                  )
+    match_score = matrix.score_map(student_map).get(pos.pk, 0.0)
     total_imp   = sum(r.importance for r in reqs) or 1
-    match_score = 0.0
     pct_to_label= {40:'Low',75:'Medium',100:'High'}
 
     for r in reqs:
         r.required_proficiency = pct_to_label.get(r.level_pct, f"{r.level_pct}%")
-        weight = r.importance / total_imp * 100
-        r.weight_pct = f"{weight:.1f}"
+        r.weight_pct = f"{r.importance / total_imp * 100:.1f}"
         sp = student_map.get(r.skill_id)
         if sp:
-            num   = {'low':40,'medium':75,'high':100}[sp]
-            ratio = num / r.level_pct
-            match_score += weight * min(ratio, 1.0)
+            num = PROFICIENCY_PCT[sp]
             r.your_proficiency = pct_to_label.get(num, f"{num}%")
         else:
             r.your_proficiency = 'None'
@@ -300,6 +535,7 @@ def student_position_detail(request, pk):
 
 # ---------- Student: My Skills (existing) ----------
 @login_required(login_url='accounts:student_login')
+@query_budget(8)
 def my_skills_view(request):
     profile, _  = StudentProfile.objects.get_or_create(user=request.user)
     used_ids    = profile.student_skills.values_list('skill_id', flat=True)
@@ -320,11 +556,13 @@ def add_skill_view(request):
     if not sid or prof not in dict(StudentSkill.PROFICIENCY_CHOICES):
         return JsonResponse({'error':'Bad request'}, status=400)
     skill = get_object_or_404(Skill, pk=int(sid))
-    obj, _ = StudentSkill.objects.get_or_create(
+    obj, created = StudentSkill.objects.get_or_create(
         profile=profile,
         skill=skill,
         defaults={'proficiency':prof}
     )
+    if created:
+        refresh_student_matches(profile)
     return JsonResponse({
         'pk': obj.pk,
         'skill_name': skill.name,
@@ -340,9 +578,13 @@ def update_skill_view(request):
     prof = request.POST.get('proficiency')
     if not pk or prof not in dict(StudentSkill.PROFICIENCY_CHOICES):
         return JsonResponse({'error':'Bad request'}, status=400)
-    obj = get_object_or_404(StudentSkill, pk=pk, profile__user=request.user)
-    obj.proficiency = prof
-    obj.save()
+    obj = get_object_or_404(
+        StudentSkill.objects.select_related('profile'), pk=pk, profile__user=request.user
+    )
+    if obj.proficiency != prof:
+        obj.proficiency = prof
+        obj.save()
+        refresh_student_matches(obj.profile)
     return JsonResponse({'success':True})
 
 
@@ -350,27 +592,112 @@ def update_skill_view(request):
 @login_required(login_url='accounts:student_login')
 def delete_skill_view(request):
     pk  = request.POST.get('pk')
-    obj = get_object_or_404(StudentSkill, pk=pk, profile__user=request.user)
+    obj = get_object_or_404(
+        StudentSkill.objects.select_related('profile'), pk=pk, profile__user=request.user
+    )
     obj.delete()
+    refresh_student_matches(obj.profile)
     return JsonResponse({'success':True})
 
 
 @require_POST
 @login_required(login_url='accounts:student_login')
 def bulk_save_skills(request):
+    """Level changes only, as ``{"<pk>": level}``; unknown levels are ignored."""
     try:
-        data = __import__('json').loads(request.body)
-    except ValueError:
+        data = json.loads(request.body)
+        update = {int(pk): prof for pk, prof in data.items() if prof in dict(StudentSkill.PROFICIENCY_CHOICES)}
+    except (ValueError, TypeError, AttributeError):
         return HttpResponseBadRequest("Invalid JSON")
     profile, _ = StudentProfile.objects.get_or_create(user=request.user)
-    for pk_str, prof in data.items():
-        sk = get_object_or_404(StudentSkill, pk=int(pk_str), profile=profile)
-        if prof in dict(StudentSkill.PROFICIENCY_CHOICES):
-            sk.proficiency = prof
-            sk.save()
+    try:
+        apply_skill_diff(profile, update=update)
+    except SkillDiffError:
+        raise Http404("No such skill.")
     return JsonResponse({'status':'ok'})
 
 
+@require_POST
+@login_required(login_url='accounts:student_login')
+@query_budget(26)         # independent of the diff's size; includes savepoints
+def edit_skills_view(request):
+    """
+    Apply a whole diff of the student's skills in one transaction. Body:
+    ``{"add": {"<skill_id>": level}, "update": {"<pk>": level}, "delete": [pk, …]}``.
+    Responds with the resulting skill list.
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid JSON")
+    profile, _ = StudentProfile.objects.get_or_create(user=request.user)
+    try:
+        changed = apply_skill_diff(profile, *parse_skill_diff(data))
+    except SkillDiffError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    skills = profile.student_skills.select_related('skill').order_by('skill__name')
+    return JsonResponse({
+        'changed': changed,
+        'skills':  [
+            {'pk': sk.pk, 'skill_id': sk.skill_id, 'skill_name': sk.skill.name, 'proficiency': sk.proficiency}
+            for sk in skills
+        ],
+    })
+
+
+WHAT_IF_LIMIT = 20
+
+
+@require_POST
+@login_required(login_url='accounts:student_login')
+def what_if_skills_view(request):
+    """
+    Read-only preview of how hypothetical skill changes would move the
+    student's match scores. Body: ``{"changes": {"<skill_id>": "high" | null}}``
+    (null removes the skill). Only positions requiring a changed skill are
+    re-scored, with the same per-requirement formula as
+    ``_calculate_match_score``; nothing is written.
+    """
+    try:
+        data = json.loads(request.body)
+        changes = {int(sid): (lvl or None) for sid, lvl in data.get('changes', {}).items()}
+    except (ValueError, TypeError, AttributeError):
+        return HttpResponseBadRequest("Invalid JSON")
+    valid = dict(StudentSkill.PROFICIENCY_CHOICES)
+    if any(lvl is not None and lvl not in valid for lvl in changes.values()):
+        return JsonResponse({'error': 'Bad request'}, status=400)
+
+    profile, _ = StudentProfile.objects.get_or_create(user=request.user)
+    index      = get_skill_index()
+    idx, delta = index.deltas(student_proficiencies(profile), changes)
+    keep       = index.posted[idx] & (np.abs(delta) > 1e-9)
+    idx, delta = idx[keep], delta[keep]
+
+    order   = np.argsort(-np.abs(delta), kind='stable')[:WHAT_IF_LIMIT]
+    top_ids = index.position_ids[idx[order]].tolist()
+    current = dict(StudentPositionMatch.objects.filter(
+                  profile=profile, position_id__in=top_ids
+              ).values_list('position_id', 'score'))
+    titles  = Position.objects.in_bulk(top_ids)
+
+    return JsonResponse({
+        'improved':  int((delta > 0).sum()),
+        'worsened':  int((delta < 0).sum()),
+        'positions': [
+            {
+                'id':      pid,
+                'title':   titles[pid].title,
+                'company': titles[pid].company,
+                'current': round(current.get(pid, 0.0), 1),
+                'new':     round(current.get(pid, 0.0) + d, 1),
+                'delta':   round(d, 1),
+            }
+            for pid, d in zip(top_ids, delta[order].tolist()) if pid in titles
+        ],
+    })
+
+
 # ---------- Saved positions (existing) ----------
 def _calculate_match_score(profile, position):
     """
@@ -379,38 +706,31 @@ def _calculate_match_score(profile, position):
      - num = {'low':40,'medium':75,'high':100}[student_level]
      - ratio = num / r.level_pct
      - sum weight * min(ratio,1)
-    """
-    prof_map  = { ss.skill_id: ss.proficiency for ss in profile.student_skills.all() }
-    reqs      = position.requirements.all()
-    total_imp = reqs.aggregate(sum=Sum('importance'))['sum'] or 0
-    if total_imp == 0:
-        return 0.0
 
-    score = 0.0
-    for r in reqs:
-        weight = r.importance / total_imp * 100
-        stu    = prof_map.get(r.skill_id)
-        if stu:
-            num   = {'low':40,'medium':75,'high':100}[stu]
-            ratio = num / r.level_pct
-            score += weight * min(ratio, 1.0)
-    return score
+    Single-position convenience wrapper around RequirementMatrix; views that
+    score several positions should load one matrix for all of them instead.
+    """
+    matrix = RequirementMatrix.load([position.pk])
+    return matrix.score_map(student_proficiencies(profile)).get(position.pk, 0.0)
 
 
 @login_required(login_url='accounts:student_login')
+@query_budget(7)
+@read_replica
 def saved_positions_view(request):
     profile = request.user.student_profile
-    qset    = SavedPosition.objects.filter(profile=profile).select_related('position')
-
-    wrapped = [
-        SimpleNamespace(
-            position    = sp.position,
-            saved_at    = sp.saved_at,
-            match_score = _calculate_match_score(profile, sp.position),
-        )
-        for sp in qset
-    ]
+    sort    = request.GET.get('sort', 'saved')
+    score   = StudentPositionMatch.objects.filter(
+                  profile=profile, position=OuterRef('position')
+              ).values('score')[:1]
+    qset    = (SavedPosition.objects
+               .filter(profile=profile)
+               .select_related('position')
+               .annotate(score=Coalesce(Subquery(score), 0.0)))
+    if sort == 'score':
+        qset = qset.order_by('-score', '-saved_at')
 
     return render(request, 'accounts/student_saved_positions.html', {
-        'saved_positions': wrapped,
+        'saved_positions': qset,
+        'current_sort':    sort,
     })
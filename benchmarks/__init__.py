@@ -0,0 +1,48 @@
+# benchmarks/__init__.py
+"""
+Micro-benchmarks for the scoring, rendering and PDF hot paths.
+
+    python -m benchmarks --size medium                     # run and print
+    python -m benchmarks --size medium --save base.json    # store a baseline
+    python -m benchmarks --size medium --compare base.json # flag regressions
+
+Each size gets its own SQLite database under ``cache/benchmarks``, filled
+once by ``accounts.synthetic`` and reused by later runs (``--rebuild-data``
+regenerates it), so runs at the same size and seed time the same rows.
+The cases live in ``benchmarks.cases``, timing and baselines in
+``benchmarks.runner``; ``benchmarks.loadtest`` replays whole user journeys
+against the same databases.
+"""
+import os
+
+# size name -> accounts.synthetic.generate arguments
+SIZES = {
+    'tiny':   {'students': 50,     'positions': 30,     'skills': 40},
+    'small':  {'students': 1_000,  'positions': 500,    'skills': 120},
+    'medium': {'students': 10_000, 'positions': 2_000,  'skills': 300},
+    'large':  {'students': 50_000, 'positions': 10_000, 'skills': 300},
+}
+
+
+def setup(size, seed=0, rebuild_data=False):
+    """
+    Point Django at the benchmark database for ``size``/``seed``, set it up,
+    migrate it and fill it with the synthetic dataset if it is empty.
+    """
+    from careerpath.settings import BASE_DIR
+    db_dir = BASE_DIR / 'cache' / 'benchmarks'
+    db_dir.mkdir(parents=True, exist_ok=True)
+    db_path = db_dir / f"{size}-{seed}.sqlite3"
+    if rebuild_data and db_path.exists():
+        db_path.unlink()
+    os.environ['BENCHMARK_DB'] = str(db_path)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from .cases import ensure_dataset
+
+    call_command('migrate', verbosity=0)
+    ensure_dataset(size, seed)
+    return db_path
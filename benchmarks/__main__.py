@@ -0,0 +1,54 @@
+# benchmarks/__main__.py
+import argparse
+import sys
+
+from . import SIZES, setup, __doc__ as USAGE
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=USAGE,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20, help="Timed runs per case.")
+    parser.add_argument('--only', action='append', metavar='PREFIX',
+                        help="Run only cases whose name starts with PREFIX (repeatable).")
+    parser.add_argument('--save', metavar='PATH', help="Write the results as a baseline file.")
+    parser.add_argument('--compare', metavar='PATH', help="Compare against a baseline file.")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed slowdown / memory growth before a case is flagged (fraction).")
+    parser.add_argument('--rebuild-data', action='store_true', help="Regenerate the benchmark database.")
+    args = parser.parse_args(argv)
+
+    setup(args.size, args.seed, args.rebuild_data)
+    from . import cases, runner
+
+    fx = cases.fixture()
+
+    print(f"size={args.size} seed={args.seed} repeat={args.repeat} "
+          f"student={fx.user.username} position={fx.position.pk}")
+    print(f"{'case':<32}{'median ms':>12}{'min ms':>10}{'p95 ms':>10}{'peak KiB':>12}")
+
+    def report(name, r):
+        print(f"{name:<32}{r['median_ms']:>12.3f}{r['min_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['peak_kib']:>12.0f}")
+
+    results = runner.run(cases.build(fx), args.repeat, args.only, report)
+
+    if args.save:
+        runner.save(args.save, args.size, results)
+        print(f"Baseline written to {args.save}.")
+    if args.compare:
+        baseline = runner.load(args.compare)
+        if baseline.get('size') != args.size:
+            print(f"warning: baseline was recorded at size={baseline.get('size')}", file=sys.stderr)
+        regressions = runner.compare(baseline['results'], results, args.threshold)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old:.3f} -> {new:.3f} ({new / old - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# benchmarks/cases.py
+"""
+The benchmarked hot paths and the dataset they run against.
+
+``fixture`` picks the synthetic student with the most saved positions (so
+every case has work to do) and makes sure their materialised match rows
+exist; ``build`` returns ``{case name: zero-argument callable}``.
+Template cases render the context the real view built, captured once, so
+they time the template alone (lazy querysets in the context still run,
+as they do in the real request).
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.urls import reverse
+
+from accounts import views
+from accounts.cv_pdf import cv_html, html_to_pdf
+from accounts.management.commands.benchmark_cv_engines import sample_cv
+from accounts.matches import refresh_student_matches
+from accounts.models import SavedPosition, StudentProfile
+from accounts.scoring import RequirementMatrix, get_skill_index, student_proficiencies
+from accounts.synthetic import PREFIX, generate
+from positions.models import Position
+
+from . import SIZES
+
+
+def ensure_dataset(size, seed=0):
+    """Generate the synthetic dataset for ``size`` unless the database already has one."""
+    if not StudentProfile.objects.filter(user__username__startswith=PREFIX).exists():
+        generate(seed=seed, **SIZES[size])
+
+
+def fixture():
+    profile = (StudentProfile.objects
+               .filter(user__username__startswith=PREFIX)
+               .annotate(n_saved=Count('saved_positions'), n_skills=Count('student_skills', distinct=True))
+               .order_by('-n_saved', '-n_skills', 'pk')
+               .select_related('user')
+               .first())
+    refresh_student_matches(profile)
+    saved    = SavedPosition.objects.filter(profile=profile).select_related('position').first()
+    position = saved.position if saved else Position.objects.filter(status='posted').first()
+    return SimpleNamespace(profile=profile, user=profile.user, position=position)
+
+
+def _request(user, path):
+    request = RequestFactory().get(path)
+    request.user = user or AnonymousUser()
+    return request
+
+
+def capture_context(view, request):
+    """``(template_name, context)`` the view passes to ``render``."""
+    with mock.patch.object(views, 'render') as fake:
+        view(request)
+    _, template_name, context = fake.call_args.args
+    return template_name, context
+
+
+def build(fx):
+    profile, position = fx.profile, fx.position
+    proficiencies     = student_proficiencies(profile)
+    posted            = Position.objects.filter(status='posted')
+    browse_url        = reverse('accounts:student_positions')
+    skills_url        = reverse('accounts:student_skills')
+
+    def saved_match_scores():
+        # the non-annotated path: one stored-score lookup per saved position
+        return [sp.match_score for sp in SavedPosition.objects.filter(profile=profile)]
+
+    def template_case(view, path):
+        request = _request(fx.user, path)
+        template_name, context = capture_context(view, request)
+        return lambda: render_to_string(template_name, context, request)
+
+    pdf_source = cv_html(*sample_cv(3, 3))
+
+    return {
+        'scoring.calculate_match_score': lambda: views._calculate_match_score(profile, position),
+        'scoring.saved_match_score':     saved_match_scores,
+        'browse.score_all_posted':       lambda: RequirementMatrix.load(posted).score_map(proficiencies),
+        'browse.skill_index_top':        lambda: get_skill_index().top(proficiencies, views.BROWSE_TOP_N),
+        'browse.view':                   lambda: views.browse_positions_view(_request(fx.user, browse_url)),
+        'render.student_positions':      template_case(views.browse_positions_view, browse_url),
+        'render.student_skills':         template_case(views.my_skills_view, skills_url),
+        'pdf.pisa_create_pdf':           lambda: html_to_pdf(pdf_source),
+    }
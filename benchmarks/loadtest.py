@@ -0,0 +1,283 @@
+# benchmarks/loadtest.py
+"""
+Semester-start load test: many students logging in, editing skills,
+browsing positions and downloading CVs at once.
+
+    python -m benchmarks.loadtest --size medium --processes 4 --users 8 --duration 60
+
+``--processes`` worker processes each run ``--users`` virtual students on
+threads. A virtual student repeatedly picks a journey (weighted by
+``JOURNEYS``), logs in with a fresh session and walks its steps through
+the full WSGI stack (``django.test.Client``: every middleware, real
+sessions and password checks) against the benchmark database for
+``--size``. Every request is recorded with its latency and outcome; the
+report gives throughput, latency percentiles and error rates per
+endpoint, with SQLite "database is locked" errors counted on their own.
+"""
+import argparse
+import datetime
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from . import SIZES, setup
+
+LOCKED = 'database is locked'
+
+
+# ---------- journeys ----------
+
+def _form_data(form):
+    """POST data that resubmits ``form``'s current values unchanged."""
+    data = {}
+    for field in form:
+        value = field.value()
+        if value is None or value is False or value == '':
+            continue
+        if value is True:
+            value = 'on'
+        elif isinstance(value, (datetime.date, datetime.datetime)):
+            value = value.isoformat()
+        data[field.html_name] = str(value)
+    return data
+
+
+def cv_post_data(user):
+    """Save & Download form data for ``user``'s CV, built with the view's own forms."""
+    from accounts.forms import CVExperienceFormSet, CVForm, CVLanguageFormSet
+    from accounts.models import CVExperience, CVLanguage, StudentCV, StudentProfile
+
+    profile, _ = StudentProfile.objects.get_or_create(user=user)
+    cv, _      = StudentCV.objects.get_or_create(profile=profile)
+    exp  = CVExperienceFormSet(queryset=CVExperience.objects.filter(cv=cv).order_by('-start_date'), prefix='exp')
+    lang = CVLanguageFormSet(queryset=CVLanguage.objects.filter(cv=cv).order_by('-mother_tongue'), prefix='lang')
+    data = {'action': 'download'}
+    for form in [CVForm(instance=cv, prefix='cv'), exp.management_form, lang.management_form,
+                 *exp.forms, *lang.forms]:
+        data.update(_form_data(form))
+    return data
+
+
+def browse(vu):
+    from django.urls import reverse
+
+    vu.get('student_positions', reverse('accounts:student_positions'))
+    vu.get('student_positions', reverse('accounts:student_positions'), {'sort': 'created'})
+    if vu.posted_ids:
+        vu.post('toggle_save_position', reverse('accounts:toggle_save_position'),
+                {'position_id': vu.rng.choice(vu.posted_ids)})
+
+
+def edit_skills(vu):
+    from django.urls import reverse
+    from accounts.models import StudentSkill
+
+    vu.get('student_skills', reverse('accounts:student_skills'))
+    pks = list(StudentSkill.objects.filter(profile__user=vu.user).values_list('pk', flat=True))
+    if pks:
+        changes = {str(pk): vu.rng.choice(['low', 'medium', 'high'])
+                   for pk in vu.rng.sample(pks, min(3, len(pks)))}
+        vu.post('bulk_save_skills', reverse('accounts:bulk_save_skills'),
+                json.dumps(changes), content_type='application/json')
+
+
+def download_cv(vu):
+    from django.urls import reverse
+
+    vu.get('student_cv', reverse('accounts:student_cv'))
+    # a redirect to the render job, or the PDF itself when cached; a 200
+    # page is the form coming back with errors
+    vu.post('student_cv', reverse('accounts:student_cv'), cv_post_data(vu.user),
+            ok=lambda r: r.status_code == 302 or r.get('Content-Type') == 'application/pdf')
+
+
+# name -> (weight, steps after login)
+JOURNEYS = {
+    'browse':      (5, browse),
+    'edit_skills': (3, edit_skills),
+    'download_cv': (1, download_cv),
+}
+
+
+# ---------- virtual users ----------
+
+class VirtualUser:
+    def __init__(self, user, posted_ids, samples, rng):
+        self.user       = user
+        self.posted_ids = posted_ids
+        self.samples    = samples
+        self.rng        = rng
+        self.client     = None
+
+    def _request(self, endpoint, method, *args, ok=(200, 302), **kwargs):
+        """Issue one request and record it; ``ok`` is the accepted statuses or a predicate."""
+        started = time.perf_counter()
+        error   = None
+        try:
+            response = getattr(self.client, method)(*args, **kwargs)
+            if not (ok(response) if callable(ok) else response.status_code in ok):
+                error = f"HTTP {response.status_code}"
+        except Exception as exc:    # the view raised; classify it and carry on
+            error = LOCKED if LOCKED in str(exc) else type(exc).__name__
+        self.samples.append((endpoint, time.perf_counter() - started, error))
+        return error is None
+
+    def get(self, endpoint, url, data=None):
+        return self._request(endpoint, 'get', url, data)
+
+    def post(self, endpoint, url, data=None, **kwargs):
+        return self._request(endpoint, 'post', url, data, **kwargs)
+
+    def login(self, password):
+        from django.test import Client
+        from django.urls import reverse
+
+        self.client = Client()
+        # a successful login redirects to the dashboard; 200 means rejected
+        return self._request('student_login', 'post', reverse('accounts:student_login'),
+                             {'username': self.user.username, 'password': password}, ok=(302,))
+
+    def run(self, deadline, password, weights):
+        names = list(weights)
+        while time.monotonic() < deadline:
+            journey = self.rng.choices(names, weights=[weights[n] for n in names])[0]
+            if self.login(password):
+                JOURNEYS[journey][1](self)
+
+
+def run_process(usernames, duration, weights, seed):
+    """Pool task: one thread per username until ``duration`` elapses; returns the samples."""
+    from django.db import connections
+    from accounts.models import User
+    from accounts.synthetic import PASSWORD
+    from positions.models import Position
+
+    users      = list(User.objects.filter(username__in=usernames))
+    posted_ids = list(Position.objects.filter(status='posted').values_list('pk', flat=True)[:500])
+    connections.close_all()
+    samples  = []
+    deadline = time.monotonic() + duration
+
+    def worker(user, rng):
+        try:
+            VirtualUser(user, posted_ids, samples, rng).run(deadline, PASSWORD, weights)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(user, random.Random(f"{seed}:{user.pk}")))
+               for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+# ---------- report ----------
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(samples, elapsed):
+    """``{endpoint: stats}`` plus a ``'total'`` entry."""
+    by_endpoint = defaultdict(list)
+    for endpoint, latency, error in samples:
+        by_endpoint[endpoint].append((latency, error))
+        by_endpoint['total'].append((latency, error))
+    report = {}
+    for endpoint, rows in by_endpoint.items():
+        latencies = sorted(latency * 1000 for latency, _ in rows)
+        errors    = Counter(error for _, error in rows if error)
+        report[endpoint] = {
+            'requests':   len(rows),
+            'rps':        len(rows) / elapsed,
+            'error_rate': sum(errors.values()) / len(rows),
+            'locked':     errors.get(LOCKED, 0),
+            'errors':     dict(errors),
+            'p50_ms':     _percentile(latencies, 0.50),
+            'p90_ms':     _percentile(latencies, 0.90),
+            'p99_ms':     _percentile(latencies, 0.99),
+            'max_ms':     latencies[-1],
+        }
+    return report
+
+
+def print_report(report, out=sys.stdout):
+    out.write(f"{'endpoint':<22}{'requests':>9}{'req/s':>8}{'errors':>8}{'locked':>8}"
+              f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}\n")
+    for endpoint in sorted(report, key=lambda e: (e == 'total', e)):
+        r = report[endpoint]
+        out.write(f"{endpoint:<22}{r['requests']:>9}{r['rps']:>8.1f}{r['error_rate']:>8.1%}{r['locked']:>8}"
+                  f"{r['p50_ms']:>9.0f}{r['p90_ms']:>9.0f}{r['p99_ms']:>9.0f}{r['max_ms']:>9.0f}\n")
+    errors = report.get('total', {}).get('errors')
+    if errors:
+        out.write("errors: " + ", ".join(f"{n}× {e}" for e, n in Counter(errors).most_common()) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadtest', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=2,
+                        help="Worker processes (0 = run the users on threads in this process).")
+    parser.add_argument('--users', type=int, default=4, help="Virtual students per process.")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds to run.")
+    parser.add_argument('--journey', action='append', metavar='NAME=WEIGHT',
+                        help=f"Override a journey weight (journeys: {', '.join(JOURNEYS)}).")
+    parser.add_argument('--json', metavar='PATH', help="Also write the report as JSON.")
+    args = parser.parse_args(argv)
+
+    weights = {name: weight for name, (weight, _) in JOURNEYS.items()}
+    for item in args.journey or []:
+        name, _, weight = item.partition('=')
+        if name not in JOURNEYS:
+            parser.error(f"unknown journey {name!r}")
+        weights[name] = float(weight)
+
+    setup(args.size, args.seed)
+    from django.db import connections
+    from accounts.models import User
+    from accounts.synthetic import PREFIX
+
+    groups    = max(1, args.processes)
+    usernames = list(User.objects.filter(username__startswith=PREFIX)
+                     .order_by('?').values_list('username', flat=True)[:groups * args.users])
+    chunks    = [usernames[i::groups] for i in range(groups)]
+    connections.close_all()     # don't share the parent's connection with forked workers
+
+    print(f"size={args.size} processes={args.processes} users/process={args.users} "
+          f"duration={args.duration:.0f}s journeys={weights}")
+    started = time.perf_counter()
+    if args.processes == 0:
+        samples = run_process(chunks[0], args.duration, weights, args.seed)
+    else:
+        with ProcessPoolExecutor(max_workers=groups, initializer=_init_worker) as pool:
+            futures = [pool.submit(run_process, chunk, args.duration, weights, args.seed + i)
+                       for i, chunk in enumerate(chunks)]
+            samples = [sample for future in futures for sample in future.result()]
+    elapsed = time.perf_counter() - started
+
+    if not samples:
+        print("No requests were made.")
+        return 1
+    report = summarize(samples, elapsed)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
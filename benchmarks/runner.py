@@ -0,0 +1,88 @@
+# benchmarks/runner.py
+"""
+Timing, peak-memory measurement and baseline files.
+
+Every case is warmed up once, then timed ``repeat`` times with
+``time.perf_counter``; peak memory comes from one extra run under
+``tracemalloc`` (kept apart from the timed runs, which it would slow down).
+Baselines are JSON files of ``{name: {median_ms, min_ms, peak_kib}}``;
+``compare`` flags a case whose median or peak grew by more than
+``threshold`` over the baseline.
+"""
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+
+NOISE_FLOOR_MS = 0.05   # timings this close are never called regressions
+
+
+def measure(func, repeat):
+    """``{median_ms, min_ms, p95_ms, peak_kib}`` for calling ``func()``."""
+    func()      # warm-up: imports, template compilation, caches
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    times.sort()
+    return {
+        'median_ms': statistics.median(times),
+        'min_ms':    times[0],
+        'p95_ms':    times[max(0, int(round(0.95 * len(times))) - 1)],
+        'peak_kib':  peak / 1024,
+    }
+
+
+def run(cases, repeat, only=None, report=None):
+    """Measure ``cases`` ({name: callable}); ``report`` gets each (name, result)."""
+    results = {}
+    for name, func in cases.items():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        results[name] = measure(func, repeat)
+        if report:
+            report(name, results[name])
+    return results
+
+
+def save(path, size, results):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({
+            'size':    size,
+            'python':  platform.python_version(),
+            'django':  django.get_version(),
+            'results': results,
+        }, fh, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def compare(baseline, results, threshold=0.25):
+    """
+    ``[(name, metric, old, new)]`` for every case that got slower or used
+    more memory than ``threshold`` (a fraction) beyond its baseline.
+    """
+    regressions = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if (new['median_ms'] > old['median_ms'] * (1 + threshold)
+                and new['median_ms'] - old['median_ms'] > NOISE_FLOOR_MS):
+            regressions.append((name, 'median_ms', old['median_ms'], new['median_ms']))
+        if new['peak_kib'] > old['peak_kib'] * (1 + threshold) and new['peak_kib'] - old['peak_kib'] > 1:
+            regressions.append((name, 'peak_kib', old['peak_kib'], new['peak_kib']))
+    return regressions
@@ -0,0 +1,20 @@
+# benchmarks/settings.py
+"""Project settings pointed at the benchmark database chosen by ``python -m benchmarks``."""
+import os
+
+from careerpath.settings import *  # noqa: F401,F403
+
+_engine = os.environ.get('BENCHMARK_DB_ENGINE', DATABASES['default']['ENGINE'])  # noqa: F405
+DATABASES = {
+    'default': {
+        **DATABASES['default'],  # noqa: F405
+        'ENGINE': _engine,
+        'NAME':   os.environ.get('BENCHMARK_DB', str(BASE_DIR / 'cache' / 'benchmarks' / 'small.sqlite3')),  # noqa: F405
+    }
+}
+if _engine == 'django.db.backends.sqlite3':     # the stock backend with its defaults, for comparison
+    DATABASES['default'].update(OPTIONS={}, CONN_MAX_AGE=0)
+
+DEBUG                = False
+ALLOWED_HOSTS        = ['testserver', 'localhost', '127.0.0.1']   # django.test.Client in the load test
+QUERY_BUDGET_ENABLED = False
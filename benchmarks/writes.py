@@ -0,0 +1,171 @@
+# benchmarks/writes.py
+"""
+Concurrent write throughput: the stock SQLite backend against careerpath.sqlite.
+
+    python -m benchmarks.writes --size small --processes 4 --threads 4 --duration 20
+
+For each engine, ``--processes`` spawned processes run ``--threads``
+threads for ``--duration`` seconds against the benchmark database. Each
+thread mixes the app's own hot writes with reads:
+  - save:  toggle a saved position (autocommit insert / delete)
+  - skill: save three skills one by one in a transaction (signals
+           update the skill-gap rollups per row)
+  - read:  a student's 24 best stored matches (the browse query)
+The stock run resets the database to a rollback journal first, since WAL
+mode persists in the file once any connection has enabled it.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import SIZES, setup
+
+ENGINES = {
+    'stock': 'django.db.backends.sqlite3',
+    'tuned': 'careerpath.sqlite',
+}
+OPS = {'save': 2, 'skill': 2, 'read': 6}
+
+
+def _op_save(profile_id, rng, ctx):
+    from accounts.models import SavedPosition
+
+    position_id = rng.choice(ctx['posted_ids'])
+    saved, created = SavedPosition.objects.get_or_create(profile_id=profile_id, position_id=position_id)
+    if not created:
+        saved.delete()
+
+
+def _op_skill(profile_id, rng, ctx):
+    from django.db import transaction
+    from accounts.models import StudentSkill
+
+    with transaction.atomic():
+        skills = list(StudentSkill.objects.filter(profile_id=profile_id)[:3])
+        for sk in skills:
+            sk.proficiency = rng.choice(['low', 'medium', 'high'])
+            sk.save()
+
+
+def _op_read(profile_id, rng, ctx):
+    from accounts.models import StudentPositionMatch
+
+    list(StudentPositionMatch.objects.filter(profile_id=profile_id).order_by('-score')[:24])
+
+
+def _init_worker(engine):
+    os.environ['BENCHMARK_DB_ENGINE'] = engine
+    import django
+    django.setup()
+
+
+def run_process(profile_ids, posted_ids, duration, seed):
+    """Pool task: one thread per profile until ``duration`` elapses; returns samples."""
+    from django.db import connections
+
+    ops      = {'save': _op_save, 'skill': _op_skill, 'read': _op_read}
+    names    = list(OPS)
+    weights  = [OPS[n] for n in names]
+    ctx      = {'posted_ids': posted_ids}
+    samples  = []
+    deadline = time.monotonic() + duration
+
+    def worker(profile_id):
+        rng = random.Random(f"{seed}:{profile_id}")
+        try:
+            while time.monotonic() < deadline:
+                op = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                error = None
+                try:
+                    ops[op](profile_id, rng, ctx)
+                except Exception as exc:
+                    error = 'locked' if 'locked' in str(exc) else type(exc).__name__
+                samples.append((op, time.perf_counter() - started, error))
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(pid,)) for pid in profile_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def set_journal_mode(path, mode):
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(f"PRAGMA journal_mode = {mode}")
+    finally:
+        conn.close()
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def report(engine, samples, elapsed, out=sys.stdout):
+    out.write(f"\n{engine}\n{'op':<8}{'ops':>8}{'ops/s':>9}{'errors':>8}{'locked':>8}"
+              f"{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}\n")
+    for op in list(OPS):
+        rows = [(latency, error) for name, latency, error in samples if name == op]
+        if not rows:
+            continue
+        latencies = sorted(latency * 1000 for latency, _ in rows)
+        errors    = [error for _, error in rows if error]
+        out.write(f"{op:<8}{len(rows):>8}{len(rows) / elapsed:>9.1f}{len(errors):>8}"
+                  f"{errors.count('locked'):>8}{_percentile(latencies, .5):>9.1f}"
+                  f"{_percentile(latencies, .99):>9.1f}{latencies[-1]:>9.1f}\n")
+    writes = sum(1 for op, _, error in samples if op != 'read' and not error)
+    out.write(f"successful writes/s: {writes / elapsed:.1f}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.writes', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4, help="Threads per process.")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds per engine.")
+    parser.add_argument('--engine', choices=ENGINES, action='append',
+                        help="Engine(s) to run (default: both).")
+    args = parser.parse_args(argv)
+
+    db_path = setup(args.size, args.seed)
+    from django.db import connections
+    from accounts.models import StudentProfile
+    from accounts.synthetic import PREFIX
+    from positions.models import Position
+
+    n = args.processes * args.threads
+    profile_ids = list(StudentProfile.objects.filter(user__username__startswith=PREFIX)
+                       .order_by('pk').values_list('pk', flat=True)[:n])
+    posted_ids  = list(Position.objects.filter(status='posted').values_list('pk', flat=True)[:1000])
+    connections.close_all()
+
+    print(f"size={args.size} processes={args.processes} threads/process={args.threads} "
+          f"duration={args.duration:.0f}s mix={OPS}")
+    for name in args.engine or ENGINES:
+        set_journal_mode(str(db_path), 'WAL' if name == 'tuned' else 'DELETE')
+        chunks = [profile_ids[i::args.processes] for i in range(args.processes)]
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.processes,
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(ENGINES[name],)) as pool:
+            futures = [pool.submit(run_process, chunk, posted_ids, args.duration, args.seed + i)
+                       for i, chunk in enumerate(chunks)]
+            samples = [s for future in futures for s in future.result()]
+        report(f"{name} ({ENGINES[name]})", samples, time.perf_counter() - started)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
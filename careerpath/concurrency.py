@@ -0,0 +1,133 @@
+# careerpath/concurrency.py
+"""
+Host-wide concurrency limits for expensive views.
+
+Each limiter owns two sets of lock files under ``CONCURRENCY_LOCK_DIR``:
+``max_concurrent`` run slots and ``max_concurrent + max_queue`` admission
+tickets. A request first takes a free ticket (none free → the wait queue is
+full → 503 at once), then polls for a run slot until ``timeout`` (→ 503).
+Locks are OS file locks, so they are shared by every worker process on the
+host and released automatically if a process dies while holding one.
+
+    @limit_concurrency('cv-download', max_concurrent=4, max_queue=16, timeout=10)
+    def my_view(request): ...
+"""
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+
+try:
+    import fcntl
+except ImportError:         # Windows
+    fcntl = None
+    import msvcrt
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Too many concurrent requests; retry after {retry_after}s.")
+        self.retry_after = retry_after
+
+
+def _try_lock(path):
+    """Open and exclusively lock ``path`` without blocking; fd or None."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock(fd):
+    if fcntl is None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    os.close(fd)        # also drops the flock
+
+
+class ConcurrencyLimiter:
+    POLL_MIN = 0.01
+    POLL_MAX = 0.2
+
+    def __init__(self, name, max_concurrent, max_queue=0, timeout=10.0,
+                 retry_after=None, lock_dir=None):
+        self.name           = name
+        self.max_concurrent = max_concurrent
+        self.max_queue      = max_queue
+        self.timeout        = timeout
+        self.retry_after    = retry_after or max(1, int(round(timeout)))
+        self._lock_dir      = lock_dir
+
+    @property
+    def lock_dir(self):
+        return str(self._lock_dir or settings.CONCURRENCY_LOCK_DIR)
+
+    def _first_free(self, kind, count):
+        os.makedirs(self.lock_dir, exist_ok=True)
+        for i in range(count):
+            fd = _try_lock(os.path.join(self.lock_dir, f"{self.name}.{kind}.{i}.lock"))
+            if fd is not None:
+                return fd
+        return None
+
+    @contextmanager
+    def slot(self):
+        """Hold a run slot for the block; raises Overloaded if none comes free in time."""
+        ticket = self._first_free('ticket', self.max_concurrent + self.max_queue)
+        if ticket is None:
+            raise Overloaded(self.retry_after)
+        try:
+            deadline = time.monotonic() + self.timeout
+            delay    = self.POLL_MIN
+            run = self._first_free('run', self.max_concurrent)
+            while run is None:
+                if time.monotonic() >= deadline:
+                    raise Overloaded(self.retry_after)
+                time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+                delay = min(delay * 2, self.POLL_MAX)
+                run = self._first_free('run', self.max_concurrent)
+            try:
+                yield
+            finally:
+                _unlock(run)
+        finally:
+            _unlock(ticket)
+
+
+def limit_concurrency(name, max_concurrent, max_queue=0, timeout=10.0,
+                      retry_after=None, methods=None):
+    """
+    View decorator: at most ``max_concurrent`` requests run the view at once
+    across all processes, up to ``max_queue`` more wait up to ``timeout``
+    seconds, and the rest get 503 with Retry-After. ``methods`` limits the
+    throttling to those HTTP methods (default: all).
+    """
+    limiter = ConcurrencyLimiter(name, max_concurrent, max_queue, timeout, retry_after)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if methods and request.method not in methods:
+                return view_func(request, *args, **kwargs)
+            try:
+                with limiter.slot():
+                    return view_func(request, *args, **kwargs)
+            except Overloaded as exc:
+                response = HttpResponse(
+                    "The server is busy right now. Please try again in a moment.",
+                    status=503, content_type='text/plain',
+                )
+                response['Retry-After'] = str(exc.retry_after)
+                return response
+        _wrapped_view.limiter = limiter
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,246 @@
+# careerpath/metrics.py
+"""
+Per-request performance metrics.
+
+``RequestMetricsMiddleware`` measures, for every request, the wall time,
+SQL query count and time (via ``connection.execute_wrapper``), time spent
+rendering templates and response size, and folds them into fixed-bucket
+histograms keyed by URL name (``accounts:student_positions`` …).
+``render_prometheus`` formats the histograms in the Prometheus text
+exposition format for the admin metrics endpoint.
+
+Histograms live in the memory of each worker process, so a scrape sees the
+process that served it; the ``process`` label keeps series from different
+workers apart. With ``REQUEST_METRICS_SAMPLE_RATE`` > 0 a sample of raw
+records is also appended to ``REQUEST_METRICS_LOG`` as JSON lines by a
+background thread, so the request path never touches the file.
+"""
+import atexit
+import bisect
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as BackendTemplate
+
+# metric -> (help text, unit suffix or None for a plain count, bucket upper bounds)
+METRICS = {
+    'request_duration':  ("Wall time per request.", 'seconds',
+                          (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)),
+    'sql_queries':       ("SQL queries per request.", None,
+                          (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)),
+    'sql_duration':      ("SQL time per request.", 'seconds',
+                          (.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)),
+    'template_duration': ("Template render time per request.", 'seconds',
+                          (.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)),
+    'response_size':     ("Response body size.", 'bytes',
+                          (1 << 10, 4 << 10, 16 << 10, 64 << 10, 256 << 10, 1 << 20, 4 << 20)),
+}
+
+_local = threading.local()      # .stats: dict for the request being served, if any
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)     # last bucket: +Inf
+        self.sum    = 0.0
+        self.count  = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum   += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}         # (view, metric) -> Histogram
+
+    def observe(self, view, values):
+        with self._lock:
+            for metric, value in values.items():
+                hist = self._data.get((view, metric))
+                if hist is None:
+                    hist = self._data[(view, metric)] = Histogram(METRICS[metric][2])
+                hist.observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (h.bounds, list(h.counts), h.sum, h.count) for key, h in self._data.items()}
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+
+registry = Registry()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(snapshot=None):
+    snapshot = registry.snapshot() if snapshot is None else snapshot
+    pid   = os.getpid()
+    lines = []
+    for metric, (help_text, unit, _) in METRICS.items():
+        name = f"careerpath_{metric}_{unit}" if unit else f"careerpath_{metric}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (view, m), (bounds, counts, total, count) in sorted(snapshot.items()):
+            if m != metric:
+                continue
+            labels = f'view="{_label(view)}",process="{pid}"'
+            cumulative = 0
+            for bound, n in zip(list(bounds) + ['+Inf'], counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {total}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class JSONLWriter:
+    """Appends dicts to a JSON-lines file from a daemon thread, in batches."""
+
+    def __init__(self, path, max_pending=10000, flush_interval=1.0, batch_size=500):
+        self.path           = str(path)
+        self.flush_interval = flush_interval
+        self.batch_size     = batch_size
+        self.dropped        = 0
+        self._queue  = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name='metrics-jsonl', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:      # never block a request on disk I/O
+            self.dropped += 1
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if first is None:
+                return
+            batch = self._drain(first)
+            stop  = None in batch
+            lines = "".join(json.dumps(r) + "\n" for r in batch if r is not None)
+            with open(self.path, 'a', encoding='utf-8') as fh:
+                fh.write(lines)
+            if stop:
+                return
+
+    def close(self, timeout=5.0):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = JSONLWriter(settings.REQUEST_METRICS_LOG)
+        return _writer
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        stats = getattr(_local, 'stats', None)
+        if stats is None or stats['in_template']:
+            return render(self, *args, **kwargs)
+        stats['in_template'] = True
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats['template_duration'] += time.perf_counter() - started
+            stats['in_template'] = False
+    wrapper.metrics_timed = True
+    return wrapper
+
+
+def _install_template_timer():
+    if not getattr(BackendTemplate.render, 'metrics_timed', False):
+        BackendTemplate.render = _timed_render(BackendTemplate.render)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate  = getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.0)
+        _install_template_timer()
+
+    def _sql_wrapper(self, stats):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats['sql_duration'] += time.perf_counter() - started
+                stats['sql_queries']  += 1
+        return wrapper
+
+    def __call__(self, request):
+        stats = {'sql_queries': 0, 'sql_duration': 0.0, 'template_duration': 0.0, 'in_template': False}
+        _local.stats = stats
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                wrapper = self._sql_wrapper(stats)
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(wrapper))
+                response = self.get_response(request)
+        finally:
+            _local.stats = None
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view  = (match.view_name if match else None) or '<unresolved>'
+        size  = len(response.content) if not response.streaming else int(response.get('Content-Length') or 0)
+        values = {
+            'request_duration':  elapsed,
+            'sql_queries':       stats['sql_queries'],
+            'sql_duration':      stats['sql_duration'],
+            'template_duration': stats['template_duration'],
+            'response_size':     size,
+        }
+        registry.observe(view, values)
+
+        if self.sample_rate and random.random() < self.sample_rate:
+            get_writer().write({
+                'ts':     time.time(),
+                'view':   view,
+                'method': request.method,
+                'status': response.status_code,
+                **values,
+            })
+        return response
@@ -0,0 +1,195 @@
+# careerpath/profiling.py
+"""
+On-demand cProfile for single requests.
+
+A request is profiled when it carries ``?_profile=…`` or an
+``X-Profile: …`` header whose value is either ``1`` from a logged-in admin
+or a profiling token an admin issued from the profiles page (so a slow page
+can be captured in the affected student's own session). Everything else
+passes straight through after two dictionary lookups.
+
+Profiled requests run under ``cProfile`` with every SQL statement and its
+duration recorded; the pstats dump and a JSON summary are written to
+``REQUEST_PROFILE_DIR``, which keeps the newest ``REQUEST_PROFILE_KEEP``
+profiles.
+"""
+import cProfile
+import datetime
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+from .querybudget import query_shape
+
+PARAM      = '_profile'
+HEADER     = 'HTTP_X_PROFILE'
+TOKEN_SALT = 'request-profile'
+TOKEN_AGE  = 3600               # seconds an issued token stays valid
+
+_ID_RE     = re.compile(r'^[0-9a-f]{32}$')
+
+
+def issue_token(user):
+    return signing.dumps({'by': user.pk}, salt=TOKEN_SALT)
+
+
+def _token_valid(value):
+    try:
+        signing.loads(value, salt=TOKEN_SALT, max_age=TOKEN_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _store_dir():
+    return str(settings.REQUEST_PROFILE_DIR)
+
+
+def _prune(keep):
+    entries = sorted(
+        (entry for entry in os.scandir(_store_dir()) if entry.name.endswith('.json')),
+        key=lambda e: e.stat().st_mtime, reverse=True,
+    )
+    for entry in entries[keep:]:
+        for suffix in ('.json', '.prof'):
+            try:
+                os.unlink(entry.path[:-len('.json')] + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def save_profile(profiler, meta):
+    os.makedirs(_store_dir(), exist_ok=True)
+    base = os.path.join(_store_dir(), meta['id'])
+    profiler.dump_stats(base + '.prof')
+    with open(base + '.json', 'w', encoding='utf-8') as fh:
+        json.dump(meta, fh)
+    _prune(settings.REQUEST_PROFILE_KEEP)
+
+
+def _with_datetime(meta):
+    meta['started_at'] = datetime.datetime.fromtimestamp(meta['started'], tz=datetime.timezone.utc)
+    return meta
+
+
+def list_profiles(limit=50):
+    """Summaries of the newest stored profiles, newest first (without queries)."""
+    if not os.path.isdir(_store_dir()):
+        return []
+    metas = []
+    for entry in os.scandir(_store_dir()):
+        if entry.name.endswith('.json'):
+            with open(entry.path, encoding='utf-8') as fh:
+                meta = json.load(fh)
+            meta.pop('queries', None)
+            metas.append(_with_datetime(meta))
+    metas.sort(key=lambda m: m['started'], reverse=True)
+    return metas[:limit]
+
+
+def _short(filename):
+    parts = filename.replace('\\', '/').split('/')
+    return '/'.join(parts[-3:])
+
+
+def load_profile(profile_id, top=30):
+    """Summary, hottest functions and SQL for one profile, or None."""
+    if not _ID_RE.match(profile_id):
+        return None
+    base = os.path.join(_store_dir(), profile_id)
+    try:
+        with open(base + '.json', encoding='utf-8') as fh:
+            meta = json.load(fh)
+        stats = pstats.Stats(base + '.prof')
+    except FileNotFoundError:
+        return None
+
+    rows = [
+        {
+            'function':   f"{_short(filename)}:{line}({name})",
+            'calls':      nc,
+            'tottime':    tt,
+            'cumtime':    ct,
+        }
+        for (filename, line, name), (cc, nc, tt, ct, callers) in stats.stats.items()
+    ]
+    shapes = {}
+    for q in meta['queries']:
+        entry = shapes.setdefault(query_shape(q['sql']), {'sql': q['sql'], 'count': 0, 'time': 0.0})
+        entry['count'] += 1
+        entry['time']  += q['time']
+    meta['by_cumulative'] = sorted(rows, key=lambda r: -r['cumtime'])[:top]
+    meta['by_own_time']   = sorted(rows, key=lambda r: -r['tottime'])[:top]
+    meta['slowest_queries'] = sorted(meta['queries'], key=lambda q: -q['time'])[:top]
+    meta['query_shapes']    = sorted(shapes.values(), key=lambda s: -s['time'])[:top]
+    return _with_datetime(meta)
+
+
+class ProfilingMiddleware:
+    """Must come after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _requested(self, request):
+        value = request.GET.get(PARAM) if PARAM in request.META.get('QUERY_STRING', '') else None
+        value = value or request.META.get(HEADER)
+        if not value:
+            return False
+        if value == '1':
+            return getattr(request.user, 'is_admin', False)
+        return _token_valid(value)
+
+    def __call__(self, request):
+        if not (PARAM in request.META.get('QUERY_STRING', '') or HEADER in request.META):
+            return self.get_response(request)
+        if not self._requested(request):
+            return self.get_response(request)
+
+        queries = []
+
+        def record_sql(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({'sql': sql, 'time': time.perf_counter() - started})
+
+        profiler = cProfile.Profile()
+        started_at = time.time()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(record_sql))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        meta = {
+            'id':        uuid.uuid4().hex,
+            'started':   started_at,
+            'path':      request.get_full_path(),
+            'method':    request.method,
+            'view':      (match.view_name if match else None) or '<unresolved>',
+            'user':      request.user.get_username() if request.user.is_authenticated else '',
+            'status':    response.status_code,
+            'duration':  elapsed,
+            'sql_count': len(queries),
+            'sql_time':  sum(q['time'] for q in queries),
+            'queries':   queries,
+        }
+        save_profile(profiler, meta)
+        response['X-Profile-Id'] = meta['id']
+        return response
@@ -0,0 +1,104 @@
+# careerpath/querybudget.py
+"""
+Query budgets and N+1 detection.
+
+Views declare the most queries one request may issue, with
+``@query_budget(n)`` on function views or a ``query_budget = n`` class
+attribute on class-based views; a ``{method: n}`` dict budgets each HTTP
+method separately (methods left out are unbudgeted). With
+``QUERY_BUDGET_ENABLED`` (on under DEBUG), ``QueryBudgetMiddleware``
+counts every request's queries and groups them by shape (the SQL with
+literals and ``IN`` lists collapsed); it logs a warning when a shape
+repeats ``QUERY_BUDGET_REPEAT_LIMIT`` times (the N+1 pattern) or the view
+goes over budget, and raises ``QueryBudgetExceeded`` instead when
+``QUERY_BUDGET_STRICT`` is set.
+``careerpath.testing`` gives tests the same checks, and the test runner
+makes every over-budget request fail.
+With the feature off the middleware removes itself at startup.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('careerpath.querybudget')
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_shape(sql):
+    """SQL with literals and parameter lists replaced, so repeats group together."""
+    return _IN_LIST_RE.sub('(?)', _LITERAL_RE.sub('?', sql))
+
+
+def query_budget(max_queries):
+    """Declare the most queries one request to this function view may issue."""
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def budget_for(func, method='GET'):
+    """Budget declared by a resolved view function (or its view class) for ``method``."""
+    budget = getattr(func, 'query_budget', None)
+    if budget is None and hasattr(func, 'view_class'):
+        budget = getattr(func.view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        budget = budget.get(method.upper())
+    return budget
+
+
+def repeated_shapes(sqls, limit):
+    """``{shape: count}`` for shapes issued at least ``limit`` times."""
+    counts = Counter(query_shape(sql) for sql in sqls)
+    return {shape: n for shape, n in counts.items() if n >= limit}
+
+
+def check(view_name, budget, sqls, limit):
+    """Problems with one request's queries, as human-readable strings."""
+    problems = []
+    if budget is not None and len(sqls) > budget:
+        problems.append(f"{view_name}: {len(sqls)} queries, budget is {budget}")
+    for shape, n in repeated_shapes(sqls, limit).items():
+        problems.append(f"{view_name}: possible N+1, {n}× {shape[:200]}")
+    return problems
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sqls = []
+
+        def record(execute, sql, params, many, context):
+            sqls.append(sql)
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(record))
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            problems = check(match.view_name, budget_for(match.func, request.method), sqls,
+                             getattr(settings, 'QUERY_BUDGET_REPEAT_LIMIT', 5))
+            if problems and getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded("\n".join(problems))
+            for problem in problems:
+                logger.warning(problem)
+        return response
+
@@ -0,0 +1,231 @@
+# careerpath/replica.py
+"""
+Read replica routing.
+
+The ``REPLICA_DB_ALIAS`` database ('replica') is a snapshot of the primary
+SQLite file, taken with SQLite's online backup API by ``refresh_snapshot``
+(``manage.py refresh_replica``, usually looping with ``--interval``). The
+backup writes into the replica in place, so open replica connections move
+to the new snapshot on their next transaction. Each refresh records the
+time the copy started in a ``<replica>.snapshot`` file next to it.
+
+Views opt in with ``@read_replica`` (function views) or a
+``read_replica = True`` class attribute. ``ReplicaMiddleware`` lets the
+reads of a GET/HEAD request to such a view use the replica when:
+  - the snapshot is no older than ``REPLICA_MAX_LAG`` seconds, and
+  - the snapshot was taken after this client's last write. Every unsafe
+    request (POST …), and any request that wrote to the primary, stamps a
+    ``REPLICA_PIN_COOKIE`` with its time. Until a newer snapshot exists,
+    that client stays pinned to the primary and reads its own writes.
+Writes, migrations, sessions, the request's user and every other view use
+the primary.
+``ReplicaRouter`` applies the per-request choice. ``use_replica()`` gives
+reporting code outside a request (commands, jobs) the same routing.
+
+Any database reachable through the alias works as the replica, e.g. a
+Postgres standby. Only SQLite snapshots record their lag, though; without
+a snapshot file the replica counts as missing and reads use the primary.
+"""
+import contextvars
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS  = 'replica'
+PRIMARY_ONLY_APPS = {'sessions'}    # read on every request; must see the latest write
+DEFAULT_MAX_LAG   = 120
+PIN_COOKIE        = 'db_pin'
+
+_WRITE_RE   = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+_read_alias = contextvars.ContextVar('replica_read_alias', default=None)
+_snapshot   = {'path': None, 'mtime': None, 'taken_at': None}
+
+
+def read_replica(view_func):
+    """Let GET requests to this function view read from the replica."""
+    view_func.read_replica = True
+    return view_func
+
+
+def _opted_in(view_func):
+    if getattr(view_func, 'read_replica', False):
+        return True
+    return getattr(getattr(view_func, 'view_class', None), 'read_replica', False)
+
+
+def _max_lag():
+    return getattr(settings, 'REPLICA_MAX_LAG', DEFAULT_MAX_LAG)
+
+
+def _pin_cookie():
+    return getattr(settings, 'REPLICA_PIN_COOKIE', PIN_COOKIE)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def _meta_path():
+    conn = connections[REPLICA_DB_ALIAS]
+    if conn.vendor != 'sqlite' or conn.is_in_memory_db():
+        return None
+    return f"{conn.settings_dict['NAME']}.snapshot"
+
+
+def snapshot_time():
+    """Epoch seconds at which the current replica snapshot was taken, or None."""
+    if not replica_configured():
+        return None
+    path = _meta_path()
+    if path is None:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+    if _snapshot['path'] != path or _snapshot['mtime'] != mtime:
+        try:
+            with open(path, encoding='utf-8') as fh:
+                taken_at = json.load(fh)['taken_at']
+        except (OSError, ValueError, KeyError):
+            return None
+        _snapshot.update(path=path, mtime=mtime, taken_at=taken_at)
+    return _snapshot['taken_at']
+
+
+def replica_lag(now=None):
+    """Seconds the replica is behind the primary, or None without a snapshot."""
+    taken_at = snapshot_time()
+    if taken_at is None:
+        return None
+    return max(0.0, (now or time.time()) - taken_at)
+
+
+def replica_usable(last_write=None, now=None):
+    """Whether reads may use the replica, given the client's last write time."""
+    taken_at = snapshot_time()
+    if taken_at is None:
+        return False
+    if (now or time.time()) - taken_at > _max_lag():
+        return False
+    return last_write is None or taken_at > last_write
+
+
+def refresh_snapshot(source=None, target=None, pages=-1):
+    """
+    Copy the primary database into the replica with the online backup API;
+    returns the snapshot's start time. ``pages`` > 0 copies in steps,
+    letting writers in between (the copy restarts if one does).
+    """
+    source = str(source or connections[DEFAULT_DB_ALIAS].settings_dict['NAME'])
+    target = str(target or connections[REPLICA_DB_ALIAS].settings_dict['NAME'])
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    taken_at = time.time()
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        dst.execute("PRAGMA busy_timeout = 5000")
+        src.backup(dst, pages=pages)
+    finally:
+        dst.close()
+        src.close()
+    meta = f"{target}.snapshot"
+    with open(meta + '.tmp', 'w', encoding='utf-8') as fh:
+        json.dump({'taken_at': taken_at, 'source': source}, fh)
+    os.replace(meta + '.tmp', meta)
+    return taken_at
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Route reads inside the block to the replica when it is fresh enough."""
+    token = _read_alias.set(REPLICA_DB_ALIAS if enabled and replica_usable() else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def use_primary():
+    """Route reads inside the block to the primary, e.g. to build shared caches."""
+    return use_replica(enabled=False)
+
+
+def render_prometheus():
+    lag = replica_lag()
+    if lag is None:
+        return ""
+    name = "careerpath_replica_lag_seconds"
+    return (f"# HELP {name} Age of the read replica snapshot.\n"
+            f"# TYPE {name} gauge\n{name} {lag}\n")
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # the replica gets its schema with each snapshot
+        return db != REPLICA_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    SAFE_METHODS = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _last_write(self, request):
+        try:
+            return float(request.COOKIES[_pin_cookie()])
+        except (KeyError, ValueError):
+            return None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in self.SAFE_METHODS and _opted_in(view_func) \
+                and replica_usable(self._last_write(request)):
+            # the lazy request.user must load from the primary, or a stale
+            # snapshot could show a deleted or demoted account as valid
+            with use_primary():
+                getattr(getattr(request, 'user', None), 'pk', None)
+            _read_alias.set(REPLICA_DB_ALIAS)
+            request.reads_from_replica = True
+
+    def __call__(self, request):
+        request.reads_from_replica = False
+        wrote = []
+
+        def watch_writes(execute, sql, params, many, context):
+            if not wrote and _WRITE_RE.match(sql):
+                wrote.append(True)
+            return execute(sql, params, many, context)
+
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(watch_writes):
+                response = self.get_response(request)
+        finally:
+            _read_alias.set(None)
+        lag = replica_lag() if request.reads_from_replica else None
+        if lag is not None:
+            response['X-Replica-Lag'] = f"{lag:.1f}"
+        # pin the client to the primary after any write, including the
+        # odd GET that creates a row (get_or_create of a profile …)
+        if wrote or request.method not in self.SAFE_METHODS:
+            response.set_cookie(_pin_cookie(), f"{time.time():.3f}", max_age=_max_lag(),
+                                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax')
+        return response
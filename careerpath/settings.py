@@ -49,11 +49,15 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'careerpath.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'careerpath.replica.ReplicaMiddleware',
+    'careerpath.profiling.ProfilingMiddleware',
+    'careerpath.querybudget.QueryBudgetMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
@@ -87,12 +91,38 @@ WSGI_APPLICATION = 'careerpath.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# careerpath.sqlite is Django's SQLite backend plus WAL, tuned pragmas,
+# BEGIN IMMEDIATE transactions and per-process write serialization with
+# retry/backoff (see careerpath/sqlite/base.py). Connections persist for
+# CONN_MAX_AGE seconds.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'careerpath.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {'busy_timeout': 5000},
+        },
+    },
+    # Snapshot of 'default' for read-only views (careerpath/replica.py),
+    # refreshed by `manage.py refresh_replica --interval 30`.
+    'replica': {
+        'ENGINE': 'careerpath.sqlite',
+        'NAME': BASE_DIR / 'cache' / 'replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+DATABASE_ROUTERS = ['careerpath.replica.ReplicaRouter']
+
+# Reads of @read_replica views use the replica while its snapshot is at
+# most REPLICA_MAX_LAG seconds old and newer than the client's last write
+# (stamped in REPLICA_PIN_COOKIE by every POST).
+REPLICA_MAX_LAG    = 120
+REPLICA_PIN_COOKIE = 'db_pin'
 
 
 # Password validation
@@ -128,11 +158,53 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Shared by every worker process on the host, so a version bump made by
+# one process (e.g. invalidate_skill_index in accounts/scoring.py) is seen
+# by all of them. Use a networked backend (Redis, memcached, the database
+# cache) when running on several hosts.
+CACHES = {
+    'default': {
+        'BACKEND':  'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'django',
+    },
+}
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
 
+# Rendered CV PDFs, keyed by a hash of their HTML (see accounts/cv_pdf.py).
+# Shared by all worker processes on the host; least-recently-used entries
+# are evicted past the size bound, checked every 10% of it written.
+CV_PDF_CACHE_DIR       = BASE_DIR / 'cache' / 'cv_pdf'
+CV_PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Per-request metrics (careerpath/metrics.py). Histograms are always kept
+# in memory; set a sample rate > 0 to also append raw records as JSON lines.
+REQUEST_METRICS_LOG         = BASE_DIR / 'requests.jsonl'
+REQUEST_METRICS_SAMPLE_RATE = 0.0
+
+# On-demand request profiles (careerpath/profiling.py): newest N kept.
+REQUEST_PROFILE_DIR  = BASE_DIR / 'cache' / 'profiles'
+REQUEST_PROFILE_KEEP = 200
+
+# Query budgets / N+1 detection (careerpath/querybudget.py). Warnings are
+# logged to 'careerpath.querybudget'; STRICT raises instead, and is always
+# on under the test runner.
+QUERY_BUDGET_ENABLED      = DEBUG
+QUERY_BUDGET_STRICT       = False
+QUERY_BUDGET_REPEAT_LIMIT = 5
+TEST_RUNNER               = 'careerpath.testing.TestRunner'
+
+# Lock files behind careerpath.concurrency.limit_concurrency (host-wide
+# caps on expensive views such as CV downloads).
+CONCURRENCY_LOCK_DIR = BASE_DIR / 'cache' / 'locks'
+
+# 'xhtml2pdf' renders accounts/student_cv_pdf.html; 'reportlab' draws the
+# same layout directly (accounts/cv_reportlab.py) and is much faster.
+CV_PDF_ENGINE = 'xhtml2pdf'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,9 @@
+# careerpath/sqlite/__init__.py
+"""
+SQLite database backend tuned for a multi-process web server.
+
+    DATABASES = {'default': {'ENGINE': 'careerpath.sqlite', ...}}
+
+See ``base.DatabaseWrapper`` for what it changes over Django's built-in
+``django.db.backends.sqlite3``.
+"""
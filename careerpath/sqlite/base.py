@@ -0,0 +1,164 @@
+# careerpath/sqlite/base.py
+"""
+Django's SQLite backend with WAL, tuned pragmas and serialized writes.
+
+- Every new connection switches the database to WAL (readers never wait
+  for a writer and a writer never waits for readers) and applies
+  ``DEFAULT_PRAGMAS``, overridable per key with ``OPTIONS['pragmas']``.
+- ``atomic`` blocks start with ``BEGIN IMMEDIATE`` (``transaction_mode``
+  defaults to IMMEDIATE), so a transaction takes the write lock up front
+  and waits on ``busy_timeout`` for it, instead of reading under a shared
+  lock and failing with "database is locked" when it later tries to write.
+- Writers in one process queue on a per-database ``threading.RLock``
+  rather than all polling SQLite's busy handler; the lock is held from
+  ``BEGIN`` to ``COMMIT``/``ROLLBACK``, or around a single autocommit write
+  statement. Starting a transaction and autocommit writes are retried with
+  jittered exponential backoff while another process holds the database
+  (``OPTIONS['write_retries']``, ``['write_backoff']``,
+  ``['write_lock_timeout']``).
+
+Combine with ``CONN_MAX_AGE`` so connections (and their page cache and
+mmap) persist across requests.
+"""
+import random
+import re
+import threading
+import time
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base as sqlite3_base
+from django.db.backends.sqlite3.base import Database
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous':  'NORMAL',       # durable at checkpoints; safe with WAL
+    'busy_timeout': 5000,           # ms SQLite itself waits for a lock
+    'cache_size':   -64000,         # KiB (negative) of page cache per connection
+    'mmap_size':    256 * 1024 * 1024,
+    'temp_store':   'MEMORY',
+}
+
+WRITE_RETRIES      = 5
+WRITE_BACKOFF      = 0.05           # seconds; doubled per retry, jittered
+WRITE_LOCK_TIMEOUT = 30.0           # seconds a thread waits for its process's write lock
+
+_WRITE_RE = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b', re.IGNORECASE)
+
+_locks      = {}
+_locks_lock = threading.Lock()
+
+
+def write_lock(name):
+    """The per-process write lock for database file ``name``."""
+    with _locks_lock:
+        return _locks.setdefault(str(name), threading.RLock())
+
+
+def is_locked_error(exc):
+    return 'locked' in str(exc)
+
+
+def retry_locked(func, retries=WRITE_RETRIES, backoff=WRITE_BACKOFF):
+    """Call ``func``, retrying with jittered exponential backoff while the database is locked."""
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except (Database.OperationalError, OperationalError) as exc:
+            if attempt == retries or not is_locked_error(exc):
+                raise
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+
+class DatabaseWrapper(sqlite3_base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._holds_write_lock = False
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas            = {**DEFAULT_PRAGMAS, **kwargs.pop('pragmas', {})}
+        self.write_retries      = kwargs.pop('write_retries', WRITE_RETRIES)
+        self.write_backoff      = kwargs.pop('write_backoff', WRITE_BACKOFF)
+        self.write_lock_timeout = kwargs.pop('write_lock_timeout', WRITE_LOCK_TIMEOUT)
+        if self.transaction_mode is None:
+            self.transaction_mode = 'IMMEDIATE'
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            if name == 'journal_mode' and self.is_in_memory_db():
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SerializedCursorWrapper)
+        cursor.db = self
+        return cursor
+
+    # ---- write lock ----
+
+    def _lock(self):
+        return write_lock(self.settings_dict['NAME'])
+
+    def _acquire_write_lock(self):
+        if not self._lock().acquire(timeout=self.write_lock_timeout):
+            raise OperationalError("database is locked (timed out waiting for the process write lock)")
+
+    def _release_write_lock(self):
+        if self._holds_write_lock:
+            self._holds_write_lock = False
+            self._lock().release()
+
+    def _start_transaction_under_autocommit(self):
+        self._acquire_write_lock()
+        try:
+            retry_locked(super()._start_transaction_under_autocommit,
+                         self.write_retries, self.write_backoff)
+        except BaseException:
+            self._lock().release()
+            raise
+        self._holds_write_lock = True
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_write_lock()
+
+
+class SerializedCursorWrapper(sqlite3_base.SQLiteCursorWrapper):
+    """Autocommit write statements take the process write lock and retry while locked."""
+
+    db = None
+
+    def _serialized(self, query, run):
+        if self.db is None or self.db.in_atomic_block or not _WRITE_RE.match(query):
+            return run()
+        self.db._acquire_write_lock()
+        try:
+            return retry_locked(run, self.db.write_retries, self.db.write_backoff)
+        finally:
+            self.db._lock().release()
+
+    def execute(self, query, params=None):
+        parent = super(SerializedCursorWrapper, self)
+        return self._serialized(query, lambda: parent.execute(query, params))
+
+    def executemany(self, query, param_list):
+        parent = super(SerializedCursorWrapper, self)
+        param_list = list(param_list)   # replayable on retry
+        return self._serialized(query, lambda: parent.executemany(query, param_list))
@@ -0,0 +1,41 @@
+# careerpath/testing.py
+"""
+Test-only helpers; nothing outside the test suites imports this module.
+
+``TestRunner`` (settings.TEST_RUNNER) turns on ``QUERY_BUDGET_STRICT`` for
+the run, so any request a test makes that goes over its view's query
+budget, or repeats a query shape, fails instead of logging a warning.
+``QueryBudgetTestMixin.assertWithinBudget`` applies the same checks to one
+request and reports them as a test failure.
+"""
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .querybudget import QueryBudgetExceeded, budget_for, check
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_BUDGET_STRICT = True
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin: fetch a URL and fail on budget overruns or N+1 shapes."""
+
+    repeat_limit = 5
+
+    def assertWithinBudget(self, url, method='get', data=None, **extra):
+        func = resolve(url.split('?')[0]).func
+        budget = budget_for(func, method)
+        self.assertIsNotNone(budget, f"{url} declares no {method.upper()} query budget")
+        with CaptureQueriesContext(connections['default']) as ctx:
+            response = getattr(self.client, method)(url, data or {}, **extra)
+        sqls = [q['sql'] for q in ctx.captured_queries]
+        problems = check(url, budget, sqls, self.repeat_limit)
+        if problems:
+            raise QueryBudgetExceeded("\n".join(problems))
+        return response
@@ -0,0 +1,291 @@
+# positions/importer.py
+"""
+Streaming bulk import of position catalogues from CSV or JSON lines.
+
+CSV files have a header row with the columns ``title``, ``company``,
+``description``, ``status``, ``tags`` and ``skills``. In CSV, tags are
+separated by ``;`` and skills are written ``name:level:importance``,
+separated by ``;``. JSONL rows carry the same keys, with ``tags`` as a
+list of names and ``skills`` as a list of
+``{"name", "level", "importance", "category"}`` objects or of the CSV
+strings. ``level`` is low/medium/high or a percentage (default medium),
+``importance`` runs from 1 to 5 (default 3), and ``status`` defaults to
+the importer's ``status`` argument.
+
+Rows are parsed one at a time and written ``batch_size`` at a time, one
+transaction per batch:
+  - missing Skill and Tag names are created in bulk, then resolved
+    through in-memory name → pk maps;
+  - positions are written with ``bulk_create``, then their tag links and
+    requirements the same way.
+Memory stays flat whatever the file size. A bad row is reported with its
+line number and skipped; the rest of the file still imports.
+
+Bulk writes skip the model signals, so the importer brings the derived
+data up to date once, at the end:
+  - the SkillIndex version;
+  - the skill-gap demand of the posted positions, added up over the
+    whole file (an import that dies half-way leaves the counters to
+    ``rebuild_skill_gaps``);
+  - unless ``refresh`` is off, the stored matches of the new positions.
+TopMatch is left to the nightly ``compute_top_matches``. With ``publish``
+off, rows marked posted are imported as drafts, so nothing goes live
+before it is scored; publishing them later rescores each one.
+"""
+import csv
+import json
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from django.db import transaction
+
+from accounts import skill_gaps
+from accounts.matches import refresh_matches_for_positions
+from accounts.scoring import invalidate_skill_index
+from .models import Position, PositionSkillRequirement, Skill, Tag
+
+BATCH_SIZE         = 1000
+MAX_ERRORS         = 1000       # row errors kept in the report (all are counted)
+FORMATS            = ('csv', 'jsonl')
+LEVEL_PCT          = {'low': 40, 'medium': 75, 'high': 100}
+DEFAULT_LEVEL_PCT  = 75
+DEFAULT_IMPORTANCE = 3
+STATUSES           = dict(Position.STATUS_CHOICES)
+CATEGORIES         = dict(Skill.CATEGORY_CHOICES)
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(filename):
+    """'csv' or 'jsonl' from a file name, or None."""
+    name = filename.lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return None
+
+
+# ---------- parsing ----------
+
+def _text(row, key, max_length, required=False):
+    value = str(row.get(key) or '').strip()
+    if required and not value:
+        raise RowError(f"{key} is required")
+    if len(value) > max_length:
+        raise RowError(f"{key} is longer than {max_length} characters")
+    return value
+
+
+def _split(value):
+    if isinstance(value, list):
+        return value
+    return [part for part in str(value or '').split(';') if part.strip()]
+
+
+def _skill(item):
+    """``(name, category, level_pct, importance)`` from one skill entry."""
+    if isinstance(item, dict):
+        name, level, importance = item.get('name'), item.get('level'), item.get('importance')
+        category = item.get('category')
+    else:
+        name, level, importance = (str(item).split(':') + [None, None])[:3]
+        category = None
+    name = str(name or '').strip()
+    if not name or len(name) > 100:
+        raise RowError(f"bad skill name {name!r}")
+
+    level = str(level).strip().lower() if level not in (None, '') else None
+    if level is None:
+        level_pct = DEFAULT_LEVEL_PCT
+    elif level in LEVEL_PCT:
+        level_pct = LEVEL_PCT[level]
+    elif level.isdigit() and 1 <= int(level) <= 100:
+        level_pct = int(level)
+    else:
+        raise RowError(f"bad level {level!r} for skill {name!r}")
+
+    importance = str(importance).strip() if importance not in (None, '') else None
+    if importance is None:
+        importance = DEFAULT_IMPORTANCE
+    elif importance.isdigit() and 1 <= int(importance) <= 5:
+        importance = int(importance)
+    else:
+        raise RowError(f"bad importance {importance!r} for skill {name!r}")
+    return name, category if category in CATEGORIES else None, level_pct, importance
+
+
+def parse_row(row, default_status):
+    """A validated position record from one CSV/JSONL row; raises RowError."""
+    if not isinstance(row, dict):
+        raise RowError("not an object")
+    status = _text(row, 'status', 10) or default_status
+    if status not in STATUSES:
+        raise RowError(f"unknown status {status!r}")
+    tags = []
+    for name in _split(row.get('tags')):
+        name = str(name).strip()
+        if len(name) > 50:
+            raise RowError(f"tag {name[:20]!r}… is longer than 50 characters")
+        if name and name not in tags:
+            tags.append(name)
+    skills = [_skill(item) for item in _split(row.get('skills'))]
+    names  = Counter(name for name, *_ in skills)
+    if names and names.most_common(1)[0][1] > 1:
+        raise RowError(f"skill {names.most_common(1)[0][0]!r} listed twice")
+    return SimpleNamespace(
+        title=_text(row, 'title', 200, required=True),
+        company=_text(row, 'company', 200, required=True),
+        description=str(row.get('description') or ''),
+        status=status,
+        tags=tags,
+        skills=skills,
+    )
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line number, row dict or RowError)`` from a text stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as exc:
+                yield line_no, RowError(f"invalid JSON: {exc}")
+
+
+# ---------- writing ----------
+
+class NameLookup:
+    """In-memory name → pk map for Skill or Tag, creating missing names in bulk."""
+
+    def __init__(self, model):
+        self.model   = model
+        self.pks     = dict(model.objects.values_list('name', 'pk'))
+        self.created = 0
+
+    def resolve(self, names):
+        """Make sure every name in ``names`` (name → create kwargs) has a pk."""
+        missing = {name: kwargs for name, kwargs in names.items() if name not in self.pks}
+        if not missing:
+            return
+        self.model.objects.bulk_create(
+            [self.model(name=name, **kwargs) for name, kwargs in missing.items()],
+            ignore_conflicts=True,      # created concurrently
+        )
+        found = dict(self.model.objects.filter(name__in=missing).values_list('name', 'pk'))
+        self.created += len(found)
+        self.pks.update(found)
+
+
+def _write_batch(records, skills, tags, demand):
+    """Insert one batch of parsed records, adding posted ones to ``demand``; returns the new position ids."""
+    skills.resolve({name: {'category': category or 'coding'}
+                    for r in records for name, category, _, _ in r.skills})
+    tags.resolve({name: {} for r in records for name in r.tags})
+    with transaction.atomic():
+        positions = Position.objects.bulk_create([
+            Position(title=r.title, company=r.company, description=r.description, status=r.status)
+            for r in records
+        ])
+        Position.tags.through.objects.bulk_create([
+            Position.tags.through(position_id=pos.pk, tag_id=tags.pks[name])
+            for pos, r in zip(positions, records) for name in r.tags
+        ])
+        PositionSkillRequirement.objects.bulk_create([
+            PositionSkillRequirement(position_id=pos.pk, skill_id=skills.pks[name],
+                                     level_pct=level_pct, importance=importance)
+            for pos, r in zip(positions, records) for name, _, level_pct, importance in r.skills
+        ])
+    for r in records:
+        if r.status == 'posted':
+            demand.update(skill_gaps.requirement_counts(
+                (skills.pks[name], level_pct) for name, _, level_pct, _ in r.skills
+            ))
+    return [pos.pk for pos in positions]
+
+
+def import_positions(stream, fmt, status='draft', batch_size=BATCH_SIZE, refresh=True, publish=True,
+                     log=None):
+    """
+    Import every row of ``stream`` (a text file in ``fmt``) and return a
+    report: counts (``unpublished``: posted rows held back as drafts), the
+    first MAX_ERRORS ``(line, message)`` row errors and the elapsed time.
+    Undecodable input stops the import at that line; the batches written
+    before it are kept.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}.")
+    log     = log or (lambda message: None)
+    started = time.perf_counter()
+    report  = SimpleNamespace(rows=0, created=0, failed=0, errors=[], requirements=0,
+                              skills_created=0, tags_created=0, matches=0, unpublished=0,
+                              elapsed=0.0)
+    skills, tags = NameLookup(Skill), NameLookup(Tag)
+    created_ids  = []
+    demand       = Counter()
+
+    def fail(line_no, message):
+        report.failed += 1
+        if len(report.errors) < MAX_ERRORS:
+            report.errors.append((line_no, message))
+
+    def flush(batch):
+        try:
+            created_ids.extend(_write_batch([r for _, r in batch], skills, tags, demand))
+        except Exception as exc:    # the batch rolled back; report every row in it
+            for line_no, _ in batch:
+                fail(line_no, f"batch failed: {exc}")
+            return
+        report.created      += len(batch)
+        report.requirements += sum(len(r.skills) for _, r in batch)
+        log(f"{report.created} positions imported")
+
+    batch   = []
+    line_no = 0
+    rows    = read_rows(stream, fmt)
+    while True:
+        try:
+            line_no, row = next(rows)
+        except StopIteration:
+            break
+        except (UnicodeDecodeError, csv.Error) as exc:     # unreadable from here on
+            report.errors.append((line_no + 1, f"stopped reading the file: {exc}"))
+            break
+        report.rows += 1
+        try:
+            if isinstance(row, RowError):
+                raise row
+            record = parse_row(row, status)
+        except RowError as exc:
+            fail(line_no, str(exc))
+            continue
+        if not publish and record.status == 'posted':
+            record.status = 'draft'
+            report.unpublished += 1
+        batch.append((line_no, record))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    with transaction.atomic():
+        skill_gaps.bulk_adjust('demand', demand)
+    report.skills_created = skills.created
+    report.tags_created   = tags.created
+    if created_ids:
+        invalidate_skill_index()
+    if refresh and created_ids:
+        report.matches = refresh_matches_for_positions(created_ids)
+        log(f"matches: {report.matches} rows")
+    report.elapsed = time.perf_counter() - started
+    return report
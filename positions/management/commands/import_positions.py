@@ -0,0 +1,57 @@
+# positions/management/commands/import_positions.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from positions.importer import BATCH_SIZE, FORMATS, STATUSES, detect_format, import_positions
+
+
+class Command(BaseCommand):
+    help = ("Bulk-import positions with their tags and skill requirements from a CSV or JSONL "
+            "file (see positions/importer.py for the columns), reporting bad rows by line.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS,
+                            help="File format (default: from the file extension).")
+        parser.add_argument('--status', choices=STATUSES, default='draft',
+                            help="Status of rows that do not set one.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help="Positions per bulk insert; one transaction per batch.")
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Do not refresh the new positions' matches (run rebuild_matches "
+                                 "afterwards); they dominate large imports.")
+        parser.add_argument('--show-errors', type=int, default=20,
+                            help="Row errors to print.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def log(message):
+            self.stdout.write(f"[{time.perf_counter() - started:7.1f}s] {message}")
+
+        fmt = options['format'] or detect_format(options['path'])
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format.")
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as fh:
+                report = import_positions(
+                    fh, fmt,
+                    status=options['status'],
+                    batch_size=options['batch_size'],
+                    refresh=not options['skip_derived'],
+                    log=log,
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for line_no, message in report.errors[:options['show_errors']]:
+            self.stderr.write(f"line {line_no}: {message}")
+        if report.failed > options['show_errors']:
+            self.stderr.write(f"… {report.failed - options['show_errors']} more row errors")
+        style = self.style.SUCCESS if not report.failed else self.style.WARNING
+        self.stdout.write(style(
+            f"Imported {report.created} of {report.rows} positions ({report.requirements} requirements, "
+            f"{report.skills_created} new skills, {report.tags_created} new tags, "
+            f"{report.failed} failed) in {report.elapsed:.1f}s."
+        ))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.2 on 2026-10-16 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('positions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='position',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='position_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='position',
+            index=models.Index(fields=['status', 'company', 'id'], name='position_status_company_idx'),
+        ),
+    ]
@@ -47,6 +47,13 @@ class Position(models.Model):
     created_at  = models.DateTimeField(auto_now_add=True)
     updated_at  = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # keyset pagination on the student browse page
+        indexes = [
+            models.Index(fields=['status', '-created_at', '-id'], name='position_status_created_idx'),
+            models.Index(fields=['status', 'company', 'id'],      name='position_status_company_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} at {self.company}"
 
@@ -0,0 +1,155 @@
+# positions/requirement_edits.py
+"""
+Batched editing of a position's skill requirements (wizard step 2).
+
+A diff of additions, changes and removals, taken from the step-2 form or
+a JSON body, is applied in one transaction. The removals are one DELETE,
+the changed rows (only those whose level or importance really moves) one
+``bulk_update`` and the additions one ``bulk_create``. Bulk writes skip
+the model signals (the DELETE mutes them with ``signals.muted()``), so the
+derived data they would have updated is refreshed here once per diff: the shared SkillIndex version, the
+skill-gap demand counters (posted positions only) and the position's
+stored match scores.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from accounts import signals, skill_gaps
+from accounts.matches import refresh_position_matches
+from accounts.scoring import invalidate_skill_index
+from .models import PositionSkillRequirement, Skill
+
+LEVEL_PCT          = {'low': 40, 'medium': 75, 'high': 100}
+PCT_LEVEL          = {pct: level for level, pct in LEVEL_PCT.items()}
+DEFAULT_LEVEL_PCT  = 75
+DEFAULT_IMPORTANCE = 3
+
+
+class RequirementDiffError(ValueError):
+    pass
+
+
+def _values(prof, importance):
+    """``(level_pct, importance)`` from submitted values; None where absent or invalid."""
+    importance = str(importance) if importance is not None else ''
+    return LEVEL_PCT.get(prof), (max(1, min(5, int(importance))) if importance.isdigit() else None)
+
+
+def diff_from_post(post):
+    """
+    ``(add, update, delete)`` from the step-2 form: ``add_skill_id``
+    (repeatable), ``prof_<pk>``, ``importance_<pk>`` and ``delete_<pk>=on``.
+    """
+    add, update, delete = {}, {}, set()
+    try:
+        for sid in post.getlist('add_skill_id'):
+            add[int(sid)] = (None, None)
+    except ValueError:
+        raise RequirementDiffError("Bad skill id.")
+    for key, value in post.items():
+        prefix, _, pk = key.partition('_')
+        if not pk.isdigit():
+            continue
+        if prefix == 'delete' and value == 'on':
+            delete.add(int(pk))
+        elif prefix in ('prof', 'importance'):
+            update.setdefault(int(pk), _values(post.get(f'prof_{pk}'), post.get(f'importance_{pk}')))
+    return add, update, delete
+
+
+def diff_from_json(data):
+    """
+    ``(add, update, delete)`` from ``{"add": {"<skill_id>": {...}}, "update":
+    {"<pk>": {...}}, "delete": [pk, …]}``, where each ``{...}`` may hold
+    ``proficiency`` (low/medium/high) and ``importance`` (1–5).
+    """
+    try:
+        add    = {int(sid): _values(v.get('proficiency'), v.get('importance'))
+                  for sid, v in (data.get('add') or {}).items()}
+        update = {int(pk): _values(v.get('proficiency'), v.get('importance'))
+                  for pk, v in (data.get('update') or {}).items()}
+        delete = {int(pk) for pk in (data.get('delete') or [])}
+    except (TypeError, ValueError, AttributeError):
+        raise RequirementDiffError("Malformed requirements diff.")
+    return add, update, delete
+
+
+def apply_requirement_diff(position, add=None, update=None, delete=()):
+    """
+    Apply a diff to ``position``'s requirements; returns how many rows
+    changed. ``add`` and ``update`` map skill ids / requirement pks to
+    ``(level_pct, importance)`` pairs, None keeping the current (or
+    default) value; adding a required skill updates it. A requirement both
+    deleted and updated is deleted. The diff is checked against the rows as
+    read inside the transaction that writes it, so the demand counters move
+    from the values actually replaced.
+    """
+    delete  = set(delete)
+    with transaction.atomic():
+        current = {r.pk: r for r in position.requirements.all()}
+        unknown = (set(update or {}) | delete) - current.keys()
+        if unknown:
+            raise RequirementDiffError(f"Unknown requirements: {sorted(unknown)}.")
+
+        update = {pk: values for pk, values in (update or {}).items() if pk not in delete}
+        held   = {r.skill_id: pk for pk, r in current.items() if pk not in delete}
+        new    = {}
+        for skill_id, values in (add or {}).items():
+            if skill_id in held:
+                update.setdefault(held[skill_id], values)
+            else:
+                new[skill_id] = values
+        if new:
+            missing = new.keys() - set(Skill.objects.filter(pk__in=new).values_list('pk', flat=True))
+            if missing:
+                raise RequirementDiffError(f"Unknown skills: {sorted(missing)}.")
+
+        posted  = position.status == 'posted'
+        demand  = Counter()
+        changed = []
+        for pk, (level_pct, importance) in update.items():
+            r = current[pk]
+            level_pct  = r.level_pct if level_pct is None else level_pct
+            importance = r.importance if importance is None else importance
+            if (level_pct, importance) == (r.level_pct, r.importance):
+                continue
+            if posted:
+                demand.update(skill_gaps.requirement_counts([(r.skill_id, r.level_pct)], sign=-1))
+                demand.update(skill_gaps.requirement_counts([(r.skill_id, level_pct)]))
+            r.level_pct, r.importance = level_pct, importance
+            changed.append(r)
+        created = [
+            PositionSkillRequirement(
+                position=position, skill_id=skill_id,
+                level_pct=DEFAULT_LEVEL_PCT if level_pct is None else level_pct,
+                importance=DEFAULT_IMPORTANCE if importance is None else importance,
+            )
+            for skill_id, (level_pct, importance) in new.items()
+        ]
+        if not (delete or changed or created):
+            return 0
+        if posted:
+            demand.update(skill_gaps.requirement_counts(
+                [(current[pk].skill_id, current[pk].level_pct) for pk in delete], sign=-1))
+            demand.update(skill_gaps.requirement_counts([(r.skill_id, r.level_pct) for r in created]))
+
+        if delete:      # before the inserts: a removed skill may be re-added
+            with signals.muted():
+                PositionSkillRequirement.objects.filter(pk__in=delete).delete()
+        if changed:
+            PositionSkillRequirement.objects.bulk_update(changed, ['level_pct', 'importance'])
+        if created:
+            PositionSkillRequirement.objects.bulk_create(created)
+        skill_gaps.bulk_adjust('demand', demand)
+        refresh_position_matches(position)
+    invalidate_skill_index()
+    return len(delete) + len(changed) + len(created)
+
+
+def with_normalized_weights(requirements):
+    """Set ``weight_norm`` (% of total importance) on each requirement; returns the total."""
+    total = sum(r.importance for r in requirements)
+    for r in requirements:
+        r.weight_norm = round((r.importance / total * 100) if total else 0, 1)
+    return total
@@ -1,3 +1,220 @@
+import random
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from accounts.testing import DerivedDataTestMixin
+from accounts.models import StudentProfile, StudentSkill
+from accounts.scoring import requirement_contribution
+from careerpath.testing import QueryBudgetTestMixin
+from .models import Position, PositionSkillRequirement, Skill
+
+User = get_user_model()
+
+
+class TalentSearchTests(TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.skills = [Skill.objects.create(name=f'Skill {i}') for i in range(6)]
+        self.position = Position.objects.create(title='Engineer', company='Acme', status='posted')
+        for sk in self.skills[:4]:
+            PositionSkillRequirement.objects.create(
+                position=self.position, skill=sk,
+                level_pct=rng.choice([40, 75, 100]), importance=rng.randint(1, 5),
+            )
+        self.profiles = []
+        for i in range(40):
+            user = User.objects.create(username=f'student{i}', email=f's{i}@example.com')
+            profile = StudentProfile.objects.create(user=user)
+            for sk in rng.sample(self.skills, rng.randint(0, 4)):
+                StudentSkill.objects.create(profile=profile, skill=sk,
+                                            proficiency=rng.choice(['low', 'medium', 'high']))
+            self.profiles.append(profile)
+        self.admin = User.objects.create(username='boss', is_admin=True)
+
+    def _brute_force(self, min_score):
+        reqs  = list(self.position.requirements.all())
+        total = sum(r.importance for r in reqs)
+        out   = []
+        for profile in self.profiles:
+            prof  = {ss.skill_id: ss.proficiency for ss in profile.student_skills.all()}
+            score = sum(requirement_contribution(r.importance / total * 100, r.level_pct, prof.get(r.skill_id))
+                        for r in reqs)
+            if score > 0 and score >= min_score:
+                out.append((profile.pk, score))
+        return sorted(out, key=lambda t: (-t[1], t[0]))
+
+    def test_threshold_search_matches_brute_force(self):
+        self.client.force_login(self.admin)
+        url = reverse('positions:talent', args=[self.position.pk])
+        for threshold in (0, 30, 70, 100):
+            data = self.client.get(url, {'min_score': threshold, 'format': 'json'}).json()
+            expected = self._brute_force(threshold)
+            self.assertEqual(data['count'], len(expected))
+            self.assertEqual([r['profile_id'] for r in data['results']],
+                             [pid for pid, _ in expected][:50])
+
+
+class RequirementEditTests(QueryBudgetTestMixin, DerivedDataTestMixin, TestCase):
+    def setUp(self):
+        from accounts.matches import rebuild_all_matches
+        from accounts.skill_gaps import rebuild_skill_gaps
+
+        self.skills   = [Skill.objects.create(name=f'Skill {i}') for i in range(6)]
+        self.position = Position.objects.create(title='Engineer', company='Acme', status='posted')
+        self.reqs     = [
+            PositionSkillRequirement.objects.create(position=self.position, skill=sk, level_pct=75, importance=i + 1)
+            for i, sk in enumerate(self.skills[:3])
+        ]
+        for i in range(5):
+            profile = StudentProfile.objects.create(user=User.objects.create(username=f'student{i}'))
+            for sk in self.skills[i % 2::2]:
+                StudentSkill.objects.create(profile=profile, skill=sk, proficiency=('low', 'medium', 'high')[i % 3])
+        rebuild_all_matches()
+        rebuild_skill_gaps()
+        self.client.force_login(User.objects.create(username='boss', is_admin=True))
+        self.url = reverse('positions:new_skills', args=[self.position.pk])
+
+    def test_json_diff_writes_only_changed_rows_and_returns_weights(self):
+        import json
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        diff = {
+            'add':    {str(self.skills[3].pk): {'proficiency': 'high', 'importance': 5},
+                       str(self.skills[4].pk): {}},
+            'update': {str(self.reqs[0].pk): {'importance': 4},
+                       str(self.reqs[1].pk): {'proficiency': 'medium', 'importance': 2}},     # unchanged
+            'delete': [self.reqs[2].pk],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.assertWithinBudget(self.url, method='post', data=json.dumps(diff),
+                                               content_type='application/json')
+        data = response.json()
+        self.assertEqual(data['changed'], 4)
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "positions_')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn(f'= {self.reqs[1].pk})', updates[0])
+
+        rows = {r['skill_id']: r for r in data['requirements']}
+        self.assertEqual(sorted(rows), sorted(sk.pk for sk in self.skills[:2] + self.skills[3:5]))
+        self.assertEqual((rows[self.skills[3].pk]['level_pct'], rows[self.skills[3].pk]['importance']), (100, 5))
+        self.assertEqual((rows[self.skills[4].pk]['level_pct'], rows[self.skills[4].pk]['importance']), (75, 3))
+        self.assertEqual(data['total_importance'], 4 + 2 + 5 + 3)
+        review = self.client.get(reverse('positions:new_review', args=[self.position.pk]))
+        self.assertEqual({r['pk']: r['weight_norm'] for r in data['requirements']},
+                         {r.pk: r.weight_norm for r in review.context['requirements_with_weight']})
+        self.assertDerivedDataCurrent()
+
+    def test_form_submit_applies_edits_and_removals(self):
+        response = self.client.post(self.url, {
+            f'prof_{self.reqs[0].pk}': 'high', f'importance_{self.reqs[0].pk}': '9',
+            f'prof_{self.reqs[1].pk}': 'low',  f'delete_{self.reqs[1].pk}': 'on',
+            f'prof_{self.reqs[2].pk}': 'medium',
+        })
+        self.assertRedirects(response, reverse('positions:new_review', args=[self.position.pk]),
+                             fetch_redirect_response=False)
+        self.assertEqual(
+            list(self.position.requirements.order_by('pk').values_list('skill_id', 'level_pct', 'importance')),
+            [(self.skills[0].pk, 100, 5), (self.skills[2].pk, 75, 3)],
+        )
+        self.assertDerivedDataCurrent()
+
+    def test_review_step_publishes_and_unpublishes_stored_scores(self):
+        from accounts.models import StudentPositionMatch
+
+        review = reverse('positions:new_review', args=[self.position.pk])
+        self.client.post(review, {'action': 'draft'})
+        self.assertFalse(StudentPositionMatch.objects.filter(position=self.position).exists())
+        self.assertDerivedDataCurrent()
+        self.client.post(review, {'action': 'post'})
+        self.assertTrue(StudentPositionMatch.objects.filter(position=self.position).exists())
+        self.assertDerivedDataCurrent()
+
+    def test_stale_form_submit_returns_to_step_two_with_the_error(self):
+        stale = self.reqs[1].pk
+        self.reqs[1].delete()
+        response = self.client.post(self.url, {
+            f'prof_{self.reqs[0].pk}': 'high', f'delete_{stale}': 'on',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertTemplateUsed(response, 'positions/position_step2.html')
+        self.assertContains(response, f'Unknown requirements: [{stale}]', status_code=400)
+        self.assertEqual(self.position.requirements.get(pk=self.reqs[0].pk).level_pct, 75)
+
+        response = self.client.post(self.url, {f'delete_{stale}': 'on'},
+                                    headers={'x-requested-with': 'XMLHttpRequest'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+
+
+class PositionImportTests(DerivedDataTestMixin, TestCase):
+    CSV = (
+        "title,company,description,status,tags,skills\n"
+        "Data Engineer,Acme,Pipelines,posted,Remote; Data,Skill 0:high:5; Spark:60\n"
+        ",Acme,,posted,,Skill 0\n"
+        "ML Intern,Initech,,,AI,Skill 1:low; Skill 1:high\n"
+        "Analyst,Initech,,posted,Data,Skill 1:medium:2; SQL\n"
+        "Tester,Acme,,bogus,,\n"
+    )
+
+    def setUp(self):
+        from accounts.skill_gaps import rebuild_skill_gaps
+
+        self.skills = [Skill.objects.create(name=f'Skill {i}') for i in range(2)]
+        for i in range(4):
+            profile = StudentProfile.objects.create(user=User.objects.create(username=f'student{i}'))
+            StudentSkill.objects.create(profile=profile, skill=self.skills[i % 2], proficiency='high')
+        rebuild_skill_gaps()
+
+    def test_csv_import_reports_bad_rows_and_creates_names(self):
+        import io
+        from unittest import mock
+        from .importer import import_positions
+
+        with mock.patch('accounts.matches.BATCH_SIZE', 2):     # flush matches mid-chunk
+            report = import_positions(io.StringIO(self.CSV), 'csv', batch_size=1)
+        self.assertEqual((report.rows, report.created, report.failed), (5, 2, 3))
+        self.assertEqual([line for line, _ in report.errors], [3, 4, 6])
+        self.assertIn('title is required', report.errors[0][1])
+        self.assertEqual((report.skills_created, report.tags_created), (2, 2))
+
+        pos = Position.objects.get(title='Data Engineer')
+        self.assertEqual(sorted(pos.tags.values_list('name', flat=True)), ['Data', 'Remote'])
+        self.assertEqual(
+            sorted(pos.requirements.values_list('skill__name', 'level_pct', 'importance')),
+            [('Skill 0', 100, 5), ('Spark', 60, 3)],
+        )
+        self.assertEqual(Position.objects.get(title='Analyst').status, 'posted')
+        self.assertDerivedDataCurrent()
+
+    def test_admin_upload_imports_jsonl(self):
+        import json
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from accounts.models import StudentPositionMatch
+
+        rows = [
+            {'title': 'Backend Dev', 'company': 'Acme', 'tags': ['Remote'],
+             'skills': [{'name': 'Skill 1', 'level': 'high', 'importance': 4},
+                        {'name': 'Rust', 'category': 'coding'}]},
+            {'title': 'Lead', 'company': 'Acme', 'skills': [{'name': 'Skill 0', 'importance': 9}]},
+        ]
+        body = "\n".join(json.dumps(row) for row in rows) + "\n{not json\n"
+        self.client.force_login(User.objects.create(username='boss', is_admin=True))
+        response = self.client.post(reverse('positions:import'), {
+            'status': 'posted',
+            'file':   SimpleUploadedFile('positions.jsonl', body.encode()),
+        })
+        report = response.context['report']
+        self.assertEqual((report.created, report.failed, report.unpublished), (1, 2, 1))
+        self.assertEqual([line for line, _ in report.errors], [2, 3])
+        pos = Position.objects.get(title='Backend Dev')
+        self.assertEqual(pos.status, 'draft')                       # held back until scored
+        self.assertTrue(Skill.objects.filter(name='Rust').exists())
+        self.assertContains(response, '1 rows marked posted were imported as drafts')
+        self.assertDerivedDataCurrent()
 
-# Create your tests here.
+        self.client.post(reverse('positions:new_review', args=[pos.pk]), {'action': 'post'})
+        self.assertTrue(StudentPositionMatch.objects.filter(position=pos).exists())
+        self.assertDerivedDataCurrent()
@@ -5,8 +5,10 @@ from .views import (
     PositionStep1View,
     PositionSkillsView,
     PositionReviewView,
+    PositionTalentView,
     PositionDeleteView,
     PositionStatusView,
+    PositionImportView,
     create_tag,
     create_skill,
 )
@@ -19,8 +21,10 @@ urlpatterns = [
     path('<int:pk>/edit/',     PositionStep1View.as_view(),       name='edit'),
     path('<int:pk>/skills/',   PositionSkillsView.as_view(),      name='new_skills'),
     path('<int:pk>/review/',   PositionReviewView.as_view(),      name='new_review'),
+    path('<int:pk>/talent/',   PositionTalentView.as_view(),      name='talent'),
     path('<int:pk>/delete/',   PositionDeleteView.as_view(),      name='delete'),
     path('<int:pk>/status/',   PositionStatusView.as_view(),      name='status'),
+    path('import/',            PositionImportView.as_view(),      name='import'),
     path('tags/create/',       create_tag,                        name='create_tag'),
     path('skills/create/',     create_skill,                      name='create_skill'),
 ]
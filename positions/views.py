@@ -1,14 +1,27 @@
+import io
+import json
+
+from django.db.models                import Prefetch
 from django.shortcuts               import render, get_object_or_404, redirect
 from django.views                   import View
 from django.views.generic           import ListView, FormView, DetailView, DeleteView
 from django.contrib.auth.mixins     import UserPassesTestMixin
 from django.http                    import JsonResponse, Http404, HttpResponseBadRequest
+from django.core.paginator          import Paginator
 from django.views.decorators.http   import require_POST
 from django.urls                    import reverse_lazy
 from django.utils.decorators        import method_decorator
 from django.views.decorators.cache  import never_cache
 
+from accounts.matches import refresh_position_matches
+from accounts.models  import StudentProfile
+from accounts.scoring import rank_students
+from accounts.skill_gaps import position_gaps
+from .importer import MAX_ERRORS, STATUSES, detect_format, import_positions
 from .models import Position, Tag, Skill, PositionSkillRequirement
+from .requirement_edits import (
+    PCT_LEVEL, apply_requirement_diff, diff_from_json, diff_from_post, with_normalized_weights,
+)
 from .forms  import PositionStep1Form, SkillForm, TagForm
 
 
@@ -25,6 +38,7 @@ class PositionListView(AdminRequiredMixin, ListView):
     model               = Position
     template_name       = 'positions/position_list.html'
     context_object_name = 'positions'
+    query_budget        = 6
 
     def get_queryset(self):
         qs = super().get_queryset().order_by('-created_at')
@@ -48,11 +62,14 @@ class PositionStep1View(AdminRequiredMixin, FormView):
     """
     template_name = 'positions/position_step1.html'
     form_class    = PositionStep1Form
+    query_budget  = 9
 
     def dispatch(self, request, *args, **kwargs):
-        self.position = None
+        self.position   = None
+        self.was_posted = False
         if 'pk' in kwargs:
-            self.position = get_object_or_404(Position, pk=kwargs['pk'])
+            self.position   = get_object_or_404(Position, pk=kwargs['pk'])
+            self.was_posted = self.position.status == 'posted'
         return super().dispatch(request, *args, **kwargs)
 
     def get_form_kwargs(self):
@@ -74,65 +91,81 @@ class PositionStep1View(AdminRequiredMixin, FormView):
 
     def form_valid(self, form):
         pos = form.save()
+        if (pos.status == 'posted') != self.was_posted:
+            refresh_position_matches(pos)
         return redirect('positions:new_skills', pk=pos.pk)
 
 
 @method_decorator(never_cache, name='dispatch')
 class PositionSkillsView(AdminRequiredMixin, View):
     """
-    Step 2: Add/edit/remove skills, importance & proficiency
+    Step 2: Add/edit/remove skills, importance & proficiency.
+
+    A POST carries any mix of additions, changes and removals, as the
+    step-2 form fields or a JSON diff (see positions/requirement_edits.py),
+    applied together. AJAX and JSON callers get the resulting requirements
+    with their normalized weights back; the form submit goes on to review,
+    or back to step 2 with the error if the diff is rejected (e.g. a row
+    removed in another tab since the page was loaded).
     """
     template_name = 'positions/position_step2.html'
+    query_budget  = {'GET': 8, 'POST': 26}   # POST: independent of the diff's size
 
     def get(self, request, pk):
-        pos = get_object_or_404(Position, pk=pk)
-        used = pos.requirements.values_list('skill_id', flat=True)
+        return self._render(request, pk)
+
+    def _render(self, request, pk, error=None):
+        pos = get_object_or_404(
+            Position.objects.prefetch_related(
+                Prefetch('requirements', queryset=PositionSkillRequirement.objects.select_related('skill'))
+            ),
+            pk=pk,
+        )
+        used = [r.skill_id for r in pos.requirements.all()]
         available_skills = Skill.objects.exclude(pk__in=used)
         return render(request, self.template_name, {
             'position':         pos,
             'available_skills': available_skills,
             'skill_form':       SkillForm(),
-        })
+            'error':            error,
+        }, status=400 if error else 200)
 
     def post(self, request, pk):
-        pos = get_object_or_404(Position, pk=pk)
-
-        # AJAX add existing skill
-        if 'add_skill_id' in request.POST:
-            sid = int(request.POST['add_skill_id'])
-            req, created = PositionSkillRequirement.objects.get_or_create(
-                position=pos,
-                skill_id=sid,
-                defaults={'level_pct': 75, 'importance': 3}
-            )
-            return JsonResponse({
-                'pk':               req.pk,
-                'skill_name':       req.skill.name,
-                'proficiency_vals': dict(PositionSkillRequirement.PROFICIENCY_CHOICES),
-                'current_prof':     'medium',
-                'importance':       req.importance,
-            })
-
-        # Handle edits/removals
-        for req in pos.requirements.all():
-            if request.POST.get(f'delete_{req.pk}') == 'on':
-                req.delete()
-                continue
-
-            prof = request.POST.get(f'prof_{req.pk}')
-            if prof in dict(PositionSkillRequirement.PROFICIENCY_CHOICES):
-                mapping = {'low': 40, 'medium': 75, 'high': 100}
-                req.level_pct = mapping.get(prof, req.level_pct)
-
-            imp = request.POST.get(f'importance_{req.pk}')
-            if imp and imp.isdigit():
-                req.importance = max(1, min(5, int(imp)))
-
-            req.save()
-
-        if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-            return JsonResponse({'status': 'ok'})
-        return redirect('positions:new_review', pk=pk)
+        pos     = get_object_or_404(Position, pk=pk)
+        is_json = request.content_type == 'application/json'
+        is_form = not (is_json or 'add_skill_id' in request.POST
+                       or request.headers.get('x-requested-with') == 'XMLHttpRequest')
+        try:
+            diff    = diff_from_json(json.loads(request.body)) if is_json else diff_from_post(request.POST)
+            changed = apply_requirement_diff(pos, *diff)
+        except ValueError as exc:       # bad JSON or a RequirementDiffError
+            if is_form:
+                return self._render(request, pk, error=str(exc))
+            return JsonResponse({'error': str(exc)}, status=400)
+
+        if is_form:
+            return redirect('positions:new_review', pk=pk)
+
+        reqs  = list(pos.requirements.select_related('skill').order_by('pk'))
+        total = with_normalized_weights(reqs)
+        return JsonResponse({
+            'status':           'ok',
+            'changed':          changed,
+            'total_importance': total,
+            'proficiency_vals': dict(PositionSkillRequirement.PROFICIENCY_CHOICES),
+            'requirements':     [
+                {
+                    'pk':           r.pk,
+                    'skill_id':     r.skill_id,
+                    'skill_name':   r.skill.name,
+                    'proficiency':  PCT_LEVEL.get(r.level_pct),
+                    'level_pct':    r.level_pct,
+                    'importance':   r.importance,
+                    'weight_norm':  r.weight_norm,
+                }
+                for r in reqs
+            ],
+        })
 
 
 @method_decorator(never_cache, name='dispatch')
@@ -142,25 +175,79 @@ class PositionReviewView(AdminRequiredMixin, DetailView):
     """
     model         = Position
     template_name = 'positions/position_review.html'
+    query_budget  = {'GET': 10, 'POST': 16}   # POST: publishing rescores the position
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        reqs  = list(self.object.requirements.all())
-        total = sum(r.importance for r in reqs)
-        for r in reqs:
-            r.weight_norm = round((r.importance / total * 100) if total else 0, 1)
+        reqs  = list(self.object.requirements.select_related('skill'))
+        total = with_normalized_weights(reqs)
         ctx['requirements_with_weight'] = reqs
         ctx['total_importance']        = total
+        ctx['skill_gaps']              = position_gaps(self.object, reqs)
         return ctx
 
     def post(self, request, *args, **kwargs):
-        pos    = self.get_object()
-        action = request.POST.get('action')
+        pos        = self.get_object()
+        action     = request.POST.get('action')
+        was_posted = pos.status == 'posted'
         pos.status = 'posted' if action == 'post' else 'draft'
         pos.save()
+        if (pos.status == 'posted') != was_posted:
+            refresh_position_matches(pos)
         return redirect('positions:list')
 
 
+@method_decorator(never_cache, name='dispatch')
+class PositionTalentView(AdminRequiredMixin, View):
+    """
+    Reverse search: students scoring at least ``min_score`` % on this
+    position, best first, one page at a time (JSON with ?format=json).
+    """
+    template_name = 'positions/position_talent.html'
+    paginate_by   = 50
+    query_budget  = 9
+
+    def get(self, request, pk):
+        pos = get_object_or_404(Position, pk=pk)
+        try:
+            min_score = max(0.0, min(100.0, float(request.GET.get('min_score', 70))))
+        except ValueError:
+            min_score = 70.0
+
+        page     = Paginator(rank_students(pos, min_score), self.paginate_by).get_page(request.GET.get('page'))
+        profiles = StudentProfile.objects.select_related('user').in_bulk(
+                       [pid for pid, _ in page.object_list]
+                   )
+        results  = [
+            {'profile': profiles[pid], 'score': score}
+            for pid, score in page.object_list if pid in profiles
+        ]
+
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'position':  pos.pk,
+                'min_score': min_score,
+                'count':     page.paginator.count,
+                'page':      page.number,
+                'num_pages': page.paginator.num_pages,
+                'results':   [
+                    {
+                        'profile_id': r['profile'].pk,
+                        'username':   r['profile'].user.username,
+                        'email':      r['profile'].user.email,
+                        'score':      round(r['score'], 1),
+                    }
+                    for r in results
+                ],
+            })
+        return render(request, self.template_name, {
+            'position':  pos,
+            'min_score': min_score,
+            'page_obj':  page,
+            'results':   results,
+        })
+
+
 @method_decorator(never_cache, name='dispatch')
 class PositionDeleteView(AdminRequiredMixin, DeleteView):
     model         = Position
@@ -182,12 +269,52 @@ class PositionStatusView(AdminRequiredMixin, View):
     def post(self, request, pk):
         pos = get_object_or_404(Position, pk=pk)
         new = request.POST.get('status')
-        if new in dict(Position.STATUS_CHOICES):
+        if new in dict(Position.STATUS_CHOICES) and new != pos.status:
+            was_posted = pos.status == 'posted'
             pos.status = new
             pos.save()
+            if (new == 'posted') != was_posted:     # stored matches cover posted positions only
+                refresh_position_matches(pos)
         return redirect('positions:list')
 
 
+@method_decorator(never_cache, name='dispatch')
+class PositionImportView(AdminRequiredMixin, View):
+    """
+    Upload a CSV or JSONL file of positions (see positions/importer.py);
+    the page shows the import report with the rejected rows. The import
+    runs inside the request, so catalogue-sized files belong in
+    ``manage.py import_positions``. Scoring posted positions against every
+    student would dominate the request, so uploads come in as drafts
+    (rows marked posted included) and are scored as they are published.
+    """
+    template_name  = 'positions/position_import.html'
+    query_budget   = {'GET': 4}    # POST grows with the file, a few queries per batch
+    status_choices = [(k, v) for k, v in Position.STATUS_CHOICES if k != 'posted']
+
+    def get(self, request):
+        return render(request, self.template_name, {'status_choices': self.status_choices})
+
+    def post(self, request):
+        ctx    = {'status_choices': self.status_choices}
+        upload = request.FILES.get('file')
+        fmt    = request.POST.get('format') or (detect_format(upload.name) if upload else None)
+        status = request.POST.get('status') or 'draft'
+        if upload is None or fmt is None or status not in STATUSES:
+            ctx['error'] = "Choose a .csv or .jsonl file and a valid default status."
+            return render(request, self.template_name, ctx, status=400)
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            ctx['report'] = import_positions(stream, fmt, status=status, publish=False)
+        except ValueError as exc:
+            ctx['error'] = str(exc)
+            return render(request, self.template_name, ctx, status=400)
+        finally:
+            stream.detach()
+        ctx['max_errors'] = MAX_ERRORS
+        return render(request, self.template_name, ctx)
+
+
 @require_POST
 def create_tag(request):
     form = TagForm(request.POST)